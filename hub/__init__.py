@@ -23,10 +23,8 @@ from .core.transform import compute, compose
 from .core.dataset import Dataset
 from .core.tensor import Tensor
 from .util.bugout_reporter import hub_reporter
-from .compression import SUPPORTED_COMPRESSIONS
 from .htype import HTYPE_CONFIGURATIONS
 
-compressions = list(SUPPORTED_COMPRESSIONS)
 htypes = list(HTYPE_CONFIGURATIONS.keys())
 list = dataset.list
 load = dataset.load
@@ -59,6 +57,17 @@ __all__ = [
 __version__ = "2.0.10"
 __encoded_version__ = np.array(__version__)
 
+
+def __getattr__(name):
+    # the list of compressions depends on the installed Pillow plugins, which are slow to load
+    global compressions
+    if name == "compressions":
+        from .compression import SUPPORTED_COMPRESSIONS
+
+        compressions = [*SUPPORTED_COMPRESSIONS]  # `list` is shadowed by `dataset.list`
+        return compressions
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 hub_reporter.tags.append(f"version:{__version__}")
-hub_reporter.system_report(publish=True)
 hub_reporter.setup_excepthook(publish=True)
@@ -14,8 +14,6 @@ from hub.client.log import logger
 from hub.util.keys import dataset_exists
 from hub.util.auto import get_most_common_extension
 from hub.util.bugout_reporter import hub_reporter, feature_report_path
-from hub.auto.unstructured.image_classification import ImageClassification
-from hub.auto.unstructured.kaggle import download_kaggle_dataset
 from hub.client.client import HubBackendClient
 from hub.util.exceptions import (
     DatasetHandlerError,
@@ -37,6 +35,9 @@ class dataset:
         local_cache_size: int = DEFAULT_LOCAL_CACHE_SIZE,
         creds: Optional[dict] = None,
         token: Optional[str] = None,
+        eviction_policy: str = "lru",
+        decoded_cache_size: int = 0,
+        use_manifest: bool = False,
     ):
         """Returns a Dataset object referencing either a new or existing dataset.
 
@@ -59,6 +60,12 @@ class dataset:
                 This takes precedence over credentials present in the environment. Currently only works with s3 paths.
                 It supports 'aws_access_key_id', 'aws_secret_access_key', 'aws_session_token', 'endpoint_url' and 'region' as keys.
             token (str, optional): Activeloop token, used for fetching credentials for Hub datasets. This is optional, tokens are normally autogenerated.
+            eviction_policy (str): The eviction policy of the memory and local caches. One of "lru", "lfu", "2q", "arc" or "pinned".
+                "2q" and "arc" keep frequently reused chunks and metadata cached during sequential scans, "pinned" never evicts metadata in favour of chunks.
+            decoded_cache_size (int): The size of the cache of decoded samples to be used in MB. Defaults to 0 (disabled).
+                Decoded samples of sample compressed tensors (such as jpeg images) are cached, so that later epochs don't decode them again.
+            use_manifest (bool): If True, the keys of an s3 dataset are listed from a manifest object updated on flush instead of
+                listing the whole prefix, which makes opening large datasets faster. Every writer of the dataset should use it.
 
         Returns:
             Dataset object created using the arguments provided.
@@ -75,6 +82,9 @@ class dataset:
             token=token,
             memory_cache_size=memory_cache_size,
             local_cache_size=local_cache_size,
+            eviction_policy=eviction_policy,
+            decoded_cache_size=decoded_cache_size,
+            use_manifest=use_manifest,
         )
         if overwrite and dataset_exists(storage):
             storage.clear()
@@ -93,6 +103,9 @@ class dataset:
         local_cache_size: int = DEFAULT_LOCAL_CACHE_SIZE,
         creds: Optional[dict] = None,
         token: Optional[str] = None,
+        eviction_policy: str = "lru",
+        decoded_cache_size: int = 0,
+        use_manifest: bool = False,
     ) -> Dataset:
         """Creates an empty dataset
 
@@ -113,6 +126,12 @@ class dataset:
                 This takes precedence over credentials present in the environment. Currently only works with s3 paths.
                 It supports 'aws_access_key_id', 'aws_secret_access_key', 'aws_session_token', 'endpoint_url' and 'region' as keys.
             token (str, optional): Activeloop token, used for fetching credentials for Hub datasets. This is optional, tokens are normally autogenerated.
+            eviction_policy (str): The eviction policy of the memory and local caches. One of "lru", "lfu", "2q", "arc" or "pinned".
+                "2q" and "arc" keep frequently reused chunks and metadata cached during sequential scans, "pinned" never evicts metadata in favour of chunks.
+            decoded_cache_size (int): The size of the cache of decoded samples to be used in MB. Defaults to 0 (disabled).
+                Decoded samples of sample compressed tensors (such as jpeg images) are cached, so that later epochs don't decode them again.
+            use_manifest (bool): If True, the keys of an s3 dataset are listed from a manifest object updated on flush instead of
+                listing the whole prefix, which makes opening large datasets faster. Every writer of the dataset should use it.
 
         Returns:
             Dataset object created using the arguments provided.
@@ -132,6 +151,9 @@ class dataset:
             token=token,
             memory_cache_size=memory_cache_size,
             local_cache_size=local_cache_size,
+            eviction_policy=eviction_policy,
+            decoded_cache_size=decoded_cache_size,
+            use_manifest=use_manifest,
         )
 
         if overwrite and dataset_exists(storage):
@@ -156,6 +178,9 @@ class dataset:
         local_cache_size: int = DEFAULT_LOCAL_CACHE_SIZE,
         creds: Optional[dict] = None,
         token: Optional[str] = None,
+        eviction_policy: str = "lru",
+        decoded_cache_size: int = 0,
+        use_manifest: bool = False,
     ) -> Dataset:
         """Loads an existing dataset
 
@@ -178,6 +203,12 @@ class dataset:
                 This takes precedence over credentials present in the environment. Currently only works with s3 paths.
                 It supports 'aws_access_key_id', 'aws_secret_access_key', 'aws_session_token', 'endpoint_url' and 'region' as keys.
             token (str, optional): Activeloop token, used for fetching credentials for Hub datasets. This is optional, tokens are normally autogenerated.
+            eviction_policy (str): The eviction policy of the memory and local caches. One of "lru", "lfu", "2q", "arc" or "pinned".
+                "2q" and "arc" keep frequently reused chunks and metadata cached during sequential scans, "pinned" never evicts metadata in favour of chunks.
+            decoded_cache_size (int): The size of the cache of decoded samples to be used in MB. Defaults to 0 (disabled).
+                Decoded samples of sample compressed tensors (such as jpeg images) are cached, so that later epochs don't decode them again.
+            use_manifest (bool): If True, the keys of an s3 dataset are listed from a manifest object updated on flush instead of
+                listing the whole prefix, which makes opening large datasets faster. Every writer of the dataset should use it.
 
         Returns:
             Dataset object created using the arguments provided.
@@ -197,6 +228,9 @@ class dataset:
             token=token,
             memory_cache_size=memory_cache_size,
             local_cache_size=local_cache_size,
+            eviction_policy=eviction_policy,
+            decoded_cache_size=decoded_cache_size,
+            use_manifest=use_manifest,
         )
 
         if not dataset_exists(storage):
@@ -362,6 +396,8 @@ class dataset:
         ds = hub.dataset(dest, creds=dest_creds, **dataset_kwargs)
 
         # TODO: support more than just image classification (and update docstring)
+        from hub.auto.unstructured.image_classification import ImageClassification
+
         unstructured = ImageClassification(source=src)
 
         # TODO: auto detect compression
@@ -419,6 +455,8 @@ class dataset:
             if os.path.samefile(src, dest):
                 raise SamePathException(src)
 
+        from hub.auto.unstructured.kaggle import download_kaggle_dataset
+
         download_kaggle_dataset(
             tag,
             local_path=src,
@@ -4,6 +4,7 @@ import pytest
 import hub
 from hub.core.dataset import Dataset
 from hub.tests.common import assert_array_lists_equal
+from hub.util.remove_cache import get_base_storage
 from hub.util.exceptions import (
     TensorDtypeMismatchError,
     TensorInvalidSampleShapeError,
@@ -73,6 +74,31 @@ def test_persist_with(ds_generator):
     assert ds_new.meta.version == hub.__version__
 
 
+def test_persist_with_manifest(s3_ds_generator):
+    with s3_ds_generator(use_manifest=True) as ds:
+        ds.create_tensor("image")
+        ds.image.extend(np.ones((4, 16, 16)))
+    assert get_base_storage(ds.storage).use_manifest
+
+    ds_new = s3_ds_generator(use_manifest=True)
+    assert len(ds_new) == 4
+    np.testing.assert_array_equal(ds_new.image.numpy(), np.ones((4, 16, 16)))
+
+
+@enabled_persistent_dataset_generators
+def test_append_after_reopen(ds_generator):
+    ds = ds_generator()
+    ds.create_tensor("label")
+    ds.label.extend(np.arange(4))
+
+    # the new sample is appended to the last chunk, which was read from storage
+    ds = ds_generator()
+    ds.label.append(4)
+
+    ds = ds_generator()
+    np.testing.assert_array_equal(ds.label.numpy(), np.arange(5).reshape(5, 1))
+
+
 @enabled_persistent_dataset_generators
 def test_persist_clear_cache(ds_generator):
     ds = ds_generator()
@@ -696,3 +722,21 @@ def test_htypes_list():
         "binary_mask",
         "segment_mask",
     ]
+
+
+@enabled_datasets
+def test_array_indexing(ds):
+    with ds:
+        ds.create_tensor("data", max_chunk_size=1000)
+        ds.data.extend(np.arange(500).reshape(250, 2))
+
+    idxs = np.random.permutation(250)
+    np.testing.assert_array_equal(ds.data[idxs].numpy(), ds.data.numpy()[idxs])
+    np.testing.assert_array_equal(ds[idxs].data.numpy(), ds.data.numpy()[idxs])
+    np.testing.assert_array_equal(
+        ds[idxs][10:20].data.numpy(), ds.data.numpy()[idxs][10:20]
+    )
+    np.testing.assert_array_equal(
+        ds.data[::-1][idxs[:5]].numpy(), ds.data.numpy()[::-1][idxs[:5]]
+    )
+    assert len(ds[idxs[:17]]) == 17
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+from hub.constants import KB
+from hub.util.exceptions import TensorDoesNotExistError
+from hub.tests.dataset_fixtures import enabled_datasets
+
+
+def _populate(ds):
+    with ds:
+        ds.create_tensor("image", max_chunk_size=4 * KB)
+        ds.create_tensor("label")
+        ds.image.extend(np.arange(100 * 8 * 8).reshape(100, 8, 8))
+        ds.label.extend(np.arange(100))
+
+
+@enabled_datasets
+def test_iter_chunks(ds):
+    _populate(ds)
+
+    blocks = list(ds.image.iter_chunks())
+    assert len(blocks) > 1
+    np.testing.assert_array_equal(np.concatenate(blocks), ds.image.numpy())
+
+    blocks = list(ds.image[5:90:3].iter_chunks())
+    np.testing.assert_array_equal(np.concatenate(blocks), ds.image[5:90:3].numpy())
+
+    blocks = list(ds.image[::-1].iter_chunks())
+    np.testing.assert_array_equal(np.concatenate(blocks), ds.image[::-1].numpy())
+
+    blocks = list(ds.image[10:20, 2:4, 1].iter_chunks())
+    np.testing.assert_array_equal(
+        np.concatenate(blocks), ds.image[10:20, 2:4, 1].numpy()
+    )
+
+
+@enabled_datasets
+def test_iter_chunks_dynamic(ds):
+    with ds:
+        ds.create_tensor("image")
+        ds.image.extend([np.ones((i, i)) * i for i in range(1, 20)])
+
+    blocks = list(ds.image.iter_chunks(aslist=True))
+    samples = [sample for block in blocks for sample in block]
+    assert len(samples) == 19
+    for i, sample in enumerate(samples, 1):
+        np.testing.assert_array_equal(sample, np.ones((i, i)) * i)
+
+
+@enabled_datasets
+@pytest.mark.parametrize("drop_last", [True, False])
+def test_batches(ds, drop_last):
+    _populate(ds)
+
+    batches = list(ds.batches(32, drop_last=drop_last))
+    assert len(batches) == (3 if drop_last else 4)
+
+    for i, batch in enumerate(batches):
+        expected = slice(i * 32, min((i + 1) * 32, 100))
+        np.testing.assert_array_equal(batch["image"], ds.image[expected].numpy())
+        np.testing.assert_array_equal(batch["label"], ds.label[expected].numpy())
+
+    batches = list(ds[10:50].batches(16, tensors=["label"]))
+    assert [list(batch) for batch in batches] == [["label"]] * 3
+    np.testing.assert_array_equal(
+        np.concatenate([batch["label"] for batch in batches]), ds.label[10:50].numpy()
+    )
+
+    with pytest.raises(TensorDoesNotExistError):
+        list(ds.batches(4, tensors=["missing"]))
+
+    with pytest.raises(ValueError):
+        list(ds.batches(0))
+
+
+def test_batches_uneven_tensors(memory_ds):
+    _populate(memory_ds)
+    memory_ds.label.append(100)
+
+    batches = list(memory_ds.batches(64))
+    assert len(batches) == 2
+    assert len(batches[1]["image"]) == len(batches[1]["label"]) == 36
+
+
+def test_batches_dynamic(memory_ds):
+    memory_ds.create_tensor("image")
+    memory_ds.image.extend([np.ones((i % 3 + 1, 2)) for i in range(10)])
+
+    batches = list(memory_ds.batches(4))
+    assert [len(batch["image"]) for batch in batches] == [4, 4, 2]
+    assert isinstance(batches[0]["image"], list)
+    for i, sample in enumerate(s for batch in batches for s in batch["image"]):
+        np.testing.assert_array_equal(sample, np.ones((i % 3 + 1, 2)))
@@ -0,0 +1,38 @@
+import json
+import os
+import subprocess
+import sys
+
+
+# optional dependencies that must only be imported when they are used
+LAZY_MODULES = [
+    "boto3",
+    "botocore",
+    "PIL.Image",
+    "pathos",
+    "torch",
+    "tensorflow",
+    "tqdm",
+    "hub.core.storage.s3",
+    "hub.integrations.pytorch",
+    "hub.integrations.tensorflow",
+]
+
+
+def _import_hub():
+    script = (
+        "import sys, json, hub; "
+        f"print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))"
+    )
+    output = subprocess.check_output(
+        [sys.executable, "-c", script], env={**os.environ, "BUGGER_OFF": "true"}
+    )
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def test_lazy_imports():
+    assert _import_hub() == []
+
+
+def test_import_time(benchmark):
+    benchmark.pedantic(_import_hub, rounds=3, iterations=1)
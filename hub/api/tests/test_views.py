@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+import hub
+from hub.core.index import IndexRuns
+from hub.util.exceptions import ViewDoesNotExistError
+from hub.tests.dataset_fixtures import enabled_datasets
+
+
+@enabled_datasets
+def test_save_load_view(ds):
+    with ds:
+        ds.create_tensor("data", max_chunk_size=1000)
+        ds.data.extend(np.arange(200))
+
+    ds[10:50].save_view("contiguous")
+    ds[[5, 3, 190, 191, 192]].save_view("fancy")
+    ds[::7].save_view("strided")
+
+    np.testing.assert_array_equal(
+        ds.load_view("contiguous").data.numpy(), ds.data[10:50].numpy()
+    )
+    np.testing.assert_array_equal(
+        ds[100:].load_view("fancy").data.numpy(),
+        ds.data[[5, 3, 190, 191, 192]].numpy(),
+    )
+    np.testing.assert_array_equal(
+        ds.load_view("strided").data.numpy(), ds.data[::7].numpy()
+    )
+
+    ds[0:5].save_view("contiguous")
+    assert len(ds.load_view("contiguous")) == 5
+
+    ds.delete_view("fancy")
+    with pytest.raises(ViewDoesNotExistError):
+        ds.load_view("fancy")
+    with pytest.raises(ViewDoesNotExistError):
+        ds.delete_view("fancy")
+
+    with pytest.raises(NotImplementedError):
+        ds[0:5, 0].save_view("multi_axis")
+
+
+def test_persisted_view(local_ds_generator):
+    ds = local_ds_generator()
+    ds.create_tensor("data")
+    ds.data.extend(np.arange(100))
+    ds[20:30].save_view("view")
+
+    view = local_ds_generator().load_view("view")
+    np.testing.assert_array_equal(view.data.numpy(), np.arange(20, 30).reshape(-1, 1))
+
+
+def test_loaded_view_is_not_expanded(memory_ds, monkeypatch):
+    ds = memory_ds
+    ds.create_tensor("data", max_chunk_size=1000)
+    ds.data.extend(np.arange(200))
+    indices = np.concatenate((np.arange(10, 60), np.arange(100, 150), [5, 3]))
+    ds[indices].save_view("runs")
+
+    # the runs are kept by the view, and only expanded when samples are read
+    expand = IndexRuns.numpy
+    expanded = []
+    monkeypatch.setattr(
+        IndexRuns, "numpy", lambda runs: expanded.append(runs) or expand(runs)
+    )
+    view = ds.load_view("runs")
+    sub_view = view[40:70]
+    assert len(view) == 102 and len(sub_view) == 30
+    assert not expanded
+    np.testing.assert_array_equal(view.data.numpy().reshape(-1), indices)
+    np.testing.assert_array_equal(sub_view.data.numpy().reshape(-1), indices[40:70])
+    np.testing.assert_array_equal(view[51].data.numpy(), [101])
+
+    view.save_view("copy")
+    assert ds.load_view("copy").index.values[0].value == view.index.values[0].value
+
+
+@enabled_datasets
+def test_view_set_operations(ds):
+    ds.create_tensor("data")
+    ds.data.extend(np.arange(100))
+
+    a, b = ds[10:60], ds[[70, 55, 56, 5, 90]]
+    np.testing.assert_array_equal(
+        a.union(b).data.numpy().reshape(-1), [5, *range(10, 60), 70, 90]
+    )
+    np.testing.assert_array_equal(a.intersection(b).data.numpy().reshape(-1), [55, 56])
+    np.testing.assert_array_equal(
+        a.difference(b).data.numpy().reshape(-1),
+        [*range(10, 55), *range(57, 60)],
+    )
+
+    other = hub.dataset("mem://other")
+    with pytest.raises(ValueError):
+        a.union(other)
@@ -1,4 +1,4 @@
-from PIL import Image  # type: ignore
+from typing import Dict
 
 
 BYTE_COMPRESSIONS = [
@@ -6,7 +6,8 @@ BYTE_COMPRESSIONS = [
 ]
 
 
-IMAGE_COMPRESSIONS = [
+# candidates, `IMAGE_COMPRESSIONS` only keeps the ones the installed Pillow can read and write
+_IMAGE_COMPRESSIONS = [
     "bmp",
     "dib",
     "pcx",
@@ -30,20 +31,6 @@ IMAGE_COMPRESSION = "image"
 COMPRESSION_TYPES = [BYTE_COMPRESSION, IMAGE_COMPRESSION]
 
 
-# Pillow plugins for some formats might not be installed:
-if not Image.SAVE:
-    Image.init()
-IMAGE_COMPRESSIONS = [
-    c for c in IMAGE_COMPRESSIONS if c.upper() in Image.SAVE and c.upper() in Image.OPEN
-]
-
-SUPPORTED_COMPRESSIONS = [
-    *BYTE_COMPRESSIONS,
-    *IMAGE_COMPRESSIONS,
-]
-SUPPORTED_COMPRESSIONS = list(sorted(set(SUPPORTED_COMPRESSIONS)))  # type: ignore
-SUPPORTED_COMPRESSIONS.append(None)  # type: ignore
-
 COMPRESSION_ALIASES = {"jpg": "jpeg"}
 
 # If `True`  compression format has to be the same between samples in the same tensor.
@@ -51,12 +38,45 @@ COMPRESSION_ALIASES = {"jpg": "jpeg"}
 USE_UNIFORM_COMPRESSION_PER_SAMPLE = True
 
 
-_compression_types = {}
-for c in IMAGE_COMPRESSIONS:
-    _compression_types[c] = IMAGE_COMPRESSION
-for c in BYTE_COMPRESSIONS:
-    _compression_types[c] = BYTE_COMPRESSION
+_compression_types: Dict[str, str] = {}
+
+
+def _load_image_compressions():
+    """Initializing Pillow's plugins is slow, so the supported image compressions are only determined on first use."""
+    global IMAGE_COMPRESSIONS, SUPPORTED_COMPRESSIONS
+
+    from PIL import Image  # type: ignore
+
+    # Pillow plugins for some formats might not be installed:
+    if not Image.SAVE:
+        Image.init()
+    IMAGE_COMPRESSIONS = [
+        c
+        for c in _IMAGE_COMPRESSIONS
+        if c.upper() in Image.SAVE and c.upper() in Image.OPEN
+    ]
+
+    SUPPORTED_COMPRESSIONS = [
+        *BYTE_COMPRESSIONS,
+        *IMAGE_COMPRESSIONS,
+    ]
+    SUPPORTED_COMPRESSIONS = list(sorted(set(SUPPORTED_COMPRESSIONS)))  # type: ignore
+    SUPPORTED_COMPRESSIONS.append(None)  # type: ignore
+
+    for c in IMAGE_COMPRESSIONS:
+        _compression_types[c] = IMAGE_COMPRESSION
+    for c in BYTE_COMPRESSIONS:
+        _compression_types[c] = BYTE_COMPRESSION
+
+
+def __getattr__(name):
+    if name in ("IMAGE_COMPRESSIONS", "SUPPORTED_COMPRESSIONS"):
+        _load_image_compressions()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_compression_type(c):
+    if not _compression_types:
+        _load_image_compressions()
     return _compression_types[c]
@@ -42,6 +42,9 @@ TENSOR_INFO_FILENAME = "tensor_info.json"
 
 DATASET_LOCK_FILENAME = "dataset_lock.lock"
 
+# saved views are stored as run-length encoded indices in this folder, relative to the dataset root
+DATASET_VIEWS_FOLDER = "_views"
+
 DATASET_LOCK_UPDATE_INTERVAL = 120  # seconds
 DATASET_LOCK_VALIDITY = 300  # seconds
 
@@ -79,8 +82,28 @@ KEEP_STORAGE_OPT = "--keep-storage"
 KAGGLE_OPT = "--kaggle"
 
 
+# `S3Provider(use_manifest=True)` keeps the list of keys of a dataset in this object, relative to the dataset root
+S3_KEYS_MANIFEST_FILENAME = "keys_manifest.json"
+
+# `PackProvider` starts a new pack file once the current one would grow past this size
+PACK_MAX_SIZE = 1 * GB
+PACK_INDEX_FILENAME = "pack_index"
+
+# `LocalProvider` memory maps files at least this large instead of reading them into memory
+LOCAL_MMAP_MIN_SIZE = 64 * KB
+# ...and keeps at most this many of them mapped at a time, as every map holds a file descriptor
+LOCAL_MMAP_MAX_OPEN_MAPS = 256
+
+# `PrefetchLRUCache` stores chunks in a single shared memory arena of the size of the cache, up to this size. Chunks
+# that don't fit in the arena get a shared memory segment of their own
+SHARED_MEMORY_ARENA_MAX_SIZE = 2 * GB
+
 EMERGENCY_STORAGE_PATH = "/tmp/emergency_storage"
 LOCAL_CACHE_PREFIX = "~/.activeloop/cache"
 
+# the local cache built by `generate_chain` is shared by all datasets and processes, and persists across runs
+PERSISTENT_CACHE_ROOT = f"{LOCAL_CACHE_PREFIX}/persistent"
+PERSISTENT_CACHE_INDEX_FILENAME = "index.sqlite"
+
 # when cache is full upto this threshold, it will start suggesting new indexes intelligently based on existing contents
 INTELLIGENT_SHUFFLING_THRESHOLD = 0.8
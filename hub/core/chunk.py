@@ -65,6 +65,7 @@ class Chunk(Cachable):
         # These caches are only used when chunk-wise compression is specified.
         self._decompressed_samples_cache: Optional[List[np.ndarray]] = None
         self._decompressed_data_cache: Optional[memoryview] = None
+        self._decompressed_nbytes: Optional[int] = None
 
     def decompressed_samples(
         self,
@@ -79,6 +80,7 @@ class Chunk(Cachable):
             self._decompressed_samples_cache = decompress_multiple(
                 self._data, shapes, dtype, compression
             )
+            self._decompressed_nbytes = None
         return self._decompressed_samples_cache
 
     def decompressed_data(self, compression: str) -> memoryview:
@@ -88,6 +90,7 @@ class Chunk(Cachable):
                 self._decompressed_data_cache = memoryview(
                     decompress_bytes(self._data, compression)
                 )
+                self._decompressed_nbytes = None
             except SampleDecompressionError:
                 raise ValueError(
                     "Chunk.decompressed_data() can not be called on chunks compressed with image compressions. Use Chunk.get_samples() instead."
@@ -182,6 +185,7 @@ class Chunk(Cachable):
     def _clear_decompressed_caches(self):
         self._decompressed_samples_cache = None
         self._decompressed_data_cache = None
+        self._decompressed_nbytes = 0
 
     def register_sample_to_headers(
         self, incoming_num_bytes: Optional[int], sample_shape: Tuple[int]
@@ -214,6 +218,7 @@ class Chunk(Cachable):
         """Updates data and headers for `local_sample_index` with the incoming `new_buffer` and `new_shape`."""
 
         ffw_chunk(self)
+        self._decompressed_nbytes = None
 
         expected_dimensionality = len(self.shapes_encoder[local_sample_index])
         if expected_dimensionality != len(new_shape):
@@ -292,6 +297,21 @@ class Chunk(Cachable):
             len_data=len(self._data),
         )
 
+    @property
+    def memory_nbytes(self) -> int:
+        """`nbytes`, plus the size of the decompressed copies of the chunk's data kept in memory, if any."""
+
+        if self._decompressed_nbytes is None:
+            nbytes = 0
+            if self._decompressed_samples_cache is not None:
+                nbytes += sum(
+                    sample.nbytes for sample in self._decompressed_samples_cache
+                )
+            if self._decompressed_data_cache is not None:
+                nbytes += self._decompressed_data_cache.nbytes
+            self._decompressed_nbytes = nbytes
+        return self.nbytes + self._decompressed_nbytes
+
     def tobytes(self) -> memoryview:
         return serialize_chunk(
             self.version,
@@ -4,7 +4,7 @@ from hub.util.casting import get_dtype, intelligent_cast
 from hub.core.compression import decompress_array
 from hub.compression import get_compression_type, BYTE_COMPRESSION, IMAGE_COMPRESSION
 from math import ceil
-from typing import Any, Optional, Sequence, Union, Tuple, List, Set
+from typing import Any, Iterator, Optional, Sequence, Union, Tuple, List, Set
 from hub.util.exceptions import (
     CorruptedMetaError,
     DynamicTensorNumpyError,
@@ -12,9 +12,12 @@ from hub.util.exceptions import (
 from hub.core.meta.tensor_meta import TensorMeta
 from hub.core.index.index import Index
 from hub.core.storage.lru_cache import LRUCache
+from hub.core.storage.decoded_cache import DecodedSampleCache
+from hub.core.storage.persistent_cache import PersistentCache
+from hub.core.storage.provider import StorageProvider
 from hub.core.chunk import Chunk
-from hub.core.meta.encode.chunk_id import ChunkIdEncoder
-from hub.core.serialize import serialize_input_samples
+from hub.core.meta.encode.chunk_id import ChunkIdEncoder, LAST_SEEN_INDEX_COLUMN
+from hub.core.serialize import read_shape_info, serialize_input_samples
 from hub.core.compression import compress_multiple, decompress_multiple
 
 from hub.util.keys import (
@@ -23,7 +26,7 @@ from hub.util.keys import (
     get_tensor_meta_key,
 )
 from hub.core.sample import Sample, SampleValue  # type: ignore
-from hub.constants import DEFAULT_MAX_CHUNK_SIZE
+from hub.constants import DEFAULT_MAX_CHUNK_SIZE, ENCODING_DTYPE
 import hub
 from itertools import repeat
 
@@ -50,6 +53,69 @@ def is_uniform_sequence(samples):
 CHUNK_UPDATE_WARN_PORTION = 0.2
 
 
+def read_local_sample(
+    chunk: Chunk,
+    local_sample_index: int,
+    dtype: str,
+    sample_compression: Optional[str],
+    chunk_compression: Optional[str],
+    cast: bool = True,
+    copy: bool = False,
+    decoded_cache: Optional[DecodedSampleCache] = None,
+) -> np.ndarray:
+    """Reads the sample at `local_sample_index` (relative to the chunk) from a chunk, decompressing it if needed. Used by
+    `ChunkEngine.read_local_sample_from_chunk`, and by processes that don't have the chunk engine of the tensor.
+
+    Args:
+        chunk (Chunk): The chunk to read from.
+        local_sample_index (int): Index of the sample in the chunk.
+        dtype (str): The dtype of the tensor.
+        sample_compression (str, optional): The sample compression of the tensor. None for chunks returned by
+            `decompress_chunk`.
+        chunk_compression (str, optional): The chunk compression of the tensor. None for chunks returned by
+            `decompress_chunk`.
+        cast (bool): If True, decompressed samples are cast to `dtype`.
+        copy (bool): If True, uncompressed samples are copied out of the chunk instead of being views of its data.
+        decoded_cache (DecodedSampleCache, optional): Cache of decompressed samples, looked up by the key of the chunk.
+
+    Returns:
+        np.ndarray: The sample.
+    """
+    buffer = chunk.memoryview_data
+    shape = chunk.shapes_encoder[local_sample_index]
+    if len(buffer) == 0:
+        return np.zeros(shape, dtype=dtype)
+
+    if chunk_compression:
+        if get_compression_type(chunk_compression) == BYTE_COMPRESSION:
+            decompressed = chunk.decompressed_data(compression=chunk_compression)
+            sb, eb = chunk.byte_positions_encoder[local_sample_index]
+            return np.frombuffer(decompressed[sb:eb], dtype=dtype).reshape(shape)
+        samples = chunk.decompressed_samples(compression=chunk_compression, dtype=dtype)
+        return samples[local_sample_index]
+
+    sb, eb = chunk.byte_positions_encoder[local_sample_index]
+    buffer = buffer[sb:eb]
+    if sample_compression:
+        chunk_key = getattr(chunk, "key", None)
+        sample = None
+        if decoded_cache is not None and chunk_key is not None:
+            sample = decoded_cache.get(chunk_key, local_sample_index)
+        if sample is None:
+            sample = decompress_array(
+                buffer, shape, dtype=dtype, compression=sample_compression
+            )
+            if decoded_cache is not None and chunk_key is not None:
+                decoded_cache.put(chunk_key, local_sample_index, sample)
+        if cast and sample.dtype != dtype:
+            sample = sample.astype(dtype)
+        return sample
+
+    if copy:
+        buffer = bytes(buffer)
+    return np.frombuffer(buffer, dtype=dtype).reshape(shape)
+
+
 class ChunkEngine:
     def __init__(
         self,
@@ -344,7 +410,8 @@ class ChunkEngine:
             chunk_keys = [self.last_chunk_key]
         for chunk_key in chunk_keys:
             chunk = self.get_chunk(chunk_key)
-            self.cache.update_used_cache_for_path(chunk_key, chunk.nbytes)  # type: ignore
+            # re-setting marks the chunk dirty, it may have been read from storage before being appended to
+            self.cache[chunk_key] = chunk
 
         # synchronize tensor meta
         tensor_meta_key = get_tensor_meta_key(self.key)
@@ -431,8 +498,9 @@ class ChunkEngine:
             samples, tensor_meta, self.min_chunk_size
         )
         for shape in shapes:
+            # length is bumped per sample so the shape interval of a new tensor isn't reset by every sample in the batch
             tensor_meta.update_shape_interval(shape)
-        tensor_meta.length += len(samples)
+            tensor_meta.length += 1
         if tensor_meta.chunk_compression:
             for nb, shape in zip(nbytes, shapes):
                 self._append_bytes(buff[:nb], shape[:])  # type: ignore
@@ -542,24 +610,59 @@ class ChunkEngine:
             Union[np.ndarray, Sequence[np.ndarray]]: Either a list of numpy arrays or a single numpy array (depending on the `aslist` argument).
         """
         length = self.num_samples
-        enc = self.chunk_id_encoder
         last_shape = None
         samples = []
 
-        for global_sample_index in index.values[0].indices(length):
-            chunk = self.get_chunk_for_sample(global_sample_index, enc)
-            sample = self.read_sample_from_chunk(global_sample_index, chunk)
-            shape = sample.shape
+        # samples are read in chunk order, then put back in the order they were requested
+        global_sample_indices, order = index.access_plan(length)
+
+        for chunk, local_sample_indices in self._iter_chunk_runs(global_sample_indices):
+            for local_sample_index in local_sample_indices.tolist():
+                sample = self.read_local_sample_from_chunk(local_sample_index, chunk)
+                shape = sample.shape
+
+                if not aslist and last_shape is not None:
+                    if shape != last_shape:
+                        raise DynamicTensorNumpyError(self.key, index, "shape")
 
-            if not aslist and last_shape is not None:
-                if shape != last_shape:
-                    raise DynamicTensorNumpyError(self.key, index, "shape")
+                samples.append(sample)
+                last_shape = shape
 
-            samples.append(sample)
-            last_shape = shape
+        if order is not None:
+            samples = [samples[i] for i in np.argsort(order)]
 
         return _format_read_samples(samples, index, aslist)
 
+    def _iter_chunk_runs(
+        self, global_sample_indices: np.ndarray
+    ) -> Iterator[Tuple[Chunk, np.ndarray]]:
+        """Splits `global_sample_indices` into runs of consecutive indices that live in the same chunk.
+
+        Args:
+            global_sample_indices (np.ndarray): Indices of samples in the tensor, in the order they are read.
+
+        Yields:
+            Tuples of the chunk and the run's indices relative to that chunk.
+        """
+
+        if len(global_sample_indices) == 0:
+            return
+
+        enc = self.chunk_id_encoder
+        last_indices = enc.array[:, LAST_SEEN_INDEX_COLUMN].astype(np.int64)
+        rows = np.searchsorted(last_indices, global_sample_indices)
+
+        # a new run starts wherever the next sample lives in a different chunk
+        boundaries = np.flatnonzero(np.diff(rows)) + 1
+        starts = np.r_[0, boundaries]
+        stops = np.r_[boundaries, len(rows)]
+
+        for start, stop in zip(starts.tolist(), stops.tolist()):
+            row = rows[start]
+            chunk_start = last_indices[row - 1] + 1 if row > 0 else 0
+            chunk = self.get_chunk_for_sample(int(global_sample_indices[start]), enc)
+            yield chunk, global_sample_indices[start:stop] - chunk_start
+
     def get_chunk_for_sample(
         self, global_sample_index: int, enc: ChunkIdEncoder
     ) -> Chunk:
@@ -581,46 +684,203 @@ class ChunkEngine:
         return chunk
 
     def read_sample_from_chunk(
-        self, global_sample_index: int, chunk: Chunk, cast: bool = True, copy=False
+        self,
+        global_sample_index: int,
+        chunk: Chunk,
+        cast: bool = True,
+        copy=False,
+        decompressed: bool = False,
     ) -> np.ndarray:
         """Read a sample from a chunk, converts the global index into a local index. Handles decompressing if applicable."""
 
-        dtype = self.tensor_meta.dtype
-
         enc = self.chunk_id_encoder
+        local_sample_index = enc.translate_index_relative_to_chunks(global_sample_index)
+        return self.read_local_sample_from_chunk(
+            local_sample_index, chunk, cast=cast, copy=copy, decompressed=decompressed
+        )
 
-        buffer = chunk.memoryview_data
+    def read_local_sample_from_chunk(
+        self,
+        local_sample_index: int,
+        chunk: Chunk,
+        cast: bool = True,
+        copy=False,
+        decompressed: bool = False,
+    ) -> np.ndarray:
+        """Read the sample at `local_sample_index` (relative to the chunk) from a chunk. Handles decompressing if applicable.
+        If `decompressed` is True, `chunk` holds samples that are already decompressed (see `decompress_chunk`), whatever
+        the compression of the tensor."""
+        meta = self.tensor_meta
+        return read_local_sample(
+            chunk,
+            local_sample_index,
+            meta.dtype,
+            None if decompressed else meta.sample_compression,
+            None if decompressed else meta.chunk_compression,
+            cast=cast,
+            copy=copy,
+            decoded_cache=getattr(self.cache, "decoded_cache", None),
+        )
 
-        local_sample_index = enc.translate_index_relative_to_chunks(global_sample_index)
-        shape = chunk.shapes_encoder[local_sample_index]
+    def iter_chunks(
+        self, index: Index, aslist: bool = False
+    ) -> Iterator[Union[np.ndarray, List[np.ndarray]]]:
+        """Reads the samples represented by `index` one chunk at a time. Consecutive requested samples that live in the
+        same chunk are read together as a single block, so the chunk ID encoder is queried once per block instead of once
+        per sample.
 
-        if len(buffer) == 0:
-            return np.zeros(shape, dtype=dtype)
+        Args:
+            index (Index): Represents the samples to read from chunks. See `Index` for more information.
+            aslist (bool): If True, each block is a list of numpy arrays. If False, each block is a single numpy array
+                with a leading sample axis. Defaults to False.
 
-        chunk_compression = self.tensor_meta.chunk_compression
-        if chunk_compression:
-            if get_compression_type(chunk_compression) == BYTE_COMPRESSION:
-                decompressed = chunk.decompressed_data(compression=chunk_compression)
-                sb, eb = chunk.byte_positions_encoder[local_sample_index]
-                return np.frombuffer(decompressed[sb:eb], dtype=dtype).reshape(shape)
-            else:
-                return chunk.decompressed_samples()[local_sample_index]
-        sb, eb = chunk.byte_positions_encoder[local_sample_index]
-        buffer = buffer[sb:eb]
+        Raises:
+            DynamicTensorNumpyError: If `aslist=False` and the shapes of the samples within a block are not all the same.
 
-        sample_compression = self.tensor_meta.sample_compression
-        if sample_compression:
-            sample = decompress_array(
-                buffer, shape, dtype=dtype, compression=sample_compression
+        Yields:
+            Union[np.ndarray, List[np.ndarray]]: Blocks of samples, in the order they were requested.
+        """
+
+        length = self.num_samples
+        if length == 0:
+            return
+
+        entries = index.values[1:]
+        for chunk, local_sample_indices in self._iter_chunk_runs(
+            index.values[0].numpy(length)
+        ):
+            block = self.read_samples_from_chunk(
+                local_sample_indices, chunk, aslist=aslist
             )
-            if cast and sample.dtype != dtype:
-                sample = sample.astype(dtype)
+
+            if entries:
+                item: Tuple[Any, ...] = tuple(entry.value for entry in entries)
+                if aslist:
+                    block = [sample[item] for sample in block]
+                else:
+                    block = block[(slice(None), *item)]  # type: ignore
+
+            yield block
+
+    def read_samples_from_chunk(
+        self, local_sample_indices: np.ndarray, chunk: Chunk, aslist: bool = False
+    ) -> Union[np.ndarray, List[np.ndarray]]:
+        """Reads multiple samples (relative to the chunk) from a single chunk.
+
+        When the chunk holds uncompressed (or byte compressed) samples that all share the same shape, the block is
+        created with a single `np.frombuffer` call over the chunk's memory instead of decoding each sample separately.
+        """
+
+        if not aslist:
+            block = self._read_uniform_block(local_sample_indices, chunk)
+            if block is not None:
+                return block
+
+        samples = [
+            self.read_local_sample_from_chunk(int(i), chunk)
+            for i in local_sample_indices
+        ]
+
+        if aslist:
+            return samples
+
+        if len(set(sample.shape for sample in samples)) > 1:
+            raise DynamicTensorNumpyError(self.key, Index(), "shape")
+        return np.stack(samples)
+
+    def _read_uniform_block(
+        self, local_sample_indices: np.ndarray, chunk: Chunk
+    ) -> Optional[np.ndarray]:
+        """Returns the samples at `local_sample_indices` as a single array read directly from the chunk's buffer, or
+        None if the chunk's layout does not allow it (sample compression, image chunk compression, or mixed shapes)."""
+
+        tensor_meta = self.tensor_meta
+        if tensor_meta.sample_compression:
+            return None
+
+        chunk_compression = tensor_meta.chunk_compression
+        if (
+            chunk_compression
+            and get_compression_type(chunk_compression) != BYTE_COMPRESSION
+        ):
+            return None
+
+        shapes = chunk.shapes_encoder.array
+        if len(shapes) != 1 or len(chunk.byte_positions_encoder.array) != 1:
+            return None
+
+        dtype = np.dtype(tensor_meta.dtype)
+        shape = tuple(int(dim) for dim in shapes[0, :-1])
+        num_samples = chunk.shapes_encoder.num_samples
+        count = num_samples * int(np.prod(shape, dtype=np.int64))
+
+        if count == 0 or chunk.num_data_bytes == 0:
+            arr = np.zeros((num_samples, *shape), dtype=dtype)
         else:
-            if copy:
-                buffer = bytes(buffer)
-            sample = np.frombuffer(buffer, dtype=dtype).reshape(shape)
+            if chunk_compression:
+                buffer = chunk.decompressed_data(compression=chunk_compression)
+            else:
+                buffer = chunk.memoryview_data
+            arr = np.frombuffer(buffer, dtype=dtype, count=count).reshape(
+                (num_samples, *shape)
+            )
 
-        return sample
+        start = int(local_sample_indices[0])
+        stop = int(local_sample_indices[-1]) + 1
+        if stop - start != len(local_sample_indices) or np.any(
+            np.diff(local_sample_indices) != 1
+        ):
+            return arr[local_sample_indices]
+
+        block = arr[start:stop]
+        if isinstance(chunk._data, bytearray) and not chunk_compression:
+            # the chunk may still be written to, and a bytearray with exported views can not be resized
+            block = block.copy()
+        return block
+
+    def read_sample_shapes(self) -> np.ndarray:
+        """Returns the shapes of all the samples of the tensor, read from the `ShapeEncoder` of every chunk, without
+        reading any sample.
+
+        Chunks held by a cache (including chunks that weren't flushed yet) are read from there. Otherwise only the header
+        of the chunk is read from the underlying storage, see `read_shape_info`.
+
+        Returns:
+            np.ndarray: Array of shape (num_samples, ndim), whose rows are the shapes of the samples.
+        """
+
+        if self.num_samples == 0:
+            return np.zeros((0, 0), dtype=ENCODING_DTYPE)
+
+        shapes = []
+        for chunk_id in self.chunk_id_encoder.array[:, 0].tolist():
+            chunk_key = get_chunk_key(self.key, ChunkIdEncoder.name_from_id(chunk_id))
+            shape_info = self._read_shape_info(chunk_key)
+            if shape_info.size == 0:
+                continue
+            counts = np.diff(
+                shape_info[:, LAST_SEEN_INDEX_COLUMN].astype(np.int64), prepend=-1
+            )
+            shapes.append(np.repeat(shape_info[:, :LAST_SEEN_INDEX_COLUMN], counts, 0))
+        return np.concatenate(shapes)
+
+    def _read_shape_info(self, chunk_key: str) -> np.ndarray:
+        """Returns the encoded shapes of a chunk, from the first cache that holds the chunk, or else from the header of
+        the chunk in the underlying storage. A `PersistentCache` reads the header from its copy of the chunk if it has
+        one, or else from its next storage."""
+        storage: StorageProvider = self.cache
+        while isinstance(storage, LRUCache) and not isinstance(
+            storage, PersistentCache
+        ):
+            item = storage.peek(chunk_key)
+            if isinstance(item, Chunk):
+                return item.shapes_encoder.array
+            if item is not None:
+                return Chunk.frombuffer(item, copy=False).shapes_encoder.array  # type: ignore
+            if storage.next_storage is None:
+                raise KeyError(chunk_key)
+            storage = storage.next_storage
+        return read_shape_info(storage, chunk_key)
 
     def get_chunk_names_for_multiple_indexes(
         self, sample_index: int, last_index: int, target_chunk_count: int
@@ -6,10 +6,9 @@ from hub.util.exceptions import (
     CorruptedSampleError,
 )
 from hub.compression import get_compression_type
-from typing import Union, Tuple, Sequence, List, Optional, BinaryIO
+from typing import Union, Tuple, Sequence, List, Optional, BinaryIO, TYPE_CHECKING
 import numpy as np
 
-from PIL import Image, UnidentifiedImageError  # type: ignore
 from io import BytesIO
 import mmap
 import struct
@@ -17,6 +16,9 @@ import sys
 import re
 import lz4.frame  # type: ignore
 
+if TYPE_CHECKING:
+    from PIL import Image  # type: ignore
+
 
 if sys.byteorder == "little":
     _NATIVE_INT32 = "<i4"
@@ -48,7 +50,9 @@ _STRUCT_HHB = struct.Struct(">HHB")
 _STRUCT_II = struct.Struct(">ii")
 
 
-def to_image(array: np.ndarray) -> Image:
+def to_image(array: np.ndarray) -> "Image.Image":
+    from PIL import Image  # type: ignore
+
     shape = array.shape
     if len(shape) == 3 and shape[0] != 1 and shape[2] == 1:
         # convert (X,Y,1) grayscale to (X,Y) for pillow compatibility
@@ -157,6 +161,8 @@ def decompress_array(
             return np.frombuffer(decompressed_bytes, dtype=dtype).reshape(shape)
         except Exception:
             raise SampleDecompressionError()
+    from PIL import Image  # type: ignore
+
     try:
         img = Image.open(BytesIO(buffer))
         arr = np.array(img)
@@ -259,6 +265,8 @@ def verify_compressed_file(
 
 
 def get_compression(header):
+    from PIL import Image  # type: ignore
+
     if not Image.OPEN:
         Image.init()
     for fmt in Image.OPEN:
@@ -269,6 +277,8 @@ def get_compression(header):
 
 
 def _verify_png(buf):
+    from PIL import Image  # type: ignore
+
     if not hasattr(buf, "read"):
         buf = BytesIO(buf)
     img = Image.open(buf)
@@ -342,6 +352,8 @@ def _verify_jpeg_file(f):
 
 
 def _fast_decompress(buf):
+    from PIL import Image  # type: ignore
+
     if not hasattr(buf, "read"):
         buf = BytesIO(buf)
     img = Image.open(buf)
@@ -399,6 +411,8 @@ def read_meta_from_compressed_file(
             except Exception:
                 raise CorruptedSampleError("png")
         else:
+            from PIL import Image  # type: ignore
+
             img = Image.open(f) if isfile else Image.open(BytesIO(f))  # type: ignore
             shape, typestr = Image._conv_type_shape(img)
             compression = img.format.lower()
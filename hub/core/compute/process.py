@@ -1,9 +1,10 @@
 from hub.core.compute.provider import ComputeProvider
-from pathos.pools import ProcessPool  # type: ignore
 
 
 class ProcessProvider(ComputeProvider):
     def __init__(self, workers):
+        from pathos.pools import ProcessPool  # type: ignore
+
         self.workers = workers
         self.pool = ProcessPool(nodes=workers)
 
@@ -1,9 +1,10 @@
 from hub.core.compute.provider import ComputeProvider
-from pathos.pools import ThreadPool  # type: ignore
 
 
 class ThreadProvider(ComputeProvider):
     def __init__(self, workers):
+        from pathos.pools import ThreadPool  # type: ignore
+
         self.workers = workers
         self.pool = ThreadPool(nodes=workers)
 
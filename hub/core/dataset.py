@@ -1,23 +1,34 @@
 import hub
 from hub.api.info import load_info
 from hub.core.storage.provider import StorageProvider
-from hub.core.storage.s3 import S3Provider
+from hub.core.storage.lru_cache import LRUCache
 from hub.core.tensor import create_tensor, Tensor
-from typing import Any, Callable, Dict, Optional, Union, Tuple, List, Sequence
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    Optional,
+    Union,
+    Tuple,
+    List,
+    Sequence,
+    cast,
+)
 from hub.htype import HTYPE_CONFIGURATIONS, DEFAULT_HTYPE, UNSPECIFIED
 import numpy as np
 
 from hub.core.meta.dataset_meta import DatasetMeta
-from hub.core.index import Index
+from hub.core.index import Index, IndexRuns
 from hub.core.lock import lock, unlock
-from hub.integrations import dataset_to_tensorflow
 from hub.util.keys import (
     dataset_exists,
     get_dataset_info_key,
     get_dataset_meta_key,
+    get_dataset_view_key,
     tensor_exists,
 )
-from hub.util.bugout_reporter import hub_reporter
+from hub.util.bugout_reporter import hub_reporter, system_report_once
 from hub.util.exceptions import (
     CouldNotCreateNewDatasetException,
     InvalidKeyTypeError,
@@ -27,11 +38,14 @@ from hub.util.exceptions import (
     TensorDoesNotExistError,
     InvalidTensorNameError,
     LockedException,
+    ViewDoesNotExistError,
 )
 from hub.client.client import HubBackendClient
 from hub.client.log import logger
 from hub.util.path import get_path_from_storage
 from hub.util.remove_cache import get_base_storage
+from hub.util.storage import is_s3_provider
+from hub.util.batches import batch_blocks
 from hub.core.fast_forwarding import ffw_dataset_meta
 import warnings
 
@@ -65,13 +79,15 @@ class Dataset:
             AuthorizationException: If a Hub cloud path (path starting with hub://) is specified and the user doesn't have access to the dataset.
             PathNotEmptyException: If the path to the dataset doesn't contain a Hub dataset and is also not empty.
         """
+        system_report_once()
+
         # uniquely identifies dataset
         self.path = get_path_from_storage(storage)
         self.storage = storage
         self._read_only = read_only
         base_storage = get_base_storage(storage)
         if (
-            not read_only and index is None and isinstance(base_storage, S3Provider)
+            not read_only and index is None and is_s3_provider(base_storage)
         ):  # Dataset locking only for S3 datasets
             try:
                 lock(base_storage, callback=lambda: self._lock_lost_handler)
@@ -148,7 +164,13 @@ class Dataset:
     def __getitem__(
         self,
         item: Union[
-            str, int, slice, List[int], Tuple[Union[int, slice, Tuple[int]]], Index
+            str,
+            int,
+            slice,
+            List[int],
+            np.ndarray,
+            Tuple[Union[int, slice, Tuple[int]]],
+            Index,
         ],
     ):
         if isinstance(item, str):
@@ -156,7 +178,7 @@ class Dataset:
                 raise TensorDoesNotExistError(item)
             else:
                 return self.tensors[item][self.index]
-        elif isinstance(item, (int, slice, list, tuple, Index)):
+        elif isinstance(item, (int, slice, list, tuple, np.ndarray, Index)):
             return Dataset(
                 storage=self.storage,
                 index=self.index[item],
@@ -285,6 +307,152 @@ class Dataset:
         for i in range(len(self)):
             yield self[i]
 
+    @hub_reporter.record_call
+    def batches(
+        self,
+        batch_size: int,
+        tensors: Optional[Sequence[str]] = None,
+        drop_last: bool = False,
+    ) -> Iterator[Dict[str, Union[np.ndarray, List[np.ndarray]]]]:
+        """Iterates over the dataset in batches, streaming each tensor chunk by chunk instead of sample by sample.
+
+        Example:
+            >>> for batch in ds.batches(32, tensors=["images", "labels"]):
+            ...     train_step(batch["images"], batch["labels"])
+
+        Args:
+            batch_size (int): Number of samples per batch.
+            tensors (Sequence[str], optional): Names of the tensors to include in each batch. Defaults to all tensors.
+            drop_last (bool): If True, the last batch is dropped if it has fewer than `batch_size` samples. Defaults to False.
+
+        Raises:
+            ValueError: If `batch_size` is not a positive integer.
+            TensorDoesNotExistError: If any of `tensors` does not exist in the dataset.
+
+        Yields:
+            Dicts mapping tensor names to batches. Batches are stacked numpy arrays, except for dynamically shaped
+            tensors, whose batches are lists of numpy arrays.
+        """
+
+        if batch_size < 1:
+            raise ValueError(f"`batch_size` should be > 0. Got: {batch_size}")
+
+        tensor_keys = list(self.tensors) if tensors is None else list(tensors)
+        for key in tensor_keys:
+            if key not in self.tensors:
+                raise TensorDoesNotExistError(key)
+
+        num_samples = len(self)
+        streams = []
+        for key in tensor_keys:
+            tensor = self.tensors[key][self.index]
+            blocks = tensor.iter_chunks(aslist=tensor.is_dynamic)
+            streams.append(batch_blocks(blocks, batch_size, num_samples, drop_last))
+
+        for batch in zip(*streams):
+            yield dict(zip(tensor_keys, batch))
+
+    @hub_reporter.record_call
+    def save_view(self, name: str):
+        """Saves the samples selected by this dataset view to the dataset's storage, so it can be restored later with
+        `load_view`. Views are stored as run-length encoded indices, so contiguous selections take up almost no space.
+
+        Example:
+            >>> ds[1000:2000].save_view("validation")
+            >>> val = ds.load_view("validation")
+
+        Args:
+            name (str): Name of the view. An existing view with the same name is overwritten.
+
+        Raises:
+            NotImplementedError: If the view restricts any axis other than the primary axis.
+        """
+
+        self.storage.check_readonly()
+        view_key = get_dataset_view_key(name)
+        storage = cast(LRUCache, self.storage)
+        storage[view_key] = self._index_runs()
+        self.storage.maybe_flush()
+
+    def load_view(self, name: str) -> "Dataset":
+        """Loads a view saved with `save_view`. The view is applied to the whole dataset, not to this view.
+
+        The view keeps the run-length encoded indices, which are only expanded when samples are read, so loading it
+        takes time proportional to the number of runs rather than to the number of samples.
+
+        Args:
+            name (str): Name of the view.
+
+        Returns:
+            Dataset: The dataset view.
+
+        Raises:
+            ViewDoesNotExistError: If no view with `name` was saved.
+        """
+
+        view_key = get_dataset_view_key(name)
+        storage = cast(LRUCache, self.storage)
+        try:
+            runs = storage.get_cachable(view_key, IndexRuns)
+        except KeyError:
+            raise ViewDoesNotExistError(name)
+        return self._view_from_runs(runs)
+
+    def delete_view(self, name: str):
+        """Deletes a view saved with `save_view`. Does not delete any samples.
+
+        Args:
+            name (str): Name of the view.
+
+        Raises:
+            ViewDoesNotExistError: If no view with `name` was saved.
+        """
+
+        try:
+            del self.storage[get_dataset_view_key(name)]
+        except KeyError:
+            raise ViewDoesNotExistError(name)
+        self.storage.maybe_flush()
+
+    def union(self, other: "Dataset") -> "Dataset":
+        """Returns a view with the samples that are in this view, in `other`, or in both. Samples are sorted."""
+        return self._view_from_runs(self._index_runs() | self._other_runs(other))
+
+    def intersection(self, other: "Dataset") -> "Dataset":
+        """Returns a view with the samples that are in both this view and `other`. Samples are sorted."""
+        return self._view_from_runs(self._index_runs() & self._other_runs(other))
+
+    def difference(self, other: "Dataset") -> "Dataset":
+        """Returns a view with the samples that are in this view but not in `other`. Samples are sorted."""
+        return self._view_from_runs(self._index_runs() - self._other_runs(other))
+
+    def _index_runs(self) -> IndexRuns:
+        """Run-length encodes the primary axis of this view's index."""
+        if len(self.index.values) > 1:
+            raise NotImplementedError(
+                "Only views that index the primary axis can be saved or combined."
+            )
+        value = self.index.values[0].value
+        if isinstance(value, IndexRuns):
+            return value
+        return IndexRuns.from_indices(self.index.values[0].numpy(self.num_samples))
+
+    def _other_runs(self, other: "Dataset") -> IndexRuns:
+        if other.path != self.path:
+            raise ValueError(
+                f"Views can only be combined with views of the same dataset. Got '{self.path}' and '{other.path}'."
+            )
+        return other._index_runs()
+
+    def _view_from_runs(self, runs: IndexRuns) -> "Dataset":
+        return Dataset(
+            storage=self.storage,
+            index=Index(runs.index_value()),
+            read_only=self.read_only,
+            token=self._token,
+            verbose=False,
+        )
+
     def _load_meta(self):
         meta_key = get_dataset_meta_key()
 
@@ -340,6 +508,15 @@ class Dataset:
         shuffle: bool = False,
         buffer_size: int = 10 * 1000,
         use_local_cache: bool = False,
+        decode_in_workers: bool = False,
+        transform_in_workers: bool = False,
+        world_size: int = 1,
+        rank: int = 0,
+        shard_seed: int = 0,
+        use_dataloader_workers: bool = False,
+        persistent_workers: bool = False,
+        block_shuffle_chunks: Optional[int] = None,
+        bucket_by=None,
     ):
         """Converts the dataset into a pytorch Dataloader.
 
@@ -362,9 +539,18 @@ class Dataset:
             shuffle (bool): If True, the data loader will shuffle the data indices. Default value is False.
             buffer_size (int): The size of the buffer used to prefetch/shuffle in MB. The buffer uses shared memory under the hood. Default value is 10 GB. Increasing the buffer_size will increase the extent of shuffling.
             use_local_cache (bool): If True, the data loader will use a local cache to store data. This is useful when the dataset can fit on the machine and we don't want to fetch the data multiple times for each iteration. Default value is False.
+            decode_in_workers (bool): If True, the workers decompress the samples of compressed tensors (jpeg, png, lz4, ...) while fetching their chunks, so that the main process doesn't decompress every sample. Decompressed chunks take more space in the buffer. Default value is False.
+            transform_in_workers (bool): If True, samples are read, decompressed and transformed by the workers instead of the main process, so that CPU heavy transforms scale with `num_workers`. `transform` must be picklable, and should not rely on state of the main process. Default value is False.
+            world_size (int): The number of processes (ranks) iterating over the dataset together, for distributed training. Each rank iterates over a different shard of the dataset, made of whole chunks except at the boundaries between shards, and every shard has `len(dataset) // world_size` samples. Shards change every epoch. Default value is 1.
+            rank (int): The rank of this process, between 0 and `world_size - 1`. Default value is 0.
+            shard_seed (int): Seed for the assignment of chunks to shards, which must be the same on all ranks. Default value is 0.
+            use_dataloader_workers (bool): If True, `num_workers` pytorch DataLoader workers iterate over the dataset instead of the workers of the data loader's own process pool. The chunks of the dataset are split between the DataLoader workers, each of which fetches its own chunks, so no chunk is downloaded twice. Default value is False.
+            persistent_workers (bool): Only used with `use_dataloader_workers`. If True, the DataLoader workers, along with the dataset and the prefetch cache that each of them opens, are kept alive across epochs instead of being started again at every epoch. The workers of the data loader's own process pool are always kept alive across epochs and data loaders, until `hub.core.storage.prefetch_lru_cache.close_worker_pools` is called. Default value is False.
+            block_shuffle_chunks (int, optional): Only used with `shuffle`. If set, the data is shuffled by blocks of chunks instead: chunks are visited in random order, `block_shuffle_chunks` of them are open at a time, and every sample is drawn at random from the samples of the open chunks. Every chunk is then downloaded once per epoch, provided that the buffer can hold `block_shuffle_chunks` chunks of every tensor, and the extent of shuffling grows with `block_shuffle_chunks`. After an epoch, `dataloader.dataset.cache.read_amplification` tells how many times chunks were downloaded on average. Default value is None.
+            bucket_by (str or ShapeBucketBatchSampler, optional): Name of a tensor whose samples have variable shapes (images, sequences, ...). If set, samples are ordered so that every batch holds samples of similar shape, which need little padding. Shapes are read from the chunk headers of the tensor, without reading any sample. Batches are formed among windows of neighbouring samples, so chunks are still read in order, and are shuffled if `shuffle` is True. To control the size of the windows, or to bucket sequences by their length along a dimension, pass a `hub.util.bucketing.ShapeBucketBatchSampler` instead, with the same `batch_size`. Default value is None.
 
         Returns:
-            A torch.utils.data.DataLoader object.
+            A torch.utils.data.DataLoader object. Unless `use_dataloader_workers` is True, it also has `state_dict()` and `load_state_dict(state_dict)` methods, to save the position of the data loader in the current epoch and resume from it, for example after a training job is restarted. Samples that were already yielded are skipped on resumption, without fetching their chunks.
         """
         from hub.integrations import dataset_to_pytorch
 
@@ -380,6 +566,15 @@ class Dataset:
             shuffle=shuffle,
             buffer_size=buffer_size,
             use_local_cache=use_local_cache,
+            decode_in_workers=decode_in_workers,
+            transform_in_workers=transform_in_workers,
+            world_size=world_size,
+            rank=rank,
+            shard_seed=shard_seed,
+            use_dataloader_workers=use_dataloader_workers,
+            persistent_workers=persistent_workers,
+            block_shuffle_chunks=block_shuffle_chunks,
+            bucket_by=bucket_by,
         )
 
     def _get_total_meta(self):
@@ -412,6 +607,8 @@ class Dataset:
         Returns:
             tf.data.Dataset object that can be used for tensorflow training.
         """
+        from hub.integrations import dataset_to_tensorflow
+
         return dataset_to_tensorflow(self)
 
     def flush(self):
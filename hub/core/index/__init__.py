@@ -1 +1,2 @@
 from .index import Index, IndexEntry, merge_slices, slice_at_int
+from .runs import IndexRuns
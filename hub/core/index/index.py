@@ -1,7 +1,8 @@
 from typing import Union, List, Tuple, Iterable, Optional, TypeVar
 import numpy as np
+from hub.core.index.runs import IndexRuns
 
-IndexValue = Union[int, slice, Tuple[int]]
+IndexValue = Union[int, slice, Tuple[int], np.ndarray, IndexRuns]
 
 
 def has_negatives(s: slice) -> bool:
@@ -115,8 +116,53 @@ def tuple_length(t: Tuple[int], l: int) -> int:
     return len(t)
 
 
+def slice_at_array(s: slice, arr: np.ndarray) -> np.ndarray:
+    """Vectorized version of `slice_at_int`. Returns the elements of a slice `s` at each offset in `arr`.
+
+    Examples:
+        >>> slice_at_array(slice(10, 20, 2), np.array([3, 0, 1]))
+        array([16, 10, 12])
+
+    Args:
+        s (slice): The slice to index into.
+        arr (np.ndarray): Integer offsets into the slice.
+
+    Returns:
+        np.ndarray: The indices corresponding to the offsets into the slice.
+
+    Raises:
+        NotImplementedError: Nontrivial slices should not be indexed with negative integers.
+    """
+    if s == slice(None):
+        return arr
+
+    if len(arr) and arr.min() < 0:
+        raise NotImplementedError(
+            "Subscripting slices with negative integers is not supported."
+        )
+    if s.step and s.step < 0:
+        return arr * s.step - 1
+    return (s.start or 0) + arr * (s.step or 1)
+
+
+def to_index_array(item) -> np.ndarray:
+    """Converts a sequence of integer indices into a flat int64 array."""
+    arr = np.asarray(item)
+    if arr.size == 0:
+        return arr.astype(np.int64).reshape(0)
+    if arr.ndim != 1 or arr.dtype.kind not in "iu":
+        raise TypeError(
+            f"Value {item} is not a 1-dimensional sequence of integer indices."
+        )
+    return arr.astype(np.int64, copy=False)
+
+
 class IndexEntry:
     def __init__(self, value: IndexValue = slice(None)):
+        if isinstance(value, np.ndarray):
+            value = to_index_array(value)
+        elif isinstance(value, np.integer):
+            value = int(value)
         self.value = value
 
     def __getitem__(self, item: IndexValue):
@@ -136,9 +182,15 @@ class IndexEntry:
             >>> IndexEntry()[1, 2, 3]
             IndexEntry((0, 1, 2, 3))
 
+            >>> IndexEntry()[10:20][np.array([3, 1])]
+            IndexEntry(array([13, 11]))
+
+        Entries holding `IndexRuns` (see `Dataset.load_view`) are composed without expanding the runs whenever the
+        result is still a set of runs, as it is for slices with a step of 1.
+
         Args:
             item: The desired sub-index to be composed with this IndexEntry.
-                Can be an int, a slice, or a tuple of ints.
+                Can be an int, a slice, a tuple of ints, a 1-dimensional integer array, or `IndexRuns`.
 
         Returns:
             The new IndexEntry object.
@@ -147,10 +199,39 @@ class IndexEntry:
             TypeError: An integer IndexEntry should not be indexed further.
         """
 
+        if isinstance(item, np.integer):
+            item = int(item)
+
         if not self.subscriptable():
             raise TypeError(
                 "Subscripting IndexEntry after 'int' is not allowed. Use Index instead."
             )
+        elif isinstance(item, IndexRuns):
+            if self.is_trivial():
+                return IndexEntry(item)
+            if (
+                isinstance(self.value, slice)
+                and (self.value.step or 1) == 1
+                and (self.value.start or 0) >= 0
+            ):
+                return IndexEntry(
+                    IndexRuns(item.starts + (self.value.start or 0), item.lengths)
+                )
+            return self[item.numpy()]
+        elif isinstance(self.value, IndexRuns):
+            runs = self.value
+            if isinstance(item, int):
+                position = item if item >= 0 else len(runs) + item
+                return IndexEntry(int(runs.at(np.array([position]))[0]))
+            elif isinstance(item, slice):
+                start, stop, step = item.indices(len(runs))
+                if step == 1:
+                    return IndexEntry(runs.sub_runs(start, stop))
+                return IndexEntry(runs.numpy()[item])
+            elif isinstance(item, (tuple, np.ndarray)):
+                positions = to_index_array(item)
+                positions = np.where(positions < 0, positions + len(runs), positions)
+                return IndexEntry(runs.at(positions))
         elif isinstance(self.value, slice):
             if isinstance(item, int):
                 new_value = slice_at_int(self.value, item)
@@ -160,12 +241,23 @@ class IndexEntry:
             elif isinstance(item, tuple):
                 new_value = tuple(slice_at_int(self.value, idx) for idx in item)
                 return IndexEntry(new_value)
+            elif isinstance(item, np.ndarray):
+                return IndexEntry(slice_at_array(self.value, to_index_array(item)))
         elif isinstance(self.value, tuple):
             if isinstance(item, int) or isinstance(item, slice):
                 return IndexEntry(self.value[item])
             elif isinstance(item, tuple):
                 new_value = tuple(self.value[idx] for idx in item)
                 return IndexEntry(new_value)
+            elif isinstance(item, np.ndarray):
+                return IndexEntry(to_index_array(self.value)[to_index_array(item)])
+        elif isinstance(self.value, np.ndarray):
+            if isinstance(item, int):
+                return IndexEntry(int(self.value[item]))
+            elif isinstance(item, slice):
+                return IndexEntry(self.value[item])
+            elif isinstance(item, (tuple, np.ndarray)):
+                return IndexEntry(self.value[to_index_array(item)])
 
         raise TypeError(f"Value {item} is of unrecognized type {type(item)}.")
 
@@ -183,6 +275,48 @@ class IndexEntry:
             yield from range(*self.value.indices(length))
         elif isinstance(self.value, tuple):
             yield from map(parse_int, self.value)
+        elif isinstance(self.value, (np.ndarray, IndexRuns)):
+            yield from self.numpy(length).tolist()
+
+    def numpy(self, length: int) -> np.ndarray:
+        """Returns the integer indices for a target of a given length as an int64 array.
+        Same as `indices`, without going through python ints."""
+        if isinstance(self.value, int):
+            value = self.value if self.value >= 0 else length + self.value
+            return np.array([value], dtype=np.int64)
+        elif isinstance(self.value, slice):
+            return np.arange(*self.value.indices(length), dtype=np.int64)
+        elif isinstance(self.value, IndexRuns):
+            return self.value.numpy()
+
+        arr = to_index_array(self.value)
+        if len(arr) and arr.min() < 0:
+            arr = np.where(arr < 0, arr + length, arr)
+        return arr
+
+    def access_plan(self, length: int) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Returns the order in which the samples of a target of a given length should be read.
+
+        Reading samples in ascending order visits every chunk once. Any index that is not already ascending (reversed
+        slices, shuffled arrays, ...) is sorted here, along with the permutation to restore the requested order.
+
+        Examples:
+            >>> IndexEntry(np.array([7, 2, 5])).access_plan(10)
+            (array([2, 5, 7]), array([1, 2, 0]))
+
+        Args:
+            length (int): The length of the target that this IndexEntry is indexing.
+
+        Returns:
+            Tuple[np.ndarray, Optional[np.ndarray]]: The sorted indices to read, and the positions of the sorted samples
+                in the requested order (`requested[order[i]] = sorted[i]`). `order` is None if the indices are already
+                sorted.
+        """
+        arr = self.numpy(length)
+        if len(arr) < 2 or np.all(arr[:-1] <= arr[1:]):
+            return arr, None
+        order = np.argsort(arr, kind="stable")
+        return arr[order], order
 
     def is_trivial(self):
         """Checks if an IndexEntry represents the entire slice"""
@@ -222,16 +356,26 @@ class IndexEntry:
             return slice_length(self.value, parent_length)
         elif isinstance(self.value, tuple):
             return tuple_length(self.value, parent_length)
+        elif isinstance(self.value, (np.ndarray, IndexRuns)):
+            return len(self.value)
         else:
             return 0
 
     def validate(self, parent_length: int):
         """Checks that the index is not accessing values outside the range of the parent."""
         # Slices are okay, as an out-of-range slice will just yield no samples
-        # Check each index of a tuple
-        if isinstance(self.value, tuple):
-            for idx in self.value:
-                IndexEntry(idx).validate(parent_length)
+        # Check the extremes of a tuple, array or runs
+        if isinstance(self.value, IndexRuns):
+            if self.value.num_runs:
+                first = self.value.starts.min()
+                last = (self.value.starts + self.value.lengths).max() - 1
+                IndexEntry(int(last)).validate(parent_length)
+                IndexEntry(int(first)).validate(parent_length)
+        elif isinstance(self.value, (tuple, np.ndarray)):
+            arr = to_index_array(self.value)
+            if len(arr):
+                IndexEntry(int(arr.max())).validate(parent_length)
+                IndexEntry(int(arr.min())).validate(parent_length)
 
         # Check ints that are too large (positive or negative)
         if isinstance(self.value, int):
@@ -303,7 +447,10 @@ class Index:
             return Index(new_values)
 
     def __getitem__(
-        self, item: Union[int, slice, List[int], Tuple[IndexValue], "Index"]
+        self,
+        item: Union[
+            int, slice, List[int], np.ndarray, IndexRuns, Tuple[IndexValue], "Index"
+        ],
     ):
         """Returns a new Index representing a subscripting with the given item.
         Modeled after NumPy's advanced integer indexing.
@@ -333,9 +480,13 @@ class Index:
             TypeError: Given item should be another Index,
                 or compatible with NumPy's advanced integer indexing.
         """
-        if isinstance(item, int) or isinstance(item, slice):
+        if isinstance(item, (int, np.integer)) or isinstance(item, slice):
             ax = self.find_axis()
             return self.compose_at(item, ax)
+        elif isinstance(item, np.ndarray):
+            return self[(to_index_array(item),)]  # type: ignore
+        elif isinstance(item, IndexRuns):
+            return self[(item,)]
         elif isinstance(item, tuple):
             new_index = self
             for idx, sub_item in enumerate(item):
@@ -343,12 +494,12 @@ class Index:
                 new_index = new_index.compose_at(sub_item, ax)
             return new_index
         elif isinstance(item, list):
-            return self[(tuple(item),)]  # type: ignore
+            return self[(to_index_array(item),)]  # type: ignore
         elif isinstance(item, Index):
             base = self
             for index in item.values:
                 value = index.value
-                if isinstance(value, tuple):
+                if isinstance(value, (tuple, np.ndarray)):
                     value = (value,)  # type: ignore
                 base = base[value]
             return base
@@ -359,7 +510,7 @@ class Index:
         """Applies an Index to a list of ndarray samples with the same number of entries
         as the first entry in the Index.
         """
-        index_values = tuple(item.value for item in self.values[1:])
+        index_values: Tuple = tuple(item.value for item in self.values[1:])
         samples = list(arr[index_values] for arr in samples)
         return samples
 
@@ -385,6 +536,13 @@ class Index:
         """Checks that the index is not accessing values outside the range of the parent."""
         self.values[0].validate(parent_length)
 
+    def access_plan(
+        self, parent_length: int
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Returns the order in which samples along the primary axis should be read.
+        See: IndexEntry.access_plan"""
+        return self.values[0].access_plan(parent_length)
+
     def __str__(self):
         values = [entry.value for entry in self.values]
         return f"Index({values})"
@@ -0,0 +1,205 @@
+from typing import Callable, Optional, Sequence, Union
+import struct
+import numpy as np
+import hub
+from hub.core.storage.cachable import Cachable
+from hub.core.compression import compress_bytes, decompress_bytes
+
+
+RUNS_COMPRESSION = "lz4"
+
+
+class IndexRuns(Cachable):
+    def __init__(
+        self,
+        starts: Optional[Union[Sequence[int], np.ndarray]] = None,
+        lengths: Optional[Union[Sequence[int], np.ndarray]] = None,
+    ):
+        """Run-length encoded sequence of sample indices. Used for persisting dataset views.
+
+        A run is a sequence of consecutive indices `[start, start + length)`. Runs are kept in the order the indices
+        were given, so an `IndexRuns` can represent both sorted subsets and arbitrary orderings of a dataset.
+
+        Set operations (`union`, `intersection`, `difference`) are computed directly on the runs, without expanding
+        them into indices. Their results are sorted and free of duplicates.
+
+        Example:
+            >>> runs = IndexRuns.from_indices([0, 1, 2, 3, 10, 11, 5])
+            >>> runs.starts, runs.lengths
+            (array([ 0, 10,  5]), array([4, 2, 1]))
+            >>> runs.numpy()
+            array([ 0,  1,  2,  3, 10, 11,  5])
+
+        Args:
+            starts (Sequence[int], optional): First index of each run.
+            lengths (Sequence[int], optional): Number of indices in each run.
+        """
+
+        self.starts = np.asarray(
+            starts if starts is not None else [], dtype=np.int64
+        ).reshape(-1)
+        self.lengths = np.asarray(
+            lengths if lengths is not None else [], dtype=np.int64
+        ).reshape(-1)
+
+    @classmethod
+    def from_indices(cls, indices: Union[Sequence[int], np.ndarray]) -> "IndexRuns":
+        """Run-length encodes a sequence of non-negative indices."""
+        arr = np.asarray(indices, dtype=np.int64).reshape(-1)
+        if len(arr) == 0:
+            return cls()
+
+        breaks = np.flatnonzero(np.diff(arr) != 1) + 1
+        run_starts = np.r_[0, breaks]
+        lengths = np.diff(np.r_[run_starts, len(arr)])
+        return cls(arr[run_starts], lengths)
+
+    @property
+    def nbytes(self) -> int:
+        return self.starts.nbytes + self.lengths.nbytes
+
+    @property
+    def num_runs(self) -> int:
+        return len(self.starts)
+
+    def __len__(self) -> int:
+        return int(self.lengths.sum())
+
+    def numpy(self) -> np.ndarray:
+        """Expands the runs into an int64 array of indices."""
+        total = len(self)
+        if total == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        offsets = np.cumsum(self.lengths) - self.lengths
+        return np.repeat(self.starts - offsets, self.lengths) + np.arange(
+            total, dtype=np.int64
+        )
+
+    def is_sorted(self) -> bool:
+        """Checks if the runs are in ascending order and do not overlap."""
+        return bool(np.all(self.starts[1:] >= self.starts[:-1] + self.lengths[:-1]))
+
+    def at(self, positions: np.ndarray) -> np.ndarray:
+        """Returns the indices at the given positions of the sequence, without expanding the runs.
+
+        Args:
+            positions (np.ndarray): Non-negative positions, less than `len(self)`.
+
+        Returns:
+            np.ndarray: The indices, as int64.
+        """
+        ends = np.cumsum(self.lengths)
+        runs = np.searchsorted(ends, positions, side="right")
+        return self.starts[runs] + positions - (ends[runs] - self.lengths[runs])
+
+    def sub_runs(self, start: int, stop: int) -> "IndexRuns":
+        """Returns the runs of the indices at positions `[start, stop)` of the sequence, without expanding the runs."""
+        if start >= stop:
+            return IndexRuns()
+        ends = np.cumsum(self.lengths)
+        first = int(np.searchsorted(ends, start, side="right"))
+        last = int(np.searchsorted(ends - self.lengths, stop, side="left"))
+        starts = self.starts[first:last].copy()
+        lengths = self.lengths[first:last].copy()
+        head = start - (ends[first] - self.lengths[first])
+        starts[0] += head
+        lengths[0] -= head
+        lengths[-1] -= ends[last - 1] - stop
+        return IndexRuns(starts, lengths)
+
+    def index_value(self) -> Union[slice, "IndexRuns"]:
+        """Returns the value of an `IndexEntry` selecting the indices represented by these runs. A single run is a
+        slice, otherwise the entry keeps the runs, which are only expanded when the indices are read."""
+        if self.num_runs == 1:
+            start = int(self.starts[0])
+            return slice(start, start + int(self.lengths[0]))
+        return self
+
+    def union(self, other: "IndexRuns") -> "IndexRuns":
+        return _combine(self, other, lambda a, b: a | b)
+
+    def intersection(self, other: "IndexRuns") -> "IndexRuns":
+        return _combine(self, other, lambda a, b: a & b)
+
+    def difference(self, other: "IndexRuns") -> "IndexRuns":
+        return _combine(self, other, lambda a, b: a & ~b)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, IndexRuns):
+            return False
+        return np.array_equal(self.starts, other.starts) and np.array_equal(
+            self.lengths, other.lengths
+        )
+
+    def __repr__(self) -> str:
+        return f"IndexRuns(num_runs={self.num_runs}, length={len(self)})"
+
+    def tobytes(self) -> bytes:
+        """Serializes the runs as a version header, the number of runs and the lz4 compressed run deltas."""
+        version = hub.__version__.encode("ascii")
+        payload = np.concatenate(
+            (np.diff(self.starts, prepend=0), self.lengths)
+        ).astype("<i8")
+        return b"".join(
+            (
+                struct.pack("<B", len(version)),
+                version,
+                struct.pack("<Q", self.num_runs),
+                compress_bytes(payload.tobytes(), RUNS_COMPRESSION),
+            )
+        )
+
+    @classmethod
+    def frombuffer(cls, buffer: bytes) -> "IndexRuns":
+        buffer = memoryview(buffer)
+        len_version = buffer[0]
+        offset = 1 + len_version
+        (num_runs,) = struct.unpack("<Q", buffer[offset : offset + 8])
+        payload = decompress_bytes(buffer[offset + 8 :], RUNS_COMPRESSION)
+        arr = np.frombuffer(payload, dtype="<i8").astype(np.int64)
+        return cls(np.cumsum(arr[:num_runs]), arr[num_runs:])
+
+
+def _combine(
+    a: IndexRuns, b: IndexRuns, keep: Callable[[np.ndarray, np.ndarray], np.ndarray]
+) -> IndexRuns:
+    """Combines two sets of runs with a sweep over their boundaries.
+
+    Every run contributes +1 at its start and -1 at its stop. After sorting the boundaries, a cumulative sum gives the
+    number of runs of each operand covering the interval that follows each boundary. `keep` decides, per interval,
+    whether it is part of the result given whether it is covered by `a` and by `b`.
+    """
+
+    positions = np.concatenate(
+        (a.starts, a.starts + a.lengths, b.starts, b.starts + b.lengths)
+    )
+    if len(positions) == 0:
+        return IndexRuns()
+
+    na, nb = a.num_runs, b.num_runs
+    ones_a, ones_b = np.ones(na, dtype=np.int64), np.ones(nb, dtype=np.int64)
+    zeros_a, zeros_b = np.zeros(na, dtype=np.int64), np.zeros(nb, dtype=np.int64)
+    deltas_a = np.concatenate((ones_a, -ones_a, zeros_b, zeros_b))
+    deltas_b = np.concatenate((zeros_a, zeros_a, ones_b, -ones_b))
+
+    order = np.argsort(positions, kind="stable")
+    positions = positions[order]
+    cover_a = np.cumsum(deltas_a[order])
+    cover_b = np.cumsum(deltas_b[order])
+
+    # only the coverage after the last event at each position matters
+    last_at_position = np.flatnonzero(np.diff(positions) != 0)
+    last_at_position = np.append(last_at_position, len(positions) - 1)
+    positions = positions[last_at_position]
+    inside = keep(cover_a[last_at_position] > 0, cover_b[last_at_position] > 0)
+
+    # interval i is [positions[i], positions[i + 1]), merge neighbouring intervals that are kept
+    edges = np.diff(np.r_[0, inside[:-1].astype(np.int8), 0])
+    run_starts = positions[np.flatnonzero(edges == 1)]
+    run_stops = positions[np.flatnonzero(edges == -1)]
+    return IndexRuns(run_starts, run_stops - run_starts)
@@ -1,4 +1,6 @@
-from hub.core.index import merge_slices
+import numpy as np
+import pytest
+from hub.core.index import Index, IndexEntry, merge_slices
 from pytest_cases import parametrize_with_cases  # type: ignore
 
 
@@ -32,3 +34,43 @@ class MergeSlicesCases:
 def test_merge_slices(first: slice, second: slice):
     r = range(100)
     assert r[first][second] == r[merge_slices(first, second)]
+
+
+def test_array_index():
+    idxs = np.array([7, 2, 5, 2, -1])
+    entry = IndexEntry()[10:30][idxs[:-1]]
+    assert isinstance(entry.value, np.ndarray)
+    np.testing.assert_array_equal(entry.value, [17, 12, 15, 12])
+    assert entry.length(100) == 4
+    assert entry[1].value == 12
+    np.testing.assert_array_equal(entry[1:3].value, [12, 15])
+    np.testing.assert_array_equal(entry[np.array([3, 0])].value, [12, 17])
+
+    index = Index()[idxs.tolist()]
+    assert isinstance(index.values[0].value, np.ndarray)
+    assert list(index.values[0].indices(10)) == [7, 2, 5, 2, 9]
+    np.testing.assert_array_equal(index.values[0].numpy(10), [7, 2, 5, 2, 9])
+
+    index.validate(10)
+    with pytest.raises(ValueError):
+        index.validate(7)
+    with pytest.raises(ValueError):
+        Index()[[0, -11]].validate(10)
+
+
+def test_access_plan():
+    r = np.arange(100)
+
+    sorted_indices, order = Index()[10:20].access_plan(100)
+    np.testing.assert_array_equal(sorted_indices, r[10:20])
+    assert order is None
+
+    for item in [slice(None, None, -3), [7, 2, 5, 2, 99, 0]]:
+        index = Index()[item]
+        requested = r[item]
+        sorted_indices, order = index.access_plan(100)
+        assert np.all(np.diff(sorted_indices) >= 0)
+
+        restored = np.empty_like(sorted_indices)
+        restored[order] = sorted_indices
+        np.testing.assert_array_equal(restored, requested)
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from hub.core.index import IndexEntry, IndexRuns
+
+
+def test_from_indices():
+    indices = [0, 1, 2, 3, 10, 11, 5, 4]
+    runs = IndexRuns.from_indices(indices)
+    np.testing.assert_array_equal(runs.starts, [0, 10, 5, 4])
+    np.testing.assert_array_equal(runs.lengths, [4, 2, 1, 1])
+    np.testing.assert_array_equal(runs.numpy(), indices)
+    assert len(runs) == 8
+    assert not runs.is_sorted()
+
+    runs = IndexRuns.from_indices(np.arange(10, 1000))
+    assert runs.num_runs == 1
+    assert runs.index_value() == slice(10, 1000)
+
+    assert len(IndexRuns.from_indices([])) == 0
+    assert len(IndexRuns().numpy()) == 0
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_set_operations(seed):
+    rng = np.random.default_rng(seed)
+    a_indices = rng.choice(200, size=120)
+    b_indices = np.concatenate((np.arange(50, 150), rng.choice(200, size=30)))
+    a, b = IndexRuns.from_indices(a_indices), IndexRuns.from_indices(b_indices)
+    a_set, b_set = set(a_indices.tolist()), set(b_indices.tolist())
+
+    for result, expected in [
+        (a | b, a_set | b_set),
+        (a & b, a_set & b_set),
+        (a - b, a_set - b_set),
+        (b - a, b_set - a_set),
+    ]:
+        assert result.is_sorted()
+        np.testing.assert_array_equal(result.numpy(), sorted(expected))
+
+    assert len(a & IndexRuns()) == 0
+    np.testing.assert_array_equal((a - IndexRuns()).numpy(), sorted(a_set))
+
+
+def test_serialize():
+    runs = IndexRuns.from_indices(np.concatenate((np.arange(1000), [5000, 3, 2])))
+    buffer = runs.tobytes()
+    assert len(buffer) < 100
+    assert IndexRuns.frombuffer(buffer) == runs
+    assert IndexRuns.frombuffer(IndexRuns().tobytes()) == IndexRuns()
+
+
+def test_index_entry_with_runs():
+    indices = np.concatenate((np.arange(10, 20), np.arange(50, 55), [3, 2]))
+    runs = IndexRuns.from_indices(indices)
+    entry = IndexEntry(runs)
+    assert entry.length(100) == len(indices)
+    np.testing.assert_array_equal(entry.numpy(100), indices)
+
+    # slices with a step of 1 keep the runs
+    for item in [slice(None), slice(3, 14), slice(5, -1), slice(12, 13), slice(9, 2)]:
+        sliced = entry[item]
+        assert isinstance(sliced.value, IndexRuns)
+        np.testing.assert_array_equal(sliced.numpy(100), indices[item])
+    np.testing.assert_array_equal(entry[::3].numpy(100), indices[::3])
+    assert entry[11].value == 51 and entry[-1].value == 2
+    np.testing.assert_array_equal(entry[(0, 16, -3)].numpy(100), indices[[0, 16, -3]])
+
+    assert isinstance(IndexEntry()[runs].value, IndexRuns)
+    shifted = IndexEntry(slice(5, None))[runs]
+    assert isinstance(shifted.value, IndexRuns)
+    np.testing.assert_array_equal(shifted.numpy(100), indices + 5)
+    np.testing.assert_array_equal(
+        IndexEntry(slice(None, None, 2))[runs].numpy(200), indices * 2
+    )
+
+    entry.validate(55)
+    with pytest.raises(ValueError):
+        entry.validate(54)
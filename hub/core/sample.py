@@ -9,7 +9,6 @@ from hub.util.exceptions import CorruptedSampleError
 import numpy as np
 from typing import List, Optional, Tuple, Union
 
-from PIL import Image  # type: ignore
 from io import BytesIO
 
 
@@ -125,6 +124,8 @@ class Sample:
                             compressed_bytes, compression=self._compression
                         )
                 else:
+                    from PIL import Image  # type: ignore
+
                     img = Image.open(BytesIO(compressed_bytes))
                     if img.mode == "1":
                         self._uncompressed_bytes = img.tobytes("raw", "L")
@@ -141,6 +142,8 @@ class Sample:
 
         if self._uncompressed_bytes is None:
             if self.path is not None:
+                from PIL import Image  # type: ignore
+
                 img = Image.open(self.path)
                 if img.mode == "1":
                     # Binary images need to be extended from bits to bytes
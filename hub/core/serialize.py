@@ -3,11 +3,13 @@ from hub.util.exceptions import TensorInvalidSampleShapeError
 from hub.util.casting import intelligent_cast
 from hub.core.sample import Sample, SampleValue  # type: ignore
 from hub.core.compression import compress_array
+from hub.core.storage.provider import StorageProvider
 from typing import List, Optional, Sequence, Union, Tuple, Iterable
 from itertools import repeat
 import hub
 import numpy as np
 import struct
+import mmap
 
 
 def infer_chunk_num_bytes(
@@ -116,6 +118,7 @@ def deserialize_chunk(
     Args:
         byts: (bytes) Serialized chunk.
         copy: (bool) If true, this function copies the byts while deserializing incase byts was a memoryview.
+            Memoryviews over read-only memory maps are never copied, their contents can not change underneath the chunk.
 
     Returns:
         Tuple of:
@@ -124,7 +127,9 @@ def deserialize_chunk(
         encoded byte positions as numpy array,
         chunk data as memoryview.
     """
-    incoming_mview = isinstance(byts, memoryview)
+    incoming_mview = isinstance(byts, memoryview) and not isinstance(
+        byts.obj, mmap.mmap
+    )
     byts = memoryview(byts)
 
     enc_dtype = np.dtype(hub.constants.ENCODING_DTYPE)
@@ -172,6 +177,41 @@ def deserialize_chunk(
     return version, shape_info, byte_positions, data  # type: ignore
 
 
+def read_shape_info(
+    storage: StorageProvider, key: str, prefix_size: int = 1024
+) -> np.ndarray:
+    """Reads the encoded shapes info of the serialized chunk at `key`, without reading the rest of the chunk.
+
+    The header of the chunk is read with `storage.get_bytes`, which downloads only the requested bytes with providers
+    that support ranged reads. The first `prefix_size` bytes hold the whole shapes info of most chunks, otherwise the
+    rest of it is read with a second request.
+
+    Args:
+        storage (StorageProvider): The storage the chunk is in.
+        key (str): Key of the chunk in `storage`.
+        prefix_size (int): Number of bytes read by the first request.
+
+    Returns:
+        Encoded shapes info as a 2D numpy array, in the format of `ShapeEncoder`.
+    """
+    enc_dtype = np.dtype(hub.constants.ENCODING_DTYPE)
+    prefix = memoryview(storage.get_bytes(key, 0, prefix_size))
+    offset = 1 + prefix[0]
+    if len(prefix) < offset + 8:
+        prefix = memoryview(storage.get_bytes(key, 0, offset + 8))
+    nrows, ncols = struct.unpack("<ii", prefix[offset : offset + 8])
+    offset += 8
+    nbytes = nrows * ncols * enc_dtype.itemsize
+    if nbytes == 0:
+        return np.zeros((0, ncols), dtype=enc_dtype)
+
+    if len(prefix) >= offset + nbytes:
+        shape_info = prefix[offset : offset + nbytes]
+    else:
+        shape_info = memoryview(storage.get_bytes(key, offset, offset + nbytes))
+    return np.frombuffer(shape_info, dtype=enc_dtype).reshape(nrows, ncols).copy()
+
+
 def serialize_chunkids(version: str, ids: Sequence[np.ndarray]) -> memoryview:
     """Serializes chunk ID encoders into a single byte stream. This is how the encoders will be written to the storage provider.
 
@@ -1,10 +1,27 @@
-from hub.core.storage.s3 import S3Provider
 from hub.core.storage.memory import MemoryProvider
 from hub.core.storage.local import LocalProvider
+from hub.core.storage.pack import PackProvider
 from hub.core.storage.provider import StorageProvider
 
 try:
-    from hub.core.storage.shared_memory import SharedMemoryProvider
+    from hub.core.storage.shared_memory import SharedMemoryArena, SharedMemoryProvider
 except ModuleNotFoundError:
     pass
 from hub.core.storage.lru_cache import LRUCache
+from hub.core.storage.decoded_cache import DecodedSampleCache
+from hub.core.storage.memory_budget import (
+    MemoryBudget,
+    get_memory_budget,
+    set_memory_budget,
+)
+from hub.core.storage.persistent_cache import PersistentCache
+from hub.core.storage.sharded_lru_cache import ShardedLRUCache
+
+
+def __getattr__(name):
+    # `S3Provider` pulls in boto3, which is slow to import. It is only imported on first use.
+    if name == "S3Provider":
+        from hub.core.storage.s3 import S3Provider
+
+        return S3Provider
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,118 @@
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from hub.core.storage import StorageProvider, SharedMemoryProvider
+from hub.core.storage.shuffle_lru_cache import ShuffleLRUCache
+from hub.util.index_set import IndexSet
+
+
+class BlockShuffleLRUCache(ShuffleLRUCache):
+    """Creates a cache that shuffles by blocks of chunks, so that every chunk is read once.
+
+    Indexes are grouped by the chunk that they belong to (see `_group_by_chunk`), and the groups are visited in random
+    order. `pool_chunks` groups are open at a time, and every index is drawn uniformly at random from the remaining
+    indexes of the open groups. A group is closed once all of its indexes have been drawn, and the next one is opened.
+    The order of the groups and the draws both use the seeded generator of the epoch, so when resuming an epoch they
+    are replayed, and the groups open at that point are recovered (see `ShuffleLRUCache.state_dict`). The chunks of a group are therefore
+    only needed while it is open, which bounds read amplification at 1.0 as long as the cache can hold the chunks of
+    `pool_chunks` groups. The larger `pool_chunks` is, the further apart samples that are stored together end up.
+    """
+
+    def __init__(
+        self,
+        cache_storage: SharedMemoryProvider,
+        next_storage: Optional[StorageProvider],
+        cache_size: int,
+        dataset,
+        num_workers: int,
+        tensor_keys: Optional[Sequence[str]],
+        transform: Optional[Callable],
+        mode: Optional[str] = None,
+        decode_in_workers: bool = False,
+        transform_in_workers: bool = False,
+        world_size: int = 1,
+        rank: int = 0,
+        shard_seed: int = 0,
+        pool_chunks: int = 8,
+        loader_workers: int = 1,
+        loader_worker: int = 0,
+    ):
+        if pool_chunks < 1:
+            raise ValueError(f"pool_chunks should be at least 1, got {pool_chunks}.")
+        self.pool_chunks = pool_chunks
+        # the order of the groups of the epoch, built by its first draw. See `_schedule_groups`
+        self.groups: Optional[List[np.ndarray]] = None
+        super().__init__(
+            cache_storage,
+            next_storage,
+            cache_size,
+            dataset,
+            num_workers,
+            tensor_keys,
+            transform,
+            mode,
+            decode_in_workers,
+            transform_in_workers,
+            world_size,
+            rank,
+            shard_seed,
+            loader_workers,
+            loader_worker,
+        )
+
+    def set_epoch(self, epoch: int):
+        super().set_epoch(epoch)
+        self.groups = None
+
+    def _draw_index(self) -> int:
+        """Draws a random index among the remaining indexes of the open groups, in O(1), see `IndexSet`."""
+        if self.groups is None:
+            self._schedule_groups()
+        index = self.open_indexes.choice(self.rng)
+        self.open_indexes.discard(index)
+        self.all_remaining_indexes.discard(index)
+        group = int(self.group_of[index])
+        self.group_remaining[group] -= 1
+        if not self.group_remaining[group]:
+            del self.group_remaining[group]
+            self._open_groups()
+        return index
+
+    def _schedule_groups(self):
+        """Groups all the indexes of the epoch by chunk, in an order drawn with the generator of the epoch, and opens
+        the first groups. Indexes that were yielded before the state was loaded are part of their groups, and are
+        skipped when drawn."""
+        indexes = self.all_indexes
+        universe = self._universe()
+        order, group_starts, group_lengths = self._group_by_chunk(indexes)
+        permutation = self.rng.permutation(len(group_starts))
+        self.groups = [
+            indexes[order[start : start + length]]
+            for start, length in zip(
+                group_starts[permutation], group_lengths[permutation]
+            )
+            if length
+        ]
+        self.next_group = 0
+        self.group_of = np.empty(universe, dtype=np.int64)
+        self.group_remaining: Dict[int, int] = {}
+        self.open_indexes = IndexSet(universe=universe)
+        self._open_groups()
+
+    def _open_groups(self):
+        """Opens the next groups until `pool_chunks` groups are open or there are none left."""
+        while len(self.group_remaining) < self.pool_chunks and self.next_group < len(
+            self.groups
+        ):  # type: ignore
+            group = self.next_group
+            indexes = self.groups[group]  # type: ignore
+            self.group_of[indexes] = group
+            self.group_remaining[group] = len(indexes)
+            for index in indexes.tolist():
+                self.open_indexes.add(index)
+            self.next_group += 1
+
+    def _require_recent_chunks(self, index: int):
+        """Indexes are drawn from the open groups, whatever chunks the recent draws need, so there are no counts to
+        keep."""
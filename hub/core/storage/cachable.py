@@ -20,6 +20,12 @@ class Cachable(ABC):
         # do not implement, each class should do this because it could be very slow if `tobytes` is called
         raise NotImplementedError
 
+    @property
+    def memory_nbytes(self) -> int:
+        """Number of bytes this object holds in memory, including buffers derived from its data (such as decompressed
+        copies). Used by `LRUCache` to account for in-memory objects. Defaults to `nbytes`."""
+        return self.nbytes
+
     def __getstate__(self) -> Dict[str, Any]:
         return self.__dict__
 
@@ -32,7 +38,7 @@ class Cachable(ABC):
     @classmethod
     def frombuffer(cls, buffer: bytes):
         instance = cls()
-        instance.__setstate__(json.loads(buffer))
+        instance.__setstate__(json.loads(bytes(buffer)))
         return instance
 
 
@@ -0,0 +1,153 @@
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from hub.core.storage.eviction import (
+    EvictionPolicy,
+    LRUPolicy,
+    PinnedPolicy,
+    get_eviction_policy,
+)
+
+
+class DecodedSampleCache:
+    """In-memory cache of decoded samples, keyed by the chunk they were read from and their index within that chunk.
+
+    Chunks of sample compressed tensors (jpeg, png, ...) are cached as encoded bytes, so every read of a sample decodes
+    it again. With this tier, a sample is decoded once, and later reads only cost a lookup, until the sample is evicted.
+    Cached arrays are read-only, since they are shared by every read of the sample.
+
+    The cache is attached to the memory cache of a dataset (see `generate_chain`), which invalidates the samples of a
+    chunk whenever the chunk is written.
+    """
+
+    # the process-wide budget this cache draws from, if any. See `MemoryBudget`.
+    memory_budget = None
+
+    def __init__(
+        self,
+        cache_size: int,
+        eviction_policy: Union[str, Callable[[], EvictionPolicy]] = "lru",
+    ):
+        """Initializes the DecodedSampleCache.
+
+        Args:
+            cache_size (int): Maximum number of bytes of decoded samples held by the cache.
+            eviction_policy (str, Callable): The policy deciding which samples are evicted when the cache is full.
+                See `LRUCache`. "pinned" behaves as "lru", since decoded samples are never metadata.
+        """
+        self.cache_size = cache_size
+        self.eviction_policy = eviction_policy
+        self._initialize()
+
+    def _initialize(self):
+        policy = self.eviction_policy
+        if policy == PinnedPolicy.name:
+            policy = LRUPolicy.name
+        self.lru_sizes: EvictionPolicy = get_eviction_policy(policy)
+        self._samples: Dict[Tuple[str, int], np.ndarray] = {}
+        self._chunk_samples: Dict[str, Set[int]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self.cache_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, chunk_key: str, local_sample_index: int) -> Optional[np.ndarray]:
+        """Returns the decoded sample, or None if it isn't cached."""
+        key = (chunk_key, local_sample_index)
+        with self._lock:
+            sample = self._samples.get(key)
+            if sample is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.lru_sizes.move_to_end(key)  # type: ignore
+        return sample
+
+    def put(self, chunk_key: str, local_sample_index: int, sample: np.ndarray):
+        """Caches a decoded sample if it fits, marking it read-only."""
+        nbytes = sample.nbytes
+        if nbytes > self.cache_size:
+            return
+        sample.flags.writeable = False
+        key = (chunk_key, local_sample_index)
+        with self._lock:
+            self._remove(key)
+            while self.cache_used > 0 and self.cache_used + nbytes > self.cache_size:
+                self._evict()
+            self._samples[key] = sample
+            self._chunk_samples[chunk_key].add(local_sample_index)
+            self.lru_sizes[key] = nbytes  # type: ignore
+            self.cache_used += nbytes
+        if self.memory_budget is not None:
+            self.memory_budget.reserve(0)
+
+    def invalidate(self, chunk_key: str):
+        """Drops all the cached samples of a chunk."""
+        with self._lock:
+            for local_sample_index in self._chunk_samples.pop(chunk_key, ()):
+                key = (chunk_key, local_sample_index)
+                self.cache_used -= self.lru_sizes.pop(key)  # type: ignore
+                del self._samples[key]
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+            self._chunk_samples.clear()
+            self.lru_sizes.clear()
+            self.cache_used = 0
+
+    def __len__(self):
+        return len(self._samples)
+
+    def _remove(self, key: Tuple[str, int]):
+        if key in self._samples:
+            self.cache_used -= self.lru_sizes.pop(key)  # type: ignore
+            del self._samples[key]
+            self._discard_from_chunk(key)
+
+    def _discard_from_chunk(self, key: Tuple[str, int]):
+        chunk_key, local_sample_index = key
+        samples = self._chunk_samples[chunk_key]
+        samples.discard(local_sample_index)
+        if not samples:
+            del self._chunk_samples[chunk_key]
+
+    def _evict(self):
+        key, nbytes = self.lru_sizes.popitem(last=False)
+        del self._samples[key]  # type: ignore
+        self._discard_from_chunk(key)  # type: ignore
+        self.cache_used -= nbytes
+        self.evictions += 1
+
+    def _pop_from_cache(self):
+        """Evicts a single sample. Used by `MemoryBudget`."""
+        with self._lock:
+            if self._samples:
+                self._evict()
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _tier_stats(self) -> Dict[str, Any]:
+        return {
+            "policy": f"decoded-{self.lru_sizes.name}",
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hit_ratio,
+            "used": self.cache_used,
+            "size": self.cache_size,
+        }
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"cache_size": self.cache_size, "eviction_policy": self.eviction_policy}
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._initialize()
@@ -0,0 +1,387 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, Optional, Tuple, Union
+
+from hub.util.keys import is_chunk_key
+
+
+class EvictionPolicy(ABC):
+    """Tracks the keys held by an `LRUCache` along with their sizes, and decides which key is evicted next.
+
+    The interface mirrors the subset of `OrderedDict` that `LRUCache` has always used for `lru_sizes`:
+    `move_to_end` records a hit and `popitem(last=False)` evicts a key. Removing a key with `pop` (deletions and
+    overwrites) is not an eviction.
+    """
+
+    name: str
+
+    def __init__(self):
+        self.sizes: Dict[str, int] = {}
+
+    @abstractmethod
+    def _on_insert(self, key: str):
+        """Called when `key` enters the cache."""
+
+    @abstractmethod
+    def _on_access(self, key: str):
+        """Called on every cache hit for `key`."""
+
+    @abstractmethod
+    def _on_remove(self, key: str, evicted: bool):
+        """Called when `key` leaves the cache, either evicted or removed explicitly."""
+
+    @abstractmethod
+    def _victim(self) -> str:
+        """Returns the key that should be evicted next."""
+
+    def __contains__(self, key) -> bool:
+        return key in self.sizes
+
+    def __getitem__(self, key: str) -> int:
+        return self.sizes[key]
+
+    def __setitem__(self, key: str, size: int):
+        """Sets the size of `key`, inserting it if it's new. Resizing an existing key does not count as an access."""
+        if key not in self.sizes:
+            self.sizes[key] = size
+            self._on_insert(key)
+        else:
+            self.sizes[key] = size
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.sizes)
+
+    def keys(self):
+        return self.sizes.keys()
+
+    def move_to_end(self, key: str):
+        self._on_access(key)
+
+    def popitem(self, last: bool = False) -> Tuple[str, int]:
+        """Evicts a key chosen by the policy. `last` is only accepted for compatibility with `OrderedDict`."""
+        if not self.sizes:
+            raise KeyError("popitem(): eviction policy is empty")
+        key = self._victim()
+        self._on_remove(key, evicted=True)
+        return key, self.sizes.pop(key)
+
+    def pop(self, key: str, *default):
+        if key not in self.sizes:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        self._on_remove(key, evicted=False)
+        return self.sizes.pop(key)
+
+    def clear(self):
+        self.sizes.clear()
+        self._clear()
+
+    @abstractmethod
+    def _clear(self):
+        """Resets the policy's own bookkeeping."""
+
+
+class LRUPolicy(EvictionPolicy):
+    """Evicts the least recently used key."""
+
+    name = "lru"
+
+    def __init__(self):
+        super().__init__()
+        self._order: OrderedDict[str, None] = OrderedDict()
+
+    def _on_insert(self, key):
+        self._order[key] = None
+
+    def _on_access(self, key):
+        self._order.move_to_end(key)
+
+    def _on_remove(self, key, evicted):
+        del self._order[key]
+
+    def _victim(self):
+        return next(iter(self._order))
+
+    def _clear(self):
+        self._order.clear()
+
+
+class LFUPolicy(EvictionPolicy):
+    """Evicts the least frequently used key, the least recently used one among keys with the same frequency.
+
+    Keys are bucketed by frequency so that hits and evictions are O(1) in the number of keys.
+    """
+
+    name = "lfu"
+
+    def __init__(self):
+        super().__init__()
+        self._frequencies: Dict[str, int] = {}
+        self._buckets: Dict[int, OrderedDict] = {}
+
+    def _add(self, key: str, frequency: int):
+        self._frequencies[key] = frequency
+        self._buckets.setdefault(frequency, OrderedDict())[key] = None
+
+    def _discard(self, key: str) -> int:
+        frequency = self._frequencies.pop(key)
+        bucket = self._buckets[frequency]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[frequency]
+        return frequency
+
+    def _on_insert(self, key):
+        self._add(key, 1)
+
+    def _on_access(self, key):
+        self._add(key, self._discard(key) + 1)
+
+    def _on_remove(self, key, evicted):
+        self._discard(key)
+
+    def _victim(self):
+        return next(iter(self._buckets[min(self._buckets)]))
+
+    def _clear(self):
+        self._frequencies.clear()
+        self._buckets.clear()
+
+
+class TwoQueuePolicy(EvictionPolicy):
+    """Simplified 2Q (Johnson & Shasha, 1994). New keys enter a FIFO queue (`A1in`), and are only promoted to the main
+    LRU queue (`Am`) if they are requested again after being evicted from it, while their key is remembered in a ghost
+    queue (`A1out`). A single scan over a large tensor therefore only cycles through `A1in`, and never evicts the keys
+    that are reused on every step.
+
+    Args:
+        in_fraction (float): Share of the cached bytes `A1in` may hold before it is evicted from instead of `Am`.
+        ghost_ratio (float): Number of keys remembered in `A1out`, relative to the number of cached keys.
+    """
+
+    name = "2q"
+
+    def __init__(self, in_fraction: float = 0.25, ghost_ratio: float = 0.5):
+        super().__init__()
+        self.in_fraction = in_fraction
+        self.ghost_ratio = ghost_ratio
+        self._in: OrderedDict[str, None] = OrderedDict()
+        self._main: OrderedDict[str, None] = OrderedDict()
+        self._ghosts: OrderedDict[str, None] = OrderedDict()
+        self._in_bytes = 0
+        self._used = 0
+
+    def __setitem__(self, key, size):
+        old = self.sizes.get(key, 0)
+        self._used += size - old
+        if key in self._in:
+            self._in_bytes += size - old
+        super().__setitem__(key, size)
+
+    def _on_insert(self, key):
+        if key in self._ghosts:
+            del self._ghosts[key]
+            self._main[key] = None
+        else:
+            self._in[key] = None
+            self._in_bytes += self.sizes[key]
+
+    def _on_access(self, key):
+        if key in self._main:
+            self._main.move_to_end(key)
+
+    def _on_remove(self, key, evicted):
+        size = self.sizes[key]
+        self._used -= size
+        if key in self._in:
+            del self._in[key]
+            self._in_bytes -= size
+            remember = evicted
+        else:
+            del self._main[key]
+            # keys that are overwritten go through `pop`, they should not lose their place in the main queue
+            remember = not evicted
+
+        if remember:
+            self._ghosts[key] = None
+            max_ghosts = max(1, int(len(self.sizes) * self.ghost_ratio))
+            while len(self._ghosts) > max_ghosts:
+                self._ghosts.popitem(last=False)
+
+    def _victim(self):
+        if self._in and (
+            self._in_bytes > self.in_fraction * self._used or not self._main
+        ):
+            return next(iter(self._in))
+        return next(iter(self._main))
+
+    def _clear(self):
+        self._in.clear()
+        self._main.clear()
+        self._ghosts.clear()
+        self._in_bytes = 0
+        self._used = 0
+
+
+class ARCPolicy(EvictionPolicy):
+    """Adaptive Replacement Cache (Megiddo & Modha, 2003). Keys seen once (`T1`) and keys seen at least twice (`T2`)
+    are kept in separate LRU lists, and the split between them adapts to the workload using ghost lists (`B1`, `B2`)
+    of recently evicted keys. Capacity is counted in keys, since the cache's byte budget is enforced by `LRUCache`.
+    """
+
+    name = "arc"
+
+    def __init__(self):
+        super().__init__()
+        self._t1: OrderedDict[str, None] = OrderedDict()
+        self._t2: OrderedDict[str, None] = OrderedDict()
+        self._b1: OrderedDict[str, None] = OrderedDict()
+        self._b2: OrderedDict[str, None] = OrderedDict()
+        # keys removed without being evicted (overwrites), mapped to whether they were in T2
+        self._removed: OrderedDict[str, bool] = OrderedDict()
+        self.target = 0.0  # the adaptive target size of T1
+
+    def _on_insert(self, key):
+        capacity = len(self.sizes)
+        if key in self._removed:
+            # an overwritten key goes back where it was, without adapting the target
+            (self._t2 if self._removed.pop(key) else self._t1)[key] = None
+        elif key in self._b1:
+            self.target = min(
+                capacity, self.target + max(len(self._b2) / len(self._b1), 1)
+            )
+            del self._b1[key]
+            self._t2[key] = None
+        elif key in self._b2:
+            self.target = max(0, self.target - max(len(self._b1) / len(self._b2), 1))
+            del self._b2[key]
+            self._t2[key] = None
+        else:
+            self._t1[key] = None
+
+    def _on_access(self, key):
+        if key in self._t1:
+            del self._t1[key]
+            self._t2[key] = None
+        else:
+            self._t2.move_to_end(key)
+
+    def _on_remove(self, key, evicted):
+        in_t2 = key in self._t2
+        del (self._t2 if in_t2 else self._t1)[key]
+        if evicted:
+            (self._b2 if in_t2 else self._b1)[key] = None
+        else:
+            self._removed[key] = in_t2
+
+        capacity = max(1, len(self.sizes) - 1)
+        for ghost_list in (self._b1, self._b2, self._removed):
+            while len(ghost_list) > capacity:
+                ghost_list.popitem(last=False)
+
+    def _victim(self):
+        if self._t1 and (len(self._t1) > self.target or not self._t2):
+            return next(iter(self._t1))
+        return next(iter(self._t2))
+
+    def _clear(self):
+        for keys in (self._t1, self._t2, self._b1, self._b2, self._removed):
+            keys.clear()
+        self.target = 0.0
+
+
+class PinnedPolicy(EvictionPolicy):
+    """Never evicts pinned keys while unpinned keys are cached. By default every key that isn't a chunk (tensor and
+    dataset metas, chunk id encoders, infos) is pinned, the remaining keys are handled by `policy`.
+
+    Args:
+        policy (EvictionPolicy, optional): The policy used for unpinned keys. Defaults to `LRUPolicy`.
+        is_pinned (Callable[[str], bool], optional): Decides which keys are pinned. Defaults to non-chunk keys.
+    """
+
+    name = "pinned"
+
+    def __init__(
+        self,
+        policy: Optional[EvictionPolicy] = None,
+        is_pinned: Optional[Callable[[str], bool]] = None,
+    ):
+        super().__init__()
+        self.policy = policy or LRUPolicy()
+        self.is_pinned = is_pinned or _is_not_chunk_key
+        self._pinned: OrderedDict[str, None] = OrderedDict()
+
+    def __setitem__(self, key, size):
+        if key in self.sizes and key not in self._pinned:
+            self.policy[key] = size
+        super().__setitem__(key, size)
+
+    def _on_insert(self, key):
+        if self.is_pinned(key):
+            self._pinned[key] = None
+        else:
+            self.policy[key] = self.sizes[key]
+
+    def _on_access(self, key):
+        if key in self._pinned:
+            self._pinned.move_to_end(key)
+        else:
+            self.policy.move_to_end(key)
+
+    def _on_remove(self, key, evicted):
+        if key in self._pinned:
+            del self._pinned[key]
+        else:
+            self.policy._on_remove(key, evicted)
+            del self.policy.sizes[key]
+
+    def _victim(self):
+        if len(self.policy):
+            return self.policy._victim()
+        # only pinned keys are left, fall back to LRU among them so the cache can still make room
+        return next(iter(self._pinned))
+
+    def _clear(self):
+        self.policy.clear()
+        self._pinned.clear()
+
+
+def _is_not_chunk_key(key: str) -> bool:
+    return not is_chunk_key(key)
+
+
+EVICTION_POLICIES: Dict[str, Callable[[], EvictionPolicy]] = {
+    LRUPolicy.name: LRUPolicy,
+    LFUPolicy.name: LFUPolicy,
+    TwoQueuePolicy.name: TwoQueuePolicy,
+    ARCPolicy.name: ARCPolicy,
+    PinnedPolicy.name: PinnedPolicy,
+}
+
+
+def get_eviction_policy(
+    policy: Union[str, Callable[[], EvictionPolicy]]
+) -> EvictionPolicy:
+    """Creates an eviction policy from its name (one of `EVICTION_POLICIES`) or from a factory.
+
+    Args:
+        policy (str, callable): Name of the policy, case insensitive, or a callable returning a new policy.
+
+    Returns:
+        EvictionPolicy: A new instance of the policy.
+
+    Raises:
+        ValueError: If `policy` is not the name of a known eviction policy.
+    """
+    if callable(policy):
+        return policy()
+    try:
+        return EVICTION_POLICIES[policy.lower()]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown eviction policy '{policy}'. Available policies: {list(EVICTION_POLICIES)}."
+        )
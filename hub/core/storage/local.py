@@ -1,15 +1,70 @@
 import os
+import mmap
 import shutil
-from typing import Optional, Set
+import sys
+import threading
+import weakref
+from typing import Optional, Set, Union
+from uuid import uuid4
 
+from hub.constants import LOCAL_MMAP_MAX_OPEN_MAPS, LOCAL_MMAP_MIN_SIZE
 from hub.core.storage.provider import StorageProvider
 from hub.util.exceptions import DirectoryAtPathException, FileAtPathException
 
 
+# Before python 3.13 (which adds `trackfd`), a memory map keeps a duplicate of the descriptor of its file open for as
+# long as it is alive, so mapped files that stay in a cache count against the limit of open files.
+_MMAP_TRACKFD = sys.version_info >= (3, 13)
+_open_maps = 0
+_open_maps_lock = threading.Lock()
+
+
+def _max_open_maps() -> int:
+    limit = LOCAL_MMAP_MAX_OPEN_MAPS
+    try:
+        import resource
+
+        soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft != resource.RLIM_INFINITY:
+            limit = min(limit, soft // 4)
+    except ImportError:
+        pass
+    return limit
+
+
+def _release_map():
+    global _open_maps
+    with _open_maps_lock:
+        _open_maps -= 1
+
+
+def _map_file(file) -> Optional[mmap.mmap]:
+    """Memory maps a file for reading.
+
+    Returns None instead if as many maps as `_max_open_maps()` are already alive and each of them holds a file
+    descriptor, in which case the file should be read into memory.
+    """
+    if _MMAP_TRACKFD:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ, trackfd=False)  # type: ignore
+
+    global _open_maps
+    with _open_maps_lock:
+        if _open_maps >= _max_open_maps():
+            return None
+        _open_maps += 1
+    try:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except Exception:
+        _release_map()
+        raise
+    weakref.finalize(mapped, _release_map)
+    return mapped
+
+
 class LocalProvider(StorageProvider):
     """Provider class for using the local filesystem."""
 
-    def __init__(self, root: str):
+    def __init__(self, root: str, use_mmap: bool = True):
         """Initializes the LocalProvider.
 
         Example:
@@ -17,6 +72,8 @@ class LocalProvider(StorageProvider):
 
         Args:
             root (str): The root of the provider. All read/write request keys will be appended to root."
+            use_mmap (bool): If True, files of at least `LOCAL_MMAP_MIN_SIZE` bytes are memory mapped when read instead
+                of being copied into memory. Always disabled on Windows, where mapped files can not be replaced.
 
         Raises:
             FileAtPathException: If the root is a file instead of a directory.
@@ -24,11 +81,18 @@ class LocalProvider(StorageProvider):
         if os.path.isfile(root):
             raise FileAtPathException(root)
         self.root = root
+        self.use_mmap = use_mmap and os.name != "nt"
         self.files: Optional[Set[str]] = None
 
     def __getitem__(self, path: str):
         """Gets the object present at the path within the given byte range.
 
+        Note:
+            Large files are returned as read-only memoryviews over a memory map of the file, so that the data is only
+            paged in from disk as it is accessed. The mapping stays valid even if the key is overwritten or deleted.
+            As every map holds a file descriptor, at most `LOCAL_MMAP_MAX_OPEN_MAPS` of them (and a quarter of the
+            limit of open files) are alive at a time, files read beyond that are copied into memory.
+
         Example:
             local_provider = LocalProvider("/home/ubuntu/Documents/")
             my_data = local_provider["abc.txt"]
@@ -37,7 +101,7 @@ class LocalProvider(StorageProvider):
             path (str): The path relative to the root of the provider.
 
         Returns:
-            bytes: The bytes of the object present at the path.
+            Union[bytes, memoryview]: The bytes of the object present at the path.
 
         Raises:
             KeyError: If an object is not found at the path.
@@ -46,13 +110,20 @@ class LocalProvider(StorageProvider):
         """
         try:
             full_path = self._check_is_file(path)
-            file = open(full_path, "rb")
-            return file.read()
+            with open(full_path, "rb") as file:
+                return self._read(file)
         except DirectoryAtPathException:
             raise
         except FileNotFoundError:
             raise KeyError
 
+    def _read(self, file) -> Union[bytes, memoryview]:
+        if self.use_mmap and os.fstat(file.fileno()).st_size >= LOCAL_MMAP_MIN_SIZE:
+            mapped = _map_file(file)
+            if mapped is not None:
+                return memoryview(mapped)
+        return file.read()
+
     def __setitem__(self, path: str, value: bytes):
         """Sets the object present at the path with the value
 
@@ -76,8 +147,17 @@ class LocalProvider(StorageProvider):
             raise FileAtPathException(directory)
         if not os.path.exists(directory):
             os.makedirs(directory, exist_ok=True)
-        file = open(full_path, "wb")
-        file.write(value)
+
+        # write to a temporary file first, so that existing memory maps of `full_path` are never truncated
+        temp_path = f"{full_path}.{uuid4().hex}.tmp"
+        try:
+            with open(temp_path, "wb") as file:
+                file.write(value)
+            os.replace(temp_path, full_path)
+        finally:
+            # only left behind if the write or the replace failed
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
         if self.files is not None:
             self.files.add(path)
 
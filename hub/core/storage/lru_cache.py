@@ -1,13 +1,17 @@
-from collections import OrderedDict
 from hub.core.storage.cachable import Cachable, CachableCallback
-from typing import Any, Dict, Optional, Set, Union
+from typing import Any, Callable, Dict, List, Optional, Set, Union
 
+from hub.core.storage.decoded_cache import DecodedSampleCache
+
+from hub.core.storage.eviction import EvictionPolicy, get_eviction_policy
+from hub.core.storage.memory_budget import MemoryBudget, get_memory_budget
 from hub.core.storage.provider import StorageProvider
+from hub.util.keys import is_chunk_key
 
 
 def _get_nbytes(obj: Union[bytes, memoryview, Cachable]):
     if isinstance(obj, Cachable):
-        return obj.nbytes
+        return obj.memory_nbytes
     return len(obj)
 
 
@@ -15,11 +19,18 @@ def _get_nbytes(obj: Union[bytes, memoryview, Cachable]):
 class LRUCache(StorageProvider):
     """LRU Cache that uses StorageProvider for caching"""
 
+    # the process-wide budget this cache draws from, if any. See `MemoryBudget`.
+    memory_budget: Optional[MemoryBudget] = None
+
+    # decoded samples of the chunks read through this cache, if enabled. See `DecodedSampleCache`.
+    decoded_cache: Optional[DecodedSampleCache] = None
+
     def __init__(
         self,
         cache_storage: StorageProvider,
         next_storage: Optional[StorageProvider],
         cache_size: int,
+        eviction_policy: Union[str, Callable[[], EvictionPolicy]] = "lru",
     ):
         """Initializes the LRUCache. It can be chained with other LRUCache objects to create multilayer caches.
 
@@ -33,15 +44,56 @@ class LRUCache(StorageProvider):
             cache_size (int): The total space that can be used from the cache_storage in bytes.
                 This number may be less than the actual space available on the cache_storage.
                 Setting it to a higher value than actually available space may lead to unexpected behaviors.
+            eviction_policy (str, Callable): The policy deciding which keys are evicted when the cache is full.
+                One of "lru", "lfu", "2q", "arc" or "pinned" (metadata is never evicted in favour of chunks),
+                or a picklable factory returning an `EvictionPolicy`. Defaults to "lru".
         """
         self.next_storage = next_storage
         self.cache_storage = cache_storage
         self.cache_size = cache_size
+        self.eviction_policy = eviction_policy
 
-        # tracks keys in lru order, stores size of value, only keys present in this exist in cache
-        self.lru_sizes: OrderedDict[str, int] = OrderedDict()
+        # tracks the keys in eviction order, stores size of value, only keys present in this exist in cache
+        self.lru_sizes: EvictionPolicy = get_eviction_policy(eviction_policy)
         self.dirty_keys: Set[str] = set()  # keys present in cache but not next_storage
         self.cache_used = 0
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        """Fraction of reads served by this tier of the cache, since it was created or its stats were reset."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def cache_stats(self) -> List[Dict[str, Any]]:
+        """Returns the hit / miss counts of every tier of the cache chain, starting from this one.
+
+        Example:
+            >>> ds.storage.cache_stats()
+            [{'policy': 'lru', 'hits': 120, 'misses': 8, 'evictions': 0, 'hit_ratio': 0.9375, 'used': 1048, 'size': 268435456}]
+        """
+        stats = [self._tier_stats()]
+        if self.decoded_cache is not None:
+            stats.insert(0, self.decoded_cache._tier_stats())
+        if isinstance(self.next_storage, LRUCache):
+            stats.extend(self.next_storage.cache_stats())
+        return stats
+
+    def _tier_stats(self) -> Dict[str, Any]:
+        return {
+            "policy": self.lru_sizes.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hit_ratio,
+            "used": self.cache_used,
+            "size": self.cache_size,
+        }
 
     def update_used_cache_for_path(self, path: str, new_size: int):
         if new_size < 0:
@@ -52,16 +104,40 @@ class LRUCache(StorageProvider):
         self.cache_used += new_size
         self.lru_sizes[path] = new_size
 
+    def _refresh_size(self, path: str, obj: Cachable):
+        """Updates the size accounted for a cached object, which may have grown since it was inserted (for example
+        when a `Chunk` keeps a decompressed copy of its data), evicting other keys if the cache is now too full."""
+        if path in self.lru_sizes:
+            nbytes = obj.memory_nbytes
+            if nbytes != self.lru_sizes[path]:
+                self.update_used_cache_for_path(path, nbytes)
+                self._free_up_space(0)
+
     def flush(self):
         """Writes data from cache_storage to next_storage. Only the dirty keys are written.
         This is a cascading function and leads to data being written to the final storage in case of a chained cache.
+        `next_storage` is flushed even if there are no dirty keys, as it may have pending changes of its own (for
+        example deletions that went straight through to it).
         """
         self.check_readonly()
-        if self.dirty_keys:
-            for key in self.dirty_keys.copy():
-                self._forward(key)
-            if self.next_storage is not None:
-                self.next_storage.flush()
+        for key in self.dirty_keys.copy():
+            self._forward(key)
+        if self.next_storage is not None:
+            self.next_storage.flush()
+
+    def peek(self, path: str) -> Optional[Union[bytes, memoryview, Cachable]]:
+        """Returns the object at `path` if it is in the cache, without reading it from the next storage or counting
+        it as an access.
+
+        Args:
+            path (str): The path relative to the root of the underlying storage.
+
+        Returns:
+            The cached object, or None if it is not cached.
+        """
+        if path in self.lru_sizes:
+            return self.cache_storage[path]
+        return None
 
     def get_cachable(self, path: str, expected_class):
         """If the data at `path` was stored using the output of a `Cachable` object's `tobytes` function,
@@ -86,6 +162,7 @@ class LRUCache(StorageProvider):
                 raise ValueError(
                     f"'{path}' was expected to have the class '{expected_class.__name__}'. Instead, got: '{type(item)}'."
                 )
+            self._refresh_size(path, item)
             return item
 
         if isinstance(item, (bytes, memoryview)):
@@ -115,9 +192,11 @@ class LRUCache(StorageProvider):
             bytes: The bytes of the object present at the path.
         """
         if path in self.lru_sizes:
+            self.hits += 1
             self.lru_sizes.move_to_end(path)  # refresh position for LRU
             return self.cache_storage[path]
         else:
+            self.misses += 1
             if self.next_storage is not None:
                 # fetch from storage, may throw KeyError
                 result = self.next_storage[path]
@@ -138,6 +217,7 @@ class LRUCache(StorageProvider):
             ReadOnlyError: If the provider is in read-only mode.
         """
         self.check_readonly()
+        self._invalidate_decoded(path)
         if path in self.lru_sizes:
             size = self.lru_sizes.pop(path)
             self.cache_used -= size
@@ -161,6 +241,7 @@ class LRUCache(StorageProvider):
             ReadOnlyError: If the provider is in read-only mode.
         """
         self.check_readonly()
+        self._invalidate_decoded(path)
         deleted_from_cache = False
         if path in self.lru_sizes:
             size = self.lru_sizes.pop(path)
@@ -185,6 +266,8 @@ class LRUCache(StorageProvider):
         This doesn't delete data from the actual storage.
         """
         self._flush_if_not_read_only()
+        if self.decoded_cache is not None:
+            self.decoded_cache.clear()
         self.cache_used = 0
         self.lru_sizes.clear()
         self.dirty_keys.clear()
@@ -198,6 +281,8 @@ class LRUCache(StorageProvider):
         This is an IRREVERSIBLE operation. Data once deleted can not be recovered.
         """
         self.check_readonly()
+        if self.decoded_cache is not None:
+            self.decoded_cache.clear()
         self.cache_used = 0
         self.lru_sizes.clear()
         self.dirty_keys.clear()
@@ -221,6 +306,10 @@ class LRUCache(StorageProvider):
         """
         yield from self._all_keys()
 
+    def _invalidate_decoded(self, path: str):
+        if self.decoded_cache is not None and is_chunk_key(path):
+            self.decoded_cache.invalidate(path)
+
     def _forward(self, path, remove_from_dirty=False):
         """Forward the value at a given path to the next storage, and un-marks its key.
         If the value at the path is Cachable, it will only be un-dirtied if remove_from_dirty=True.
@@ -257,9 +346,12 @@ class LRUCache(StorageProvider):
         """
         while self.cache_used > 0 and extra_size + self.cache_used > self.cache_size:
             self._pop_from_cache()
+        if self.memory_budget is not None:
+            self.memory_budget.reserve(extra_size)
 
     def _pop_from_cache(self):
-        """Helper function that pops the least recently used key, value pair from the cache"""
+        """Helper function that pops the key, value pair chosen by the eviction policy from the cache"""
+        self.evictions += 1
         key, itemsize = self.lru_sizes.popitem(last=False)
         if key in self.dirty_keys:
             self._forward(key, remove_from_dirty=True)
@@ -309,6 +401,9 @@ class LRUCache(StorageProvider):
             "next_storage": self.next_storage,
             "cache_storage": self.cache_storage,
             "cache_size": self.cache_size,
+            "eviction_policy": self.eviction_policy,
+            "memory_budget": self.memory_budget is get_memory_budget(),
+            "decoded_cache": self.decoded_cache,
         }
 
     def __setstate__(self, state: Dict[str, Any]):
@@ -327,6 +422,14 @@ class LRUCache(StorageProvider):
         self.next_storage = state["next_storage"]
         self.cache_storage = state["cache_storage"]
         self.cache_size = state["cache_size"]
-        self.lru_sizes = OrderedDict()
+        self.eviction_policy = state.get("eviction_policy", "lru")
+        self.lru_sizes = get_eviction_policy(self.eviction_policy)
         self.dirty_keys = set()
         self.cache_used = 0
+        self._reset_stats()
+        self.decoded_cache = state.get("decoded_cache")
+        if state.get("memory_budget"):
+            # registers with the budget of the process the cache is unpickled in
+            get_memory_budget().register(self)
+            if self.decoded_cache is not None:
+                get_memory_budget().register(self.decoded_cache)
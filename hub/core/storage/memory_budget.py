@@ -0,0 +1,91 @@
+import threading
+import weakref
+from typing import List, Optional
+
+
+class MemoryBudget:
+    """A byte budget shared by several in-memory caches.
+
+    Every cache registered with a budget still enforces its own `cache_size`, but before a cache stores a new object
+    it also asks the budget to make room for it. If the registered caches hold more than `limit` bytes together, the
+    budget evicts from the cache that currently holds the most bytes, until the new object fits. A cache that is idle
+    (for example the memory cache of a dataset that is no longer iterated) therefore gives up its memory to the caches
+    that are in use, instead of keeping up to `cache_size` bytes each.
+
+    Caches are held through weak references, so registering a cache does not keep it alive.
+
+    Args:
+        limit (int, optional): The maximum number of bytes held by all the registered caches together.
+            If None, the budget is unlimited and only the size of each cache applies.
+    """
+
+    def __init__(self, limit: Optional[int] = None):
+        self.limit = limit
+        self.evictions = 0
+        # keyed by id, since storage providers are mappings and so not hashable
+        self._caches: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+        self._lock = threading.RLock()
+
+    def register(self, cache):
+        """Makes `cache` (an `LRUCache`) draw from this budget."""
+        with self._lock:
+            cache.memory_budget = self
+            self._caches[id(cache)] = cache
+
+    def unregister(self, cache):
+        with self._lock:
+            self._caches.pop(id(cache), None)
+            if cache.memory_budget is self:
+                cache.memory_budget = None
+
+    @property
+    def caches(self) -> List:
+        return list(self._caches.values())
+
+    @property
+    def used(self) -> int:
+        """Number of bytes held by the registered caches, as accounted by `Cachable.memory_nbytes`."""
+        return sum(cache.cache_used for cache in self.caches)
+
+    def reserve(self, nbytes: int):
+        """Evicts from the registered caches, largest first, until `nbytes` more bytes fit in the budget.
+
+        Note:
+            The budget may still be exceeded afterwards if the registered caches hold nothing else that can be evicted.
+        """
+        if self.limit is None:
+            return
+        with self._lock:
+            used = self.used
+            while used + nbytes > self.limit:
+                candidates = [cache for cache in self.caches if cache.cache_used > 0]
+                if not candidates:
+                    break
+                victim = max(candidates, key=lambda cache: cache.cache_used)
+                before = victim.cache_used
+                victim._pop_from_cache()
+                self.evictions += 1
+                used -= before - victim.cache_used
+
+    def set_limit(self, limit: Optional[int]):
+        """Changes the limit of the budget, evicting from the registered caches right away if it is now exceeded."""
+        self.limit = limit
+        self.reserve(0)
+
+
+_process_budget = MemoryBudget()
+
+
+def get_memory_budget() -> MemoryBudget:
+    """Returns the budget shared by the memory caches of every dataset, data loader and transform in this process."""
+    return _process_budget
+
+
+def set_memory_budget(limit: Optional[int]):
+    """Limits the memory held by the caches of all datasets in this process to `limit` bytes, on top of the size of
+    each cache. Caches that hold the most data are evicted from first. Pass None to remove the limit.
+
+    Example:
+        >>> hub.core.storage.set_memory_budget(4 * GB)
+    """
+    _process_budget.set_limit(limit)
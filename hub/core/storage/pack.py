@@ -0,0 +1,338 @@
+import os
+import mmap
+import shutil
+import struct
+import threading
+from typing import Dict, Optional, Tuple, Union
+
+from hub.constants import PACK_INDEX_FILENAME, PACK_MAX_SIZE
+from hub.core.storage.provider import StorageProvider
+from hub.util.exceptions import FileAtPathException
+
+
+# operation, pack id, offset, length, key length. followed by the utf-8 encoded key.
+_RECORD = struct.Struct("<BIQQH")
+_PUT, _DELETE = 1, 2
+
+
+class PackProvider(StorageProvider):
+    """Provider class for the local filesystem that stores objects inside a few large pack files."""
+
+    def __init__(
+        self, root: str, max_pack_size: int = PACK_MAX_SIZE, use_mmap: bool = True
+    ):
+        """Initializes the PackProvider.
+
+        Objects are appended to pack files (`pack_<id>` under `root`), and their locations are appended to an index
+        log (`PACK_INDEX_FILENAME`). The index is replayed into memory when the provider is created, so listing keys
+        never touches the filesystem. Overwriting or deleting a key leaves its old bytes in the pack file, `compact`
+        rewrites the packs without them.
+
+        Note:
+            Only a single process should write to a pack provider at a time.
+
+        Example:
+            pack_provider = PackProvider("/home/ubuntu/datasets/mnist")
+
+        Args:
+            root (str): The root directory of the provider.
+            max_pack_size (int): A new pack file is started once the current one would grow past this many bytes.
+            use_mmap (bool): If True, reads return read-only memoryviews over memory mapped pack files.
+                Always disabled on Windows, where mapped files can not be removed.
+
+        Raises:
+            FileAtPathException: If the root is a file instead of a directory.
+        """
+        if os.path.isfile(root):
+            raise FileAtPathException(root)
+        self.root = root
+        self.max_pack_size = max_pack_size
+        self.use_mmap = use_mmap and os.name != "nt"
+        self._initialize()
+
+    def _initialize(self):
+        self.index: Dict[str, Tuple[int, int, int]] = {}
+        self.pack_sizes: Dict[int, int] = {}
+        self.dead_bytes = 0
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._pack_file = None
+        self._pack_file_id: Optional[int] = None
+        self._log_file = None
+        self._lock = threading.Lock()
+        self._load_index()
+
+    @property
+    def _full_root(self) -> str:
+        return os.path.expanduser(self.root)
+
+    def _pack_path(self, pack_id: int) -> str:
+        return os.path.join(self._full_root, f"pack_{pack_id:08d}")
+
+    @property
+    def _index_path(self) -> str:
+        return os.path.join(self._full_root, PACK_INDEX_FILENAME)
+
+    def _load_index(self):
+        """Replays the index log. A partially written record at the end of the log (from a crash) is ignored."""
+        try:
+            with open(self._index_path, "rb") as f:
+                log = f.read()
+        except FileNotFoundError:
+            log = b""
+
+        offset = 0
+        while offset + _RECORD.size <= len(log):
+            op, pack_id, start, length, key_length = _RECORD.unpack_from(log, offset)
+            end = offset + _RECORD.size + key_length
+            if end > len(log):
+                break
+            key = log[offset + _RECORD.size : end].decode("utf-8")
+            offset = end
+
+            old = self.index.pop(key, None)
+            if old is not None:
+                self.dead_bytes += old[2]
+            if op == _PUT:
+                self.index[key] = (pack_id, start, length)
+                self.pack_sizes[pack_id] = max(
+                    self.pack_sizes.get(pack_id, 0), start + length
+                )
+
+    def _append_record(self, op: int, key: str, location=(0, 0, 0)):
+        if self._log_file is None:
+            os.makedirs(self._full_root, exist_ok=True)
+            self._log_file = open(self._index_path, "ab")
+        encoded = key.encode("utf-8")
+        self._log_file.write(_RECORD.pack(op, *location, len(encoded)) + encoded)
+        self._log_file.flush()
+
+    def _current_pack(self, num_bytes: int) -> int:
+        """Returns the id of the pack the next object should be appended to, rolling over to a new pack if needed."""
+        pack_id = max(self.pack_sizes, default=0)
+        size = self.pack_sizes.get(pack_id, 0)
+        if size > 0 and size + num_bytes > self.max_pack_size:
+            pack_id += 1
+        if self._pack_file is None or self._pack_file_id != pack_id:
+            if self._pack_file is not None:
+                self._pack_file.close()
+            os.makedirs(self._full_root, exist_ok=True)
+            self._pack_file = open(self._pack_path(pack_id), "ab")
+            self._pack_file_id = pack_id
+            # bytes written without an index record (after a crash) are skipped, not overwritten
+            self.pack_sizes[pack_id] = os.fstat(self._pack_file.fileno()).st_size
+        return pack_id
+
+    def __getitem__(self, path: str):
+        """Gets the object present at the path.
+
+        Example:
+            pack_provider = PackProvider("/home/ubuntu/datasets/mnist")
+            my_data = pack_provider["abc.txt"]
+
+        Args:
+            path (str): The path relative to the root of the provider.
+
+        Returns:
+            Union[bytes, memoryview]: The bytes of the object present at the path.
+
+        Raises:
+            KeyError: If an object is not found at the path.
+        """
+        pack_id, start, length = self.index[path]
+        if not self.use_mmap:
+            with open(self._pack_path(pack_id), "rb") as f:
+                f.seek(start)
+                return f.read(length)
+
+        if length == 0:
+            return b""
+        return memoryview(self._map(pack_id, start + length))[start : start + length]
+
+    def _map(self, pack_id: int, min_size: int) -> mmap.mmap:
+        """Returns a memory map of the pack, remapping it if the pack grew since it was mapped."""
+        mapped = self._maps.get(pack_id)
+        if mapped is None or len(mapped) < min_size:
+            with open(self._pack_path(pack_id), "rb") as f:
+                # old maps are not closed, memoryviews handed out earlier may still reference them
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[pack_id] = mapped
+        return mapped
+
+    def __setitem__(self, path: str, value: bytes):
+        """Sets the object present at the path with the value
+
+        Example:
+            pack_provider = PackProvider("/home/ubuntu/datasets/mnist")
+            pack_provider["abc.txt"] = b"abcd"
+
+        Args:
+            path (str): the path relative to the root of the provider.
+            value (bytes): the value to be assigned at the path.
+
+        Raises:
+            ReadOnlyError: If the provider is in read-only mode.
+        """
+        self.check_readonly()
+        num_bytes = len(value)
+        with self._lock:
+            pack_id = self._current_pack(num_bytes)
+            start = self.pack_sizes[pack_id]
+            self._pack_file.write(value)  # type: ignore
+            self._pack_file.flush()  # type: ignore
+            self.pack_sizes[pack_id] = start + num_bytes
+
+            location = (pack_id, start, num_bytes)
+            self._append_record(_PUT, path, location)
+            old = self.index.get(path)
+            if old is not None:
+                self.dead_bytes += old[2]
+            self.index[path] = location
+
+    def __delitem__(self, path: str):
+        """Delete the object present at the path.
+
+        Example:
+            pack_provider = PackProvider("/home/ubuntu/datasets/mnist")
+            del pack_provider["abc.txt"]
+
+        Args:
+            path (str): the path to the object relative to the root of the provider.
+
+        Raises:
+            KeyError: If an object is not found at the path.
+            ReadOnlyError: If the provider is in read-only mode.
+        """
+        self.check_readonly()
+        with self._lock:
+            _, _, length = self.index.pop(path)
+            self._append_record(_DELETE, path)
+            self.dead_bytes += length
+
+    def __iter__(self):
+        """Generator function that iterates over the keys of the provider.
+
+        Yields:
+            str: the path of the object that it is iterating over, relative to the root of the provider.
+        """
+        yield from list(self.index)
+
+    def __len__(self):
+        """Returns the number of objects present inside the provider.
+
+        Returns:
+            int: the number of objects present inside the provider.
+        """
+        return len(self.index)
+
+    def __contains__(self, path):
+        return path in self.index
+
+    def _all_keys(self):
+        """Lists all the objects present in the provider.
+
+        Returns:
+            set: set of all the objects found in the provider.
+        """
+        return set(self.index)
+
+    @property
+    def nbytes(self) -> int:
+        """Returns the number of bytes of all pack files, including bytes of overwritten or deleted objects."""
+        return sum(self.pack_sizes.values())
+
+    def compact(self):
+        """Rewrites the pack files without the bytes of overwritten and deleted objects, and rewrites the index log
+        so it holds a single record per live key.
+
+        Raises:
+            ReadOnlyError: If the provider is in read-only mode.
+        """
+        self.check_readonly()
+        with self._lock:
+            old_pack_ids = list(self.pack_sizes)
+            first_pack_id = max(old_pack_ids, default=-1) + 1
+
+            pack_id, pack_size = first_pack_id, 0
+            new_index: Dict[str, Tuple[int, int, int]] = {}
+            new_sizes: Dict[int, int] = {}
+            log = bytearray()
+            os.makedirs(self._full_root, exist_ok=True)
+            pack = open(self._pack_path(pack_id), "wb")
+            try:
+                # copy objects pack by pack, in the order they were written
+                for key, (old_id, start, length) in sorted(
+                    self.index.items(), key=lambda item: item[1]
+                ):
+                    if pack_size > 0 and pack_size + length > self.max_pack_size:
+                        pack.close()
+                        new_sizes[pack_id] = pack_size
+                        pack_id, pack_size = pack_id + 1, 0
+                        pack = open(self._pack_path(pack_id), "wb")
+
+                    pack.write(self._read_location(old_id, start, length))
+                    location = (pack_id, pack_size, length)
+                    new_index[key] = location
+                    encoded = key.encode("utf-8")
+                    log += _RECORD.pack(_PUT, *location, len(encoded)) + encoded
+                    pack_size += length
+            finally:
+                pack.close()
+            new_sizes[pack_id] = pack_size
+
+            temp_index_path = f"{self._index_path}.tmp"
+            with open(temp_index_path, "wb") as f:
+                f.write(log)
+            self._close_files()
+            os.replace(temp_index_path, self._index_path)
+
+            for old_id in old_pack_ids:
+                os.remove(self._pack_path(old_id))
+
+            self.index = new_index
+            self.pack_sizes = new_sizes
+            self.dead_bytes = 0
+            self._maps = {}
+
+    def _read_location(self, pack_id: int, start: int, length: int) -> bytes:
+        with open(self._pack_path(pack_id), "rb") as f:
+            f.seek(start)
+            return f.read(length)
+
+    def _close_files(self):
+        for f in (self._pack_file, self._log_file):
+            if f is not None:
+                f.close()
+        self._pack_file = None
+        self._log_file = None
+
+    def flush(self):
+        """Pack and index writes are flushed as they happen, this only closes the open file handles."""
+        self._close_files()
+
+    def clear(self):
+        """Deletes ALL data of the provider (under self.root). Exercise caution!"""
+        self.check_readonly()
+        with self._lock:
+            self._close_files()
+            full_path = self._full_root
+            if os.path.exists(full_path):
+                shutil.rmtree(full_path)
+            self.index = {}
+            self.pack_sizes = {}
+            self.dead_bytes = 0
+            self._maps = {}
+
+    def __getstate__(self) -> Dict[str, Union[str, int, bool]]:
+        return {
+            "root": self.root,
+            "max_pack_size": self.max_pack_size,
+            "use_mmap": self.use_mmap,
+            "read_only": self.read_only,
+        }
+
+    def __setstate__(self, state: Dict[str, Union[str, int, bool]]):
+        read_only = state.pop("read_only")
+        self.__dict__.update(state)
+        self._initialize()
+        if read_only:
+            self.enable_readonly()
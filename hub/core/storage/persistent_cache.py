@@ -0,0 +1,452 @@
+import os
+import time
+import sqlite3
+import hashlib
+import posixpath
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from hub.constants import PERSISTENT_CACHE_INDEX_FILENAME, PERSISTENT_CACHE_ROOT
+from hub.core.storage.cachable import Cachable
+from hub.core.storage.eviction import get_eviction_policy
+from hub.core.storage.local import LocalProvider
+from hub.core.storage.lru_cache import LRUCache
+from hub.core.storage.provider import StorageProvider
+from hub.util.keys import (
+    get_chunk_id_encoder_key,
+    get_tensor_meta_key,
+    is_chunk_key,
+)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    generation TEXT NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE INDEX IF NOT EXISTS entries_digest ON entries (digest);
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL
+);
+"""
+
+# number of hits whose access time is buffered in memory before being written to the index
+_ACCESS_BATCH_SIZE = 256
+_EVICTION_BATCH_SIZE = 64
+
+
+def _digest(buffer) -> str:
+    return hashlib.blake2b(buffer, digest_size=16).hexdigest()
+
+
+class PersistentCache(LRUCache):
+    """Local disk cache for chunks that survives process restarts and is shared by all processes on a machine."""
+
+    next_storage: StorageProvider
+
+    def __init__(
+        self,
+        next_storage: StorageProvider,
+        cache_size: int,
+        namespace: str,
+        root: str = PERSISTENT_CACHE_ROOT,
+    ):
+        """Initializes the PersistentCache.
+
+        Chunks read from `next_storage` are stored under `root`, content addressed by a digest of their bytes, so
+        identical chunks are stored once. An sqlite index (`PERSISTENT_CACHE_INDEX_FILENAME`) maps `(namespace, key)`
+        to the digest, along with the last access time used for LRU eviction and the generation of the tensor the
+        chunk was read for.
+
+        A tensor's generation is a digest of its chunk id encoder and tensor meta, read from `next_storage` the first
+        time one of its chunks is requested. Appending to a tensor changes both, so chunks cached for an older
+        version of a tensor are never served.
+
+        Only chunks are cached. Metadata is always read from `next_storage`, and writes are passed through to it
+        (dropping any cached copy), so this cache never holds data that isn't persisted.
+
+        Note:
+            `cache_size` bounds the whole cache directory, which is shared by every dataset and process using the
+            same `root`. Concurrent processes are coordinated through sqlite transactions and atomic file renames.
+
+        Args:
+            next_storage (StorageProvider): The storage chunks are read from on a miss.
+            cache_size (int): Maximum number of bytes stored under `root`, across all namespaces.
+            namespace (str): Identifies the dataset, usually its path.
+            root (str): The directory of the cache.
+        """
+        self.next_storage = next_storage
+        self.cache_size = cache_size
+        self.namespace = namespace
+        self.root = root
+        self._initialize()
+
+    def _initialize(self):
+        self.cache_storage = LocalProvider(posixpath.join(self.root, "objects"))
+        # state inherited from `LRUCache`. Cached chunks are tracked by the sqlite index, so `lru_sizes` stays empty,
+        # and writes go straight to the next storage, so no key is ever dirty.
+        self.eviction_policy = "lru"
+        self.lru_sizes = get_eviction_policy(self.eviction_policy)
+        self.dirty_keys: Set[str] = set()
+        self.generations: Dict[str, str] = {}
+        self._pending_accesses: Dict[str, float] = {}
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid = os.getpid()
+        self._lock = threading.RLock()
+        self._reset_stats()
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        # sqlite connections must not be shared with forked processes
+        if self._connection is None or self._pid != os.getpid():
+            root = os.path.expanduser(self.root)
+            os.makedirs(root, exist_ok=True)
+            self._connection = sqlite3.connect(
+                os.path.join(root, PERSISTENT_CACHE_INDEX_FILENAME),
+                timeout=60,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            self._connection.executescript(_SCHEMA)
+            self._pid = os.getpid()
+        return self._connection
+
+    def _transaction(self, statements: List[Tuple[str, Any]]):
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            for sql, params in statements:
+                db.execute(sql, params)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    @property
+    def cache_used(self) -> int:  # type: ignore
+        with self._lock:
+            (used,) = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM blobs"
+            ).fetchone()
+        return used
+
+    def _generation(self, tensor_key: str) -> str:
+        generation = self.generations.get(tensor_key)
+        if generation is None:
+            parts = []
+            for key in (
+                get_chunk_id_encoder_key(tensor_key),
+                get_tensor_meta_key(tensor_key),
+            ):
+                try:
+                    parts.append(_digest(self.next_storage[key]))
+                except KeyError:
+                    parts.append("")
+            generation = _digest(":".join(parts).encode())
+            self.generations[tensor_key] = generation
+        return generation
+
+    def __getitem__(self, path: str):
+        """Reads a chunk from the disk cache if a valid copy is cached, else from the next storage. Chunks read from
+        the next storage are added to the cache. Keys that aren't chunks are always read from the next storage.
+
+        Args:
+            path (str): The path relative to the root of the dataset.
+
+        Returns:
+            bytes: The bytes of the object present at the path.
+
+        Raises:
+            KeyError: If an object is not found at the path.
+        """
+        if not is_chunk_key(path):
+            return self.next_storage[path]
+
+        generation, digest = self._lookup(path)
+        if digest is not None:
+            try:
+                value = self.cache_storage[_blob_key(digest)]
+            except KeyError:
+                # evicted by another process since the index was read
+                value = None
+            if value is not None:
+                self.hits += 1
+                self._record_access(path)
+                return value
+
+        self.misses += 1
+        value = self.next_storage[path]
+        if len(value) <= self.cache_size:
+            self._insert(path, value, generation)
+        return value
+
+    def get_bytes(
+        self,
+        path: str,
+        start_byte: Optional[int] = None,
+        end_byte: Optional[int] = None,
+    ):
+        """Reads a byte range of an object, from the disk cache if a valid copy of the chunk is cached, else from the
+        next storage. Unlike `__getitem__`, a miss doesn't read the whole chunk to cache it.
+
+        Args:
+            path (str): The path relative to the root of the dataset.
+            start_byte (int, optional): If only specific bytes starting from start_byte are required.
+            end_byte (int, optional): If only specific bytes up to end_byte are required.
+
+        Returns:
+            bytes: The bytes of the object present at the path within the given byte range.
+
+        Raises:
+            KeyError: If an object is not found at the path.
+        """
+        if is_chunk_key(path):
+            _, digest = self._lookup(path)
+            if digest is not None:
+                try:
+                    value = self.cache_storage.get_bytes(
+                        _blob_key(digest), start_byte, end_byte
+                    )
+                    self.hits += 1
+                    self._record_access(path)
+                    return value
+                except KeyError:
+                    pass
+        return self.next_storage.get_bytes(path, start_byte, end_byte)
+
+    def _lookup(self, path: str) -> Tuple[str, Optional[str]]:
+        """Returns the current generation of the tensor of a chunk, and the digest of the chunk if a copy of it is
+        cached for that generation."""
+        tensor_key = posixpath.dirname(posixpath.dirname(path))
+        generation = self._generation(tensor_key)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT digest, generation FROM entries WHERE namespace = ? AND key = ?",
+                (self.namespace, path),
+            ).fetchone()
+        if row is not None and row[1] == generation:
+            return generation, row[0]
+        return generation, None
+
+    def _record_access(self, path: str):
+        with self._lock:
+            self._pending_accesses[path] = time.time()
+            if len(self._pending_accesses) >= _ACCESS_BATCH_SIZE:
+                self._write_accesses()
+
+    def _write_accesses(self):
+        if self._pending_accesses:
+            self._transaction(
+                [
+                    (
+                        "UPDATE entries SET last_access = ? WHERE namespace = ? AND key = ?",
+                        (last_access, self.namespace, path),
+                    )
+                    for path, last_access in self._pending_accesses.items()
+                ]
+            )
+            self._pending_accesses.clear()
+
+    def _insert(self, path: str, value: Union[bytes, memoryview], generation: str):
+        digest = _digest(value)
+        blob_key = _blob_key(digest)
+        with self._lock:
+            # the blob is written (atomically) before it is referenced by the index
+            self.cache_storage[blob_key] = value
+            self._transaction(
+                [
+                    (
+                        "INSERT OR IGNORE INTO blobs (digest, size) VALUES (?, ?)",
+                        (digest, len(value)),
+                    ),
+                    (
+                        "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                        (self.namespace, path, digest, generation, time.time()),
+                    ),
+                ]
+            )
+            self._free_up_space(0)
+
+    def _free_up_space(self, extra_size: int):
+        """Evicts the least recently used entries, across all namespaces, until the cache fits in `cache_size`."""
+        with self._lock:
+            # the total is read once and reduced by what is evicted here. Blobs inserted concurrently by other
+            # processes are accounted for by the eviction that follows their own insert.
+            used = self.cache_used
+            while used + extra_size > self.cache_size:
+                freed = self._evict_batch()
+                if freed is None:
+                    break
+                used -= freed
+
+    def _evict_batch(self) -> Optional[int]:
+        """Evicts a batch of the least recently used entries. Returns the number of bytes freed, or None if there was
+        nothing left to evict."""
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            rows = db.execute(
+                "SELECT namespace, key, digest FROM entries ORDER BY last_access LIMIT ?",
+                (_EVICTION_BATCH_SIZE,),
+            ).fetchall()
+            db.executemany(
+                "DELETE FROM entries WHERE namespace = ? AND key = ?",
+                [row[:2] for row in rows],
+            )
+            orphans = self._orphan_digests()
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        self.evictions += len(rows)
+        self._remove_blobs(orphans)
+        if not rows and not orphans:
+            return None
+        return sum(orphans.values())
+
+    def _orphan_digests(self) -> Dict[str, int]:
+        """Deletes the blobs that are no longer referenced and returns their sizes by digest. Must be called inside a
+        transaction."""
+        orphans = dict(
+            self._db.execute(
+                "SELECT digest, size FROM blobs WHERE digest NOT IN (SELECT digest FROM entries)"
+            ).fetchall()
+        )
+        self._db.executemany(
+            "DELETE FROM blobs WHERE digest = ?", [(digest,) for digest in orphans]
+        )
+        return orphans
+
+    def _remove_blobs(self, digests: Iterable[str]):
+        for digest in digests:
+            try:
+                del self.cache_storage[_blob_key(digest)]
+            except KeyError:
+                pass
+
+    def _drop(self, path: str):
+        with self._lock:
+            self._pending_accesses.pop(path, None)
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute(
+                    "DELETE FROM entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, path),
+                )
+                orphans = self._orphan_digests()
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            self._remove_blobs(orphans)
+
+    def __setitem__(self, path: str, value: Union[bytes, Cachable]):
+        """Writes the value to the next storage and drops the cached copy of `path`, if any.
+
+        Args:
+            path (str): The path relative to the root of the dataset.
+            value (bytes, Cachable): The value to be written.
+
+        Raises:
+            ReadOnlyError: If the provider is in read-only mode.
+        """
+        self.check_readonly()
+        if isinstance(value, Cachable):
+            value = value.tobytes()
+        self.next_storage[path] = value
+        if is_chunk_key(path):
+            self._drop(path)
+        else:
+            # an encoder or meta may have changed, chunks cached from now on belong to the next generation of a tensor
+            self.generations.clear()
+        self.maybe_flush()
+
+    def __delitem__(self, path: str):
+        """Deletes the object at `path` from the next storage and the cache.
+
+        Args:
+            path (str): The path relative to the root of the dataset.
+
+        Raises:
+            KeyError: If an object is not found at the path.
+            ReadOnlyError: If the provider is in read-only mode.
+        """
+        self.check_readonly()
+        if is_chunk_key(path):
+            self._drop(path)
+        del self.next_storage[path]
+        self.maybe_flush()
+
+    def get_cachable(self, path: str, expected_class):
+        return expected_class.frombuffer(self[path])
+
+    def flush(self):
+        """Writes buffered access times to the index, and flushes the next storage."""
+        with self._lock:
+            self._write_accesses()
+        self.next_storage.flush()
+
+    def clear_cache(self):
+        """Removes all cached chunks of this namespace. Other datasets sharing the cache directory are unaffected."""
+        with self._lock:
+            self._pending_accesses.clear()
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute("DELETE FROM entries WHERE namespace = ?", (self.namespace,))
+                orphans = self._orphan_digests()
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            self._remove_blobs(orphans)
+            self.generations.clear()
+
+        if hasattr(self.next_storage, "clear_cache"):
+            self.next_storage.clear_cache()
+
+    def clear(self):
+        """Deletes ALL the data from the cache (for this namespace) and the underlying storage.
+        This is an IRREVERSIBLE operation. Data once deleted can not be recovered.
+        """
+        self.check_readonly()
+        self.clear_cache()
+        self.next_storage.clear()
+
+    def _all_keys(self):
+        return self.next_storage._all_keys()
+
+    def _tier_stats(self) -> Dict[str, Any]:
+        return {
+            "policy": "persistent-lru",
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hit_ratio,
+            "used": self.cache_used,
+            "size": self.cache_size,
+        }
+
+    def __getstate__(self) -> Dict[str, Any]:
+        self.flush()
+        return {
+            "next_storage": self.next_storage,
+            "cache_size": self.cache_size,
+            "namespace": self.namespace,
+            "root": self.root,
+        }
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._initialize()
+
+
+def _blob_key(digest: str) -> str:
+    return posixpath.join(digest[:2], digest)
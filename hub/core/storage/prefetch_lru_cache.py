@@ -1,35 +1,107 @@
+import os
+import pickle
 import warnings
 import numpy as np
-from itertools import repeat
+from collections import deque
 from pathos.pools import ProcessPool  # type: ignore
-from typing import Callable, Dict, Optional, Sequence, Tuple, Union, List, Set
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    List,
+    Set,
+)
 
-from hub.constants import EMERGENCY_STORAGE_PATH, MB
+from hub.constants import (
+    EMERGENCY_STORAGE_PATH,
+    ENCODING_DTYPE,
+    MB,
+    SHARED_MEMORY_ARENA_MAX_SIZE,
+)
 from hub.core.chunk import Chunk
 from hub.core.chunk_engine import ChunkEngine
+from hub.core.meta.encode.chunk_id import (
+    CHUNK_ID_COLUMN,
+    LAST_SEEN_INDEX_COLUMN,
+    ChunkIdEncoder,
+)
 from hub.core.storage import (
-    S3Provider,
     LRUCache,
     StorageProvider,
     MemoryProvider,
+    SharedMemoryArena,
     SharedMemoryProvider,
     LocalProvider,
 )
+from hub.core.storage.memory_budget import get_memory_budget
 from hub.util.exceptions import (
     DatasetUnsupportedSharedMemoryCache,
     SampleDecompressionError,
     TensorDoesNotExistError,
 )
 from hub.util.remove_cache import get_base_storage
-from hub.util.prefetch_cache import read_and_store_chunk_group
+from hub.util.bucketing import ShapeBucketBatchSampler
+from hub.util.prefetch_cache import (
+    get_pytorch_dtype,
+    read_and_store_chunk_group,
+    to_pytorch,
+    transform_and_store_samples,
+)
 from hub.util.iterable_ordered_dict import IterableOrderedDict
 
 
+# the pools of workers that fetch chunks for the prefetch caches, by number of workers. Pools are shared by all the caches
+# of the process, and are kept alive across epochs and data loaders until `close_worker_pools` is called, so that
+# starting an iteration doesn't pay for starting processes
+_worker_pools: Dict[int, ProcessPool] = {}
+
+
+def get_worker_pool(num_workers: int) -> ProcessPool:
+    """Returns the pool of `num_workers` workers of the prefetch caches, starting it if it isn't running."""
+    pool = _worker_pools.get(num_workers)
+    if pool is None:
+        pool = ProcessPool(nodes=num_workers, id=f"hub_prefetch_{num_workers}")
+        _worker_pools[num_workers] = pool
+    return pool
+
+
+def close_worker_pools():
+    """Shuts down the worker processes of the prefetch caches. Caches that are iterated over afterwards start new ones."""
+    for pool in _worker_pools.values():
+        pool.clear()
+    _worker_pools.clear()
+
+
+class _FinishedTask:
+    """The result of a task that ran in the calling process, with the interface of the results of a pool."""
+
+    def __init__(self, result):
+        self.result = result
+
+    def ready(self) -> bool:
+        return True
+
+    def wait(self, timeout: Optional[float] = None):
+        pass
+
+    def get(self):
+        return self.result
+
+
 # TODO: fetching from local cache happens on the main thread, this needs to be improved
-# TODO: transforms are performed on the main thread, this needs to be improved
 class PrefetchLRUCache(LRUCache):
     """Creates a cache that fetches multiple chunks parallelly."""
 
+    cache_storage: SharedMemoryProvider
+
+    # whether samples are yielded in the order of their indexes, even if the chunks of later indexes land first
+    preserve_order = True
+
     def __init__(
         self,
         cache_storage: SharedMemoryProvider,
@@ -40,16 +112,40 @@ class PrefetchLRUCache(LRUCache):
         tensor_keys: Optional[Sequence[str]],
         transform: Optional[Callable],
         mode: Optional[str] = None,
+        decode_in_workers: bool = False,
+        transform_in_workers: bool = False,
+        world_size: int = 1,
+        rank: int = 0,
+        shard_seed: int = 0,
+        bucket_sampler: Optional[ShapeBucketBatchSampler] = None,
+        loader_workers: int = 1,
+        loader_worker: int = 0,
     ):
         super().__init__(cache_storage, next_storage, cache_size)
+        if not 0 <= rank < world_size:
+            raise ValueError(
+                f"rank should be in [0, world_size), got rank={rank} and world_size={world_size}."
+            )
+        if not 0 <= loader_worker < loader_workers:
+            raise ValueError(
+                f"loader_worker should be in [0, loader_workers), got loader_worker={loader_worker} and loader_workers={loader_workers}."
+            )
         self.mode = mode
         self.transform = transform
         self.all_indexes = self._extract_indexes_from_dataset(dataset)
         self.tensor_keys = self._get_tensor_keys(tensor_keys, dataset)
+        # with no workers, chunks are fetched and samples transformed in this process, see `_run_task`. Otherwise the
+        # workers are started right away, unless they are already running
         self.workers = num_workers
-        self.map = ProcessPool(nodes=num_workers).map
+        if num_workers > 0:
+            get_worker_pool(num_workers)
+
+        # chunk groups fetched at the same time. Twice the number of workers, so that the workers are fetching the next
+        # groups while the samples of the groups that have landed are consumed
+        self.max_inflight_groups = max(2 * num_workers, 1)
 
-        # shared memory file names have format "al_{x}" where x is last_shm_key_generated, which is incremented by 1 every time
+        # shared memory file names have format "al_{pid}_{x}" where x is last_shm_key_generated, which is incremented by 1 every time.
+        # The pid keeps the names of caches in different processes (ranks or DataLoader workers) apart
         self.last_shm_key_generated = -1
 
         # keeps track of the last index suggested from all_indexes, incremented by 1 every time to return sequential indexes
@@ -61,8 +157,12 @@ class PrefetchLRUCache(LRUCache):
             raise DatasetUnsupportedSharedMemoryCache(
                 "The underlying storage is MemoryProvider which isn't supported."
             )
-        elif isinstance(self.storage, S3Provider):
-            self.storage_state_tuple = self.storage.__getstate__()
+
+        # the storage is pickled once, and unpickled once by every worker, which keeps it open. See `get_worker_storage`
+        try:
+            self.pickled_storage: Optional[bytes] = pickle.dumps(self.storage)
+        except Exception:
+            self.pickled_storage = None
 
         # map from tuple (tensor, chunk_name) to shared_memory_key
         self.chunk_shared_mem_map: Dict[tuple, str] = {}
@@ -70,18 +170,82 @@ class PrefetchLRUCache(LRUCache):
         # map from shared_memory_key to (tensor, chunk_name)
         self.shared_mem_chunk_map: Dict[str, tuple] = {}
 
-        # map from each index to a dictionary having tensors as keys and chunk_names as values
-        self.index_chunk_names_map: Dict[int, Dict[str, List[str]]] = {}
-
         self.all_chunk_engines: Dict[str, ChunkEngine] = self._load_all_chunk_engines()
 
-        # chunks that are needed for the current index, these should not be removed from cache. If cache is too small and next storage doesn't exist, it sends to emergency storage
-        self.required_chunks: Set[tuple] = set()
+        # for each tensor, the ids of its chunks and the last index stored in each of them, copied from the chunk id
+        # encoder. Chunk names of an index are looked up in these, so the bookkeeping is proportional to the number of chunks
+        self.chunk_ids: Dict[str, np.ndarray] = {}
+        self.chunk_last_indexes: Dict[str, np.ndarray] = {}
+        self._load_chunk_arrays()
+
+        # with more than one rank, all_indexes only holds the indexes of this rank's shard, which changes every epoch.
+        # With DataLoader workers, the shard of the rank is split again between them. See `_get_shard_indexes`
+        self.world_size = world_size
+        self.rank = rank
+        self.loader_workers = loader_workers
+        self.loader_worker = loader_worker
+        self.shard_seed = shard_seed
+        self.epoch = 0
+        # number of samples of the epoch that have been yielded, see `state_dict`
+        self.num_served = 0
+        self.dataset_indexes = self.all_indexes
+        # if set, indexes are ordered so that consecutive samples form batches of samples of similar shape, in a new
+        # order every epoch if the sampler shuffles. See `ShapeBucketBatchSampler.order`
+        self.bucket_sampler = bucket_sampler
+        if self._sharded or bucket_sampler is not None:
+            self.all_indexes = self._get_epoch_indexes(self.epoch)
+            self.length = len(self.all_indexes)
+
+        # dtype and compressions of the compressed tensors, whose chunks are decompressed by the workers if
+        # decode_in_workers is True. Names of the chunks that were decompressed are kept in decompressed_chunks
+        self.tensor_compressions = (
+            self._get_tensor_compressions() if decode_in_workers else None
+        )
+        self.decompressed_chunks: Set[str] = set()
+
+        # dtype and compressions of all the tensors, if samples are read and transformed by the workers rather than by
+        # the main process. The workers are sent batches of transform_batch_size samples
+        self.tensor_metas = (
+            self._get_tensor_compressions(compressed_only=False)
+            if transform_in_workers
+            else None
+        )
+        self.transform_batch_size = 16
+
+        # chunks are stored in a single shared memory arena, in slots that are reserved for them before they are
+        # fetched, as large as the largest chunk of their tensor. Chunks decompressed by the workers have no such bound,
+        # so they get a shared memory segment of their own, like the chunks that don't fit in the arena
+        if cache_storage.arena is None:
+            cache_storage.arena = SharedMemoryArena(
+                min(cache_size, SHARED_MEMORY_ARENA_MAX_SIZE)
+            )
+        self.chunk_slot_sizes = {
+            key: chunk_engine.max_chunk_size
+            for key, chunk_engine in self.all_chunk_engines.items()
+            if self.tensor_compressions is None or key not in self.tensor_compressions
+        }
+
+        # set by `iterate_batches`, which copies samples out of the chunks itself. The shared memory that the samples
+        # are views of is kept open, and the arena slots pinned, until they are copied. See `_release_views`
+        self._read_views = False
+        self._open_shared_memory: List[Any] = []
+        self._pinned_views: List[int] = []
+
+        # chunks that are needed by the indexes that haven't been yielded yet, with the number of such indexes for each.
+        # These should not be removed from cache. If cache is too small and next storage doesn't exist, they are sent to emergency storage
+        self.required_chunks: Dict[tuple, int] = {}
 
         self.emergency_storage = (
             LocalProvider(EMERGENCY_STORAGE_PATH) if self.next_storage is None else None
         )
 
+        # chunks fetched during the current iteration, or the last one once it is over. See `read_amplification`
+        self.num_chunk_fetches = 0
+        self.fetched_chunks: Set[Tuple[str, str]] = set()
+
+        # chunks held in shared memory count towards the memory budget of the process
+        get_memory_budget().register(self)
+
     def __getitem__(self, path):
         if path in self.lru_sizes:
             self.lru_sizes.move_to_end(path)  # refresh position for LRU
@@ -100,58 +264,387 @@ class PrefetchLRUCache(LRUCache):
             return result
 
     def iterate_samples(self):
-        """Iterates over the contents of the dataset and yields data indexwise."""
-        # chunk groups to be fetched, each inner list will be handled by a separate worker
-        chunk_groups_for_workers: List[List[Tuple[str, str]]] = []
+        """Iterates over the contents of the dataset and yields data indexwise.
+
+        Chunks are fetched by the workers in a continuous pipeline. The chunks missing for an index are submitted as soon
+        as the index is suggested, with at most `max_inflight_groups` groups in flight, and each sample is yielded as
+        soon as all of its chunks have landed, while the workers keep fetching the chunks of the following indexes.
+        """
+        # chunk groups being fetched by the workers, along with the pending result of each
+        inflight: Deque[Tuple[Any, List[Tuple[str, str]]]] = deque()
 
         # a set containing all chunks that are scheduled to be fetched
         scheduled_chunks: Set[Tuple[str, str]] = set()
 
-        # indexes that have been encountered but skipped due to data being unavailable
-        pending_indexes: List[int] = []
-        for i in range(self.length):
-            index = self._suggest_next_index()
-            chunk_names = self._get_chunk_names(index)
-            self.index_chunk_names_map[index] = chunk_names
+        # indexes that have been encountered but not yielded yet, along with the chunks they need
+        pending: Deque[Tuple[int, List[Tuple[str, str]]]] = deque()
+
+        # indexes whose chunks have all landed, to be read and transformed
+        ready: List[Tuple[int, List[Tuple[str, str]]]] = []
 
-            # chunks not found for the current index in cache for current index
-            missing_chunks = self._process_chunks_names_dict(chunk_names)
+        # batches of ready indexes being read and transformed by the workers, with the arena slots pinned for each.
+        # See `_yield_samples`
+        transforming: Deque[
+            Tuple[Any, List[Tuple[int, List[Tuple[str, str]]]], List[int]]
+        ] = deque()
+        self.num_chunk_fetches = 0
+        self.fetched_chunks.clear()
+        try:
+            for _ in range(self._num_remaining()):
+                index = self._suggest_next_index()
+                chunk_names = self._get_chunk_names(index)
+                chunks = self._require_chunks(chunk_names)
 
-            # chunks not found in cache for the current index and also not scheduled to be fetched by another worker
-            needed_chunks = self._get_chunks_needed(missing_chunks, scheduled_chunks)
+                # chunks not found for the current index in cache for current index
+                missing_chunks = self._process_chunks_names_dict(chunk_names)
 
-            if missing_chunks:
-                pending_indexes.append(index)
+                # chunks not found in cache for the current index and also not scheduled to be fetched by another worker
+                needed_chunks = self._get_chunks_needed(
+                    missing_chunks, scheduled_chunks
+                )
                 if needed_chunks:
-                    chunk_groups_for_workers.append(needed_chunks)
-                if len(chunk_groups_for_workers) == self.workers or i == len(self) - 1:
-                    yield from self._yield_pending(
-                        chunk_groups_for_workers, pending_indexes
-                    )
-                    scheduled_chunks.clear()
+                    while len(inflight) >= self.max_inflight_groups:
+                        self._collect_landed(inflight, scheduled_chunks, block=True)
+                    future = self._submit_chunk_group(needed_chunks)
+                    inflight.append((future, needed_chunks))
+
+                if missing_chunks or (pending and self.preserve_order):
+                    pending.append((index, chunks))
+                else:
+                    # no missing chunks, so the data can be yielded right away
+                    ready.append((index, chunks))
+
+                self._collect_landed(inflight, scheduled_chunks, block=False)
+                ready.extend(self._pop_ready(pending, scheduled_chunks))
+                yield from self._yield_samples(ready, transforming)
+
+            while pending:
+                self._collect_landed(inflight, scheduled_chunks, block=True)
+                ready.extend(self._pop_ready(pending, scheduled_chunks))
+                yield from self._yield_samples(ready, transforming, flush=True)
+            yield from self._yield_samples(ready, transforming, flush=True)
+            while transforming:
+                yield from self._collect_transformed(transforming, block=True)
+        finally:
+            # chunks still being written to shared memory need to be registered, so that they are cleared below
+            while inflight:
+                self._collect_landed(inflight, scheduled_chunks, block=True)
+            for future, _, pinned in transforming:
+                try:
+                    del self.cache_storage[future.get()]
+                except Exception:
+                    # the batch failed, so it didn't store anything
+                    pass
+                self._unpin(pinned)
+            self.required_chunks.clear()
+            if self.emergency_storage is not None:
+                self.emergency_storage.clear()
+            self._advance_epoch()
+            self.clear_cache()
+
+    def iterate_batches(self, batch_size: int, drop_last: bool = False):
+        """Iterates over the contents of the dataset and yields batches of `batch_size` samples, as IterableOrderedDicts
+        with a pytorch tensor for each tensor key. Transforms are not applied.
+
+        Samples of tensors that have a fixed shape are copied straight from the chunks into a tensor allocated for the
+        whole batch, and cast to a dtype that pytorch supports in the same copy. Samples of the other tensors are
+        converted one by one and stacked by the default collate function.
+        """
+        from torch.utils.data._utils.collate import default_collate
+
+        fixed_shapes = {}
+        for key in self.tensor_keys:
+            meta = self.all_chunk_engines[key].tensor_meta
+            if meta.min_shape == meta.max_shape:
+                fixed_shapes[key] = tuple(meta.max_shape)
+
+        batch: Optional[Dict[str, Any]] = None
+        num_samples = 0
+        self._read_views = True
+        try:
+            for sample in self.iterate_samples():
+                if sample is None:
+                    continue
+                if batch is None:
+                    batch = self._new_batch(batch_size, fixed_shapes)
+                self._add_to_batch(batch, num_samples, sample)
+                # the sample is a view of the shared memory, which can only be closed once the view is gone
+                del sample
+                self._release_views()
+                num_samples += 1
+                if num_samples == batch_size:
+                    yield self._finish_batch(batch, num_samples, default_collate)
+                    batch, num_samples = None, 0
+            if batch is not None and not drop_last:
+                yield self._finish_batch(batch, num_samples, default_collate)
+        finally:
+            self._read_views = False
+            self._release_views()
+
+    def _new_batch(
+        self, batch_size: int, fixed_shapes: Dict[str, Tuple[int, ...]]
+    ) -> Dict[str, Any]:
+        """Allocates a pytorch tensor for each tensor with a fixed shape, and a list for the samples of the others."""
+        import torch
+
+        batch: Dict[str, Any] = {}
+        for key in self.tensor_keys:
+            if key in fixed_shapes:
+                dtype = self.all_chunk_engines[key].tensor_meta.dtype
+                _, torch_dtype = get_pytorch_dtype(dtype)
+                batch[key] = torch.empty(
+                    (batch_size, *fixed_shapes[key]), dtype=torch_dtype
+                )
             else:
-                # no missing chunks, so we can just yield the data
-                yield self._get_final_output(index)
+                batch[key] = []
+        return batch
 
-        if pending_indexes:
-            yield from self._yield_pending(chunk_groups_for_workers, pending_indexes)
-            scheduled_chunks.clear()
+    def _add_to_batch(self, batch: Dict[str, Any], position: int, sample):
+        """Copies a sample into the batch at `position`."""
+        for key, value in sample.items():
+            buffer = batch[key]
+            if isinstance(buffer, list):
+                dtype = self.all_chunk_engines[key].tensor_meta.dtype
+                buffer.append(to_pytorch(value, dtype))
+            else:
+                # the numpy view shares memory with the batch tensor, and casting happens as part of the copy
+                np.copyto(buffer[position].numpy(), value, casting="unsafe")
 
-        self.clear_cache()
+    def _finish_batch(
+        self, batch: Dict[str, Any], num_samples: int, collate: Callable
+    ) -> IterableOrderedDict:
+        """Returns the first `num_samples` samples of the batch, collating the tensors that don't have a fixed shape."""
+        return IterableOrderedDict(
+            (key, collate(value) if isinstance(value, list) else value[:num_samples])
+            for key, value in batch.items()
+        )
 
-    def _yield_pending(
+    def _pop_ready(
         self,
-        chunk_groups_for_workers: List[List[Tuple[str, str]]],
-        pending_indexes: List[int],
+        pending: Deque[Tuple[int, List[Tuple[str, str]]]],
+        scheduled_chunks: Set[Tuple[str, str]],
+    ) -> List[Tuple[int, List[Tuple[str, str]]]]:
+        """Removes the pending indexes whose chunks have all landed from `pending`, and returns them.
+        If `preserve_order` is set, stops at the first index that is still waiting for a chunk."""
+        ready: List[Tuple[int, List[Tuple[str, str]]]] = []
+        waiting: List[Tuple[int, List[Tuple[str, str]]]] = []
+        if self.preserve_order:
+            while pending and scheduled_chunks.isdisjoint(pending[0][1]):
+                ready.append(pending.popleft())
+            return ready
+
+        for item in pending:
+            (ready if scheduled_chunks.isdisjoint(item[1]) else waiting).append(item)
+        pending.clear()
+        pending.extend(waiting)
+        return ready
+
+    def _yield_samples(
+        self,
+        ready: List[Tuple[int, List[Tuple[str, str]]]],
+        transforming: Deque[
+            Tuple[Any, List[Tuple[int, List[Tuple[str, str]]]], List[int]]
+        ],
+        flush: bool = False,
+    ):
+        """Yields data for the ready indexes, and empties `ready`.
+
+        If the samples are transformed in workers, the ready indexes are instead submitted to the workers once there
+        are `transform_batch_size` of them, or right away if `flush` is True, and the batches that the workers have
+        finished are yielded.
+        """
+        if self.tensor_metas is None:
+            for index, chunks in ready:
+                yield self._get_final_output_and_release(index, chunks)
+            ready.clear()
+            return
+
+        if ready and (flush or len(ready) >= self.transform_batch_size):
+            while len(transforming) >= self.max_inflight_groups:
+                yield from self._collect_transformed(transforming, block=True)
+            pinned: List[int] = []
+            future = self._submit_transform(ready, pinned)
+            transforming.append((future, list(ready), pinned))
+            ready.clear()
+        yield from self._collect_transformed(transforming, block=False)
+
+    def _submit_transform(
+        self, ready: List[Tuple[int, List[Tuple[str, str]]]], pinned: List[int]
+    ):
+        """Submits a batch of ready indexes to be read and transformed by a worker, see `transform_and_store_samples`.
+        The arena slots of the chunks of the batch are pinned until the batch is collected, and added to `pinned`."""
+        samples = []
+        slots: Dict[str, int] = {}
+        for index, chunks in ready:
+            locations = []
+            for tensor, chunk_name in chunks:
+                shm_name = self.chunk_shared_mem_map[(tensor, chunk_name)]
+                if shm_name not in slots and shm_name in self.cache_storage.files:
+                    offset = self.cache_storage.pin(shm_name)
+                    if offset is not None:
+                        slots[shm_name] = offset
+                        pinned.append(offset)
+                locations.append(
+                    (
+                        tensor,
+                        shm_name,
+                        self._get_local_index(tensor, index),
+                        shm_name in self.decompressed_chunks,
+                    )
+                )
+            samples.append((index, locations))
+
+        shared_memory_name = self._new_shared_memory_name()
+        fallback_storage = (
+            self.next_storage
+            if self.next_storage is not None
+            else self.emergency_storage
+        )
+        return self._run_task(
+            transform_and_store_samples,
+            samples,
+            self.tensor_metas,
+            fallback_storage,
+            self.transform,
+            self.mode,
+            shared_memory_name,
+            self.cache_storage.arena,
+            slots,
+        )
+
+    def _collect_transformed(
+        self,
+        transforming: Deque[
+            Tuple[Any, List[Tuple[int, List[Tuple[str, str]]]], List[int]]
+        ],
+        block: bool,
     ):
-        """Yields data for the indexes that are pending."""
-        self._fetch_and_store_required_data(chunk_groups_for_workers)
-        for index in pending_indexes:
-            yield self._get_final_output(index)
-        pending_indexes.clear()
-        self.required_chunks.clear()
-        if self.emergency_storage is not None:
-            self.emergency_storage.clear()
+        """Yields the samples of the batches that the workers have finished transforming. If `preserve_order` is set,
+        batches are yielded in the order they were submitted. If `block` is True, waits until at least one batch has
+        been yielded, unless none are being transformed."""
+        while transforming:
+            if self.preserve_order:
+                finished = [transforming[0]] if transforming[0][0].ready() else []
+            else:
+                finished = [item for item in transforming if item[0].ready()]
+            if not finished:
+                if not block:
+                    return
+                transforming[0][0].wait(0.01)
+                continue
+
+            for item in finished:
+                transforming.remove(item)
+                future, batch, pinned = item
+                self._unpin(pinned)
+                shared_memory_name = future.get()
+                self.cache_storage.update_files([shared_memory_name])
+                outputs = pickle.loads(self.cache_storage[shared_memory_name])
+                del self.cache_storage[shared_memory_name]
+                for (index, chunks), output in zip(batch, outputs):
+                    self._release_chunks(chunks)
+                    self._mark_served(index)
+                    yield output
+            block = False
+
+    def _get_final_output_and_release(self, index: int, chunks: List[Tuple[str, str]]):
+        """Returns the final output for the given index, after which its chunks are no longer required by it."""
+        output = self._get_final_output(index)
+        self._release_chunks(chunks)
+        self._mark_served(index)
+        return output
+
+    @property
+    def read_amplification(self) -> float:
+        """The number of times chunks were fetched during the current or last iteration, relative to the number of
+        distinct chunks fetched. 1.0 means that no chunk was fetched twice."""
+        if not self.fetched_chunks:
+            return 1.0
+        return self.num_chunk_fetches / len(self.fetched_chunks)
+
+    def _mark_served(self, index: int):
+        """Records that the sample at `index` has been yielded."""
+        self.num_served += 1
+
+    def _num_remaining(self) -> int:
+        """Returns the number of indexes that are left to suggest in the epoch."""
+        return self.length - self.last_index_suggested - 1
+
+    def state_dict(self) -> Dict[str, Any]:
+        """Returns the position of the iteration in the current epoch, to resume it from with `load_state_dict`.
+
+        The state holds the epoch and the seed that determine the indexes of this rank (see `_get_shard_indexes`), and
+        the number of samples of the epoch that have been yielded. Samples are yielded in order, so these are the first
+        samples of the epoch.
+        """
+        return {
+            "epoch": self.epoch,
+            "world_size": self.world_size,
+            "rank": self.rank,
+            "loader_workers": self.loader_workers,
+            "loader_worker": self.loader_worker,
+            "shard_seed": self.shard_seed,
+            "num_indexes": len(self.dataset_indexes),
+            "position": self.num_served,
+        }
+
+    def load_state_dict(self, state: Dict[str, Any]):
+        """Makes the next iteration resume the epoch of `state`, a state returned by `state_dict`, where it was. Indexes
+        that were already yielded are skipped without fetching their chunks.
+
+        Args:
+            state (Dict[str, Any]): The state to resume from.
+
+        Raises:
+            ValueError: If `state` was saved by a cache over different data, or with a different sharding.
+        """
+        for key in (
+            "world_size",
+            "rank",
+            "loader_workers",
+            "loader_worker",
+            "shard_seed",
+        ):
+            if state[key] != getattr(self, key):
+                raise ValueError(
+                    f"The state was saved with {key}={state[key]}, but the data loader has {key}={getattr(self, key)}."
+                )
+        if state["num_indexes"] != len(self.dataset_indexes):
+            raise ValueError(
+                f"The state was saved for {state['num_indexes']} samples, but the dataset has {len(self.dataset_indexes)}."
+            )
+        self.set_epoch(state["epoch"])
+        self.num_served = state["position"]
+        self.last_index_suggested = self.num_served - 1
+
+    def _require_chunks(
+        self, chunk_names_dict: Dict[str, List[str]]
+    ) -> List[Tuple[str, str]]:
+        """Marks the chunks of an index as required until the index is yielded, so that they are kept in emergency
+        storage if they are evicted before that. Returns the chunks."""
+        chunks = [
+            (tensor, chunk_name)
+            for tensor, chunk_names in chunk_names_dict.items()
+            for chunk_name in chunk_names
+        ]
+        for chunk in chunks:
+            self.required_chunks[chunk] = self.required_chunks.get(chunk, 0) + 1
+        return chunks
+
+    def _release_chunks(self, chunks: List[Tuple[str, str]]):
+        """Undoes `_require_chunks`. Chunks that are no longer required by any index are dropped from emergency storage."""
+        for chunk in chunks:
+            count = self.required_chunks[chunk] - 1
+            if count:
+                self.required_chunks[chunk] = count
+                continue
+            del self.required_chunks[chunk]
+            shm_name = self.chunk_shared_mem_map.get(chunk)
+            if self.emergency_storage is not None and shm_name is not None:
+                try:
+                    del self.emergency_storage[shm_name]
+                except KeyError:
+                    pass
 
     def _get_chunks_needed(
         self,
@@ -184,23 +677,23 @@ class PrefetchLRUCache(LRUCache):
     def _get_all_chunks_start_end_index(self) -> Dict[str, Dict[str, Tuple[int, int]]]:
         """Gets the start and end indexes present in each chunk across all tensors."""
         all_tensors_mapping = {}
-        for tensor, chunk_engine in self.all_chunk_engines.items():
-            array = chunk_engine.chunk_id_encoder.array
-            current_tensor_mapping = {}
-            start_index = 0
-            for item in array:
-                chunk_id = item[0]
-                chunk_name = chunk_engine.chunk_id_encoder.name_from_id(chunk_id)
-                end_index = item[1]
-                current_tensor_mapping[chunk_name] = (start_index, end_index)
-                start_index = end_index + 1
-            all_tensors_mapping[tensor] = current_tensor_mapping
+        for tensor, last_indexes in self.chunk_last_indexes.items():
+            start_indexes = np.empty_like(last_indexes)
+            start_indexes[:1] = 0
+            start_indexes[1:] = last_indexes[:-1] + 1
+            names = map(ChunkIdEncoder.name_from_id, self.chunk_ids[tensor].tolist())
+            all_tensors_mapping[tensor] = {
+                name: (start, end)
+                for name, start, end in zip(
+                    names, start_indexes.tolist(), last_indexes.tolist()
+                )
+            }
         return all_tensors_mapping
 
     def _suggest_next_index(self) -> int:
         """Suggests the next index to return data from, in prefetch cache this always goes sequentially over all_indexes"""
         self.last_index_suggested += 1
-        return self.all_indexes[self.last_index_suggested]
+        return int(self.all_indexes[self.last_index_suggested])
 
     def _get_tensor_keys(
         self, tensor_keys: Optional[Sequence[str]], dataset
@@ -215,42 +708,33 @@ class PrefetchLRUCache(LRUCache):
             tensor_keys = list(tensor_keys)
         return tensor_keys
 
-    def _extract_indexes_from_dataset(self, dataset):
-        """Returns a list of all the indexes in the dataset."""
+    def _extract_indexes_from_dataset(self, dataset) -> np.ndarray:
+        """Returns an array of all the indexes in the dataset."""
         tensor_lengths = [len(tensor) for tensor in dataset.tensors.values()]
         length = min(tensor_lengths, default=0)
-        return list(dataset.index.values[0].indices(length))
+        return dataset.index.values[0].numpy(length)
 
     def _update_cache_insertion(self, chunk_sizes_dict: Dict[str, int]):
         """Updates the cache after chunks are inserted into it across processes."""
         for key, chunk_size in chunk_sizes_dict.items():
-            tensor, chunk_name = self.shared_mem_chunk_map[key]
             self._free_up_space(chunk_size)
             if self.cache_size - self.cache_used >= chunk_size:
                 self.update_used_cache_for_path(key, chunk_size)
                 self.dirty_keys.add(key)
-                self.required_chunks.add((tensor, chunk_name))
-                if hasattr(self, "_update_count_dicts_insertion"):
-                    self._update_count_dicts_insertion(tensor, chunk_name)  # type: ignore
             elif self.next_storage is not None:
                 self.next_storage[key] = self.cache_storage[key]
                 del self.cache_storage[key]
-                if hasattr(self, "_update_count_dicts_insertion"):
-                    self._update_count_dicts_insertion(tensor, chunk_name)  # type: ignore
             elif self.emergency_storage is not None:
                 self.emergency_storage[key] = self.cache_storage[key]
                 del self.cache_storage[key]
-                # we don't update counts when putting data in emergency storage as it well get cleared
 
     def _get_chunk_names(self, index) -> Dict[str, List[str]]:
         """Returns names of all chunks across tensors that have this index"""
-        if index in self.index_chunk_names_map:
-            return self.index_chunk_names_map[index]
         chunk_names: Dict[str, List[str]] = {}
         for key in self.tensor_keys:
-            chunk_engine = self.all_chunk_engines[key]
-            names = chunk_engine.get_chunk_names_for_index(index)
-            chunk_names[key] = names
+            # TODO: update this once we support samples that span across multiple chunks
+            row = np.searchsorted(self.chunk_last_indexes[key], index)
+            chunk_names[key] = [ChunkIdEncoder.name_from_id(self.chunk_ids[key][row])]
         return chunk_names
 
     def _load_all_chunk_engines(self):
@@ -259,17 +743,166 @@ class PrefetchLRUCache(LRUCache):
         cache = LRUCache(MemoryProvider(), self.storage, 32 * MB)
         return {key: ChunkEngine(key, cache) for key in self.tensor_keys}
 
-    def _numpy_from_chunks(self, index: int, key: str, chunks: List[Chunk]):
-        """Takes a list of chunks and returns a numpy array from it"""
+    def _get_tensor_compressions(
+        self, compressed_only: bool = True
+    ) -> Dict[str, Tuple[str, Optional[str], Optional[str]]]:
+        """Returns the dtype, sample compression and chunk compression of each tensor, or of each compressed tensor if
+        `compressed_only` is True."""
+        tensor_compressions = {}
+        for key, chunk_engine in self.all_chunk_engines.items():
+            meta = chunk_engine.tensor_meta
+            if not compressed_only or meta.sample_compression or meta.chunk_compression:
+                tensor_compressions[key] = (
+                    meta.dtype,
+                    meta.sample_compression,
+                    meta.chunk_compression,
+                )
+        return tensor_compressions
+
+    def _run_task(self, fn: Callable, *args):
+        """Runs `fn` in a worker of the pool and returns its pending result, or runs it right away if there are no
+        workers."""
+        if self.workers == 0:
+            return _FinishedTask(fn(*args))
+        return get_worker_pool(self.workers).apipe(fn, *args)
+
+    def _advance_epoch(self):
+        self.set_epoch(self.epoch + 1)
+
+    def set_epoch(self, epoch: int):
+        """Sets the epoch of the next iteration, which determines the shard of this rank if there is more than one, and
+        the order of the batches if they are bucketed by shape and shuffled."""
+        self.epoch = epoch
+        self.num_served = 0
+        if self._sharded or self.bucket_sampler is not None:
+            self.all_indexes = self._get_epoch_indexes(self.epoch)
+            self.length = len(self.all_indexes)
+
+    def _get_epoch_indexes(self, epoch: int) -> np.ndarray:
+        """Returns the indexes that this rank iterates over in `epoch`, in the order they are yielded."""
+        indexes = self.dataset_indexes
+        if self._sharded:
+            indexes = self._get_shard_indexes(epoch)
+        if self.bucket_sampler is not None:
+            indexes = self.bucket_sampler.order(indexes, epoch)
+        return indexes
+
+    def _get_shard_indexes(self, epoch: int) -> np.ndarray:
+        """Returns the indexes of the dataset that this rank iterates over in `epoch`, in ascending order.
+
+        Indexes are grouped by the chunk of the tensor with the most chunks that they belong to. The groups are shuffled
+        with a generator seeded by `shard_seed` and `epoch`, so that every rank computes the same order, and the indexes, in
+        that order, are split into `world_size` parts of the same length. Every rank therefore gets the same number of
+        samples (the remaining `len(dataset) % world_size` samples are skipped for the epoch), and only the chunks at
+        the boundaries between two parts are read by more than one rank.
+
+        With DataLoader workers, the part of the rank is split again into `loader_workers` contiguous parts, the last
+        `len(part) % loader_workers` of which get one more sample, so that no sample of the rank is skipped.
+        """
+        indexes = self.dataset_indexes
+        if len(indexes) == 0:
+            return indexes
+
+        order, group_starts, group_lengths = self._group_by_chunk(indexes)
+        permutation = np.random.default_rng((self.shard_seed, epoch)).permutation(
+            len(group_starts)
+        )
+        group_starts = group_starts[permutation]
+        group_lengths = group_lengths[permutation]
+        # positions in `order` of the indexes, group after group
+        offsets = np.repeat(
+            group_starts - np.cumsum(group_lengths) + group_lengths, group_lengths
+        )
+        positions = offsets + np.arange(len(order))
+
+        shard_length = len(indexes) // self.world_size
+        shard = positions[self.rank * shard_length : (self.rank + 1) * shard_length]
+        if self.loader_workers > 1:
+            worker_length, remainder = divmod(shard_length, self.loader_workers)
+            shorter = self.loader_workers - remainder
+
+            def worker_start(worker: int) -> int:
+                # the first `shorter` workers get `worker_length` samples, the others one more
+                return worker * worker_length + max(worker - shorter, 0)
+
+            worker = self.loader_worker
+            shard = shard[worker_start(worker) : worker_start(worker + 1)]
+        return np.sort(indexes[order[shard]])
+
+    @property
+    def _sharded(self) -> bool:
+        """Whether this cache only iterates over a part of the dataset, see `_get_shard_indexes`."""
+        return self.world_size * self.loader_workers > 1
+
+    def _group_by_chunk(
+        self, indexes: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Groups indexes by the chunk of the tensor with the most chunks that they belong to.
+
+        Args:
+            indexes (np.ndarray): Indexes of samples in the dataset.
+
+        Returns:
+            The positions in `indexes` of the indexes, group after group, and the start and length of each group in
+            them. Groups are in the order of their chunks, and indexes keep their order within a group.
+        """
+        group_tensor = max(
+            self.tensor_keys,
+            key=lambda key: len(self.chunk_last_indexes[key]),
+            default=None,
+        )
+        if group_tensor is None:
+            rows = np.zeros(len(indexes), dtype=np.int64)
+        else:
+            rows = np.searchsorted(self.chunk_last_indexes[group_tensor], indexes)
+        order = np.argsort(rows, kind="stable")
+        rows = rows[order]
+        group_starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        group_lengths = np.diff(np.r_[group_starts, len(rows)])
+        return order, group_starts, group_lengths
+
+    def _get_local_index(self, tensor: str, index: int) -> int:
+        """Returns the index of a sample within its chunk."""
+        last_indexes = self.chunk_last_indexes[tensor]
+        row = np.searchsorted(last_indexes, index)
+        return int(index - last_indexes[row - 1] - 1) if row else int(index)
+
+    def _load_chunk_arrays(self):
+        """Copies the chunk ids and last indexes of every tensor out of its chunk id encoder."""
+        for key, chunk_engine in self.all_chunk_engines.items():
+            if chunk_engine.num_chunks == 0:
+                array = np.zeros((0, 2), dtype=ENCODING_DTYPE)
+            else:
+                array = chunk_engine.chunk_id_encoder.array
+            self.chunk_ids[key] = array[:, CHUNK_ID_COLUMN].copy()
+            self.chunk_last_indexes[key] = array[:, LAST_SEEN_INDEX_COLUMN].astype(
+                np.int64
+            )
+
+    def _numpy_from_chunks(
+        self, index: int, key: str, chunks: List[Chunk], decompressed: bool = False
+    ):
+        """Takes a list of chunks and returns a numpy array from it. `decompressed` tells whether the chunks were
+        decompressed by the workers."""
         # TODO: separate out casting
         chunk_engine = self.all_chunk_engines[key]
 
         # TODO: update this once we support images spanning across multiple chunks
         chunk = chunks[0]
-        if self.mode != "pytorch":
+        if self._read_views:
+            try:
+                return chunk_engine.read_sample_from_chunk(
+                    index, chunk, cast=False, copy=False, decompressed=decompressed
+                )
+            except SampleDecompressionError:
+                warnings.warn(
+                    f"Skipping corrupt {chunk_engine.tensor_meta.sample_compression} sample."
+                )
+                return None
+        elif self.mode != "pytorch":
             try:
                 return chunk_engine.read_sample_from_chunk(
-                    index, chunk, cast=True, copy=True
+                    index, chunk, cast=True, copy=True, decompressed=decompressed
                 )
             except SampleDecompressionError:
                 warnings.warn(
@@ -278,30 +911,16 @@ class PrefetchLRUCache(LRUCache):
                 return None
         else:
             # read the chunk and cast it to pytorch tensor with compatible dtype
-            import torch
-
             try:
                 value = chunk_engine.read_sample_from_chunk(
-                    index, chunk, cast=False, copy=False
+                    index, chunk, cast=False, copy=False, decompressed=decompressed
                 )
             except SampleDecompressionError:
                 warnings.warn(
                     f"Skipping corrupt {chunk_engine.tensor_meta.sample_compression} sample."
                 )
                 return None
-            # typecast if incompatible with pytorch
-            dtype = chunk_engine.tensor_meta.dtype
-            compatible_dtypes = {
-                "uint16": "int32",
-                "uint32": "int64",
-                "uint64": "int64",
-            }
-            dtype = compatible_dtypes.get(dtype, dtype)
-            try:
-                torch_dtype = getattr(torch, np.dtype(dtype).name)  # type: ignore
-            except AttributeError:
-                raise TypeError(f"Dtype {dtype} is not supported by pytorch.")
-            return torch.as_tensor(value.astype(dtype), dtype=torch_dtype)  # type: ignore
+            return to_pytorch(value, chunk_engine.tensor_meta.dtype)
 
     def _chunks_from_names(self, tensor: str, chunk_names: List[str]):
         """Takes a list of chunk names and returns a list with corresponding chunk objects"""
@@ -311,12 +930,32 @@ class PrefetchLRUCache(LRUCache):
         """Takes a single chunk name and tensor and returns Chunk"""
         shm_name = self.chunk_shared_mem_map[(tensor, chunk_name)]
         chunk_data = self[shm_name]
+        if self._read_views:
+            offset = self.cache_storage.pin(shm_name)
+            if offset is not None:
+                self._pinned_views.append(offset)
+            else:
+                self._open_shared_memory.append(
+                    self.cache_storage.last_active_shared_memory
+                )
         chunk = Chunk.frombuffer(chunk_data, copy=False)
         return chunk
 
+    def _release_views(self):
+        """Closes the shared memory and unpins the arena slots that samples read as views were kept in."""
+        self._open_shared_memory.clear()
+        self._unpin(self._pinned_views)
+
+    def _unpin(self, offsets: List[int]):
+        for offset in offsets:
+            self.cache_storage.unpin(offset)
+        offsets.clear()
+
     def _numpy_from_chunk_names(self, tensor, chunk_names, index):
         chunks = self._chunks_from_names(tensor, chunk_names)
-        arr = self._numpy_from_chunks(index, tensor, chunks)
+        shm_name = self.chunk_shared_mem_map[(tensor, chunk_names[0])]
+        decompressed = shm_name in self.decompressed_chunks
+        arr = self._numpy_from_chunks(index, tensor, chunks, decompressed)
         return arr
 
     def _get_data(self, index: int):
@@ -330,13 +969,16 @@ class PrefetchLRUCache(LRUCache):
             data[tensor] = arr
         return data
 
+    def _new_shared_memory_name(self) -> str:
+        self.last_shm_key_generated += 1
+        return f"al_{os.getpid()}_{self.last_shm_key_generated}"
+
     def _generate_shared_memory_names(self, chunk_groups: List[List[Tuple[str, str]]]):
         """Generates shared memory names for all chunks in chunk_groups as chunks names often get too large for some OS"""
         for chunk_group in chunk_groups:
             for chunk in chunk_group:
                 if chunk not in self.chunk_shared_mem_map:
-                    self.last_shm_key_generated += 1
-                    shared_memory_name = f"al_{self.last_shm_key_generated}"
+                    shared_memory_name = self._new_shared_memory_name()
                     self.chunk_shared_mem_map[chunk] = shared_memory_name
                     self.shared_mem_chunk_map[shared_memory_name] = chunk
 
@@ -366,9 +1008,6 @@ class PrefetchLRUCache(LRUCache):
                 and self.shared_mem_chunk_map[key] in self.required_chunks
             ):
                 self.emergency_storage[key] = self.cache_storage[key]
-            tensor, chunk_name = self.shared_mem_chunk_map[key]
-            if hasattr(self, "_update_count_dicts_pop"):
-                self._update_count_dicts_pop(tensor, chunk_name)  # type: ignore
 
         del self.cache_storage[key]
         self.cache_used -= itemsize
@@ -378,51 +1017,82 @@ class PrefetchLRUCache(LRUCache):
     ) -> List[Tuple[str, str]]:
         """Processes the chunk names dictionary and returns names of chunks that need to be fetched"""
         missing_chunks = []
-        all_keys = self._all_keys()
         for tensor, chunk_names in chunk_names_dict.items():
             for chunk_name in chunk_names:
                 chunk = (tensor, chunk_name)
                 shm_name = self.chunk_shared_mem_map.get(chunk)
-                if shm_name is None or shm_name not in all_keys:
+                if shm_name is None or not self._is_stored(shm_name):
                     missing_chunks.append((tensor, chunk_name))
                 else:
-                    self.required_chunks.add(chunk)
                     self._refresh_chunk_in_cache(tensor, chunk_name)
         return missing_chunks
 
-    def _fetch_and_store_required_data(self, chunk_groups: List[List[Tuple[str, str]]]):
-        """Generates shared memory names for required data, fetches, stores it and updates cache storage."""
-        self._generate_shared_memory_names(chunk_groups)
-        chunk_sizes_dict = self._fetch_chunks(chunk_groups)
-        self._update_cache_insertion(chunk_sizes_dict)
-        if isinstance(self.cache_storage, SharedMemoryProvider):
-            self.cache_storage.update_files(list(chunk_sizes_dict.keys()))
-        chunk_groups.clear()
-
-    def _fetch_chunks(
-        self, chunk_groups: List[List[Tuple[str, str]]]
-    ) -> Dict[str, int]:
-        """Takes a list of list of key, chunk_name tuples and fetches chunks for each sublist parallely."""
-        # fetch chunks from storage in a multiprocessed manner and decompresses them
-        storage: Union[S3Provider, Dict] = self.storage
-        shared_memory_groups: List[List[str]] = []
-        for chunk_group in chunk_groups:
-            names = [self.chunk_shared_mem_map[chunk] for chunk in chunk_group]
-            shared_memory_groups.append(names)
-        # s3 provider is not sent as storage provider but instead sent as a tuple containing it's state
-        if isinstance(storage, S3Provider):
-            storage = self.storage_state_tuple
+    def _is_stored(self, shm_name: str) -> bool:
+        """Checks whether a chunk is present in shared memory or in the next storage, without listing all their keys."""
+        if shm_name in self.cache_storage._all_keys():
+            return True
+        return self.next_storage is not None and shm_name in self.next_storage._all_keys()  # type: ignore
 
-        all_chunk_sizes: List[Dict[str, int]] = self.map(
+    def _submit_chunk_group(self, chunk_group: List[Tuple[str, str]]):
+        """Generates shared memory names for the chunks of a group and submits the group to be fetched by a worker.
+        Returns the pending result of the worker, see `_collect_landed`."""
+        self._generate_shared_memory_names([chunk_group])
+        names = [self.chunk_shared_mem_map[chunk] for chunk in chunk_group]
+        self.num_chunk_fetches += len(chunk_group)
+        self.fetched_chunks.update(chunk_group)
+        slots = {}
+        for (tensor, _), name in zip(chunk_group, names):
+            if tensor in self.chunk_slot_sizes:
+                slot = self.cache_storage.reserve(name, self.chunk_slot_sizes[tensor])
+                if slot is not None:
+                    slots[name] = slot
+        storage: Union[StorageProvider, bytes] = self.storage
+        if self.workers > 0 and self.pickled_storage is not None:
+            storage = self.pickled_storage
+        return self._run_task(
             read_and_store_chunk_group,
-            chunk_groups,
-            shared_memory_groups,
-            repeat(storage),
+            chunk_group,
+            names,
+            storage,
+            self.tensor_compressions,
+            self.cache_storage.arena if slots else None,
+            slots,
         )
-        combined_chunk_sizes_dict: Dict[str, int] = {}
-        for chunk_sizes in all_chunk_sizes:
-            combined_chunk_sizes_dict.update(chunk_sizes)
-        return combined_chunk_sizes_dict
+
+    def _collect_landed(
+        self,
+        inflight: Deque[Tuple[Any, List[Tuple[str, str]]]],
+        scheduled_chunks: Set[Tuple[str, str]],
+        block: bool,
+    ):
+        """Stores the chunk groups that the workers have finished fetching, in whichever order they finish.
+        If `block` is True, waits until at least one group has landed, unless none are in flight."""
+        while True:
+            landed: List[Tuple[Any, List[Tuple[str, str]]]] = []
+            still_inflight: List[Tuple[Any, List[Tuple[str, str]]]] = []
+            for item in inflight:
+                (landed if item[0].ready() else still_inflight).append(item)
+            if landed or not block or not inflight:
+                break
+            inflight[0][0].wait(0.01)
+
+        inflight.clear()
+        inflight.extend(still_inflight)
+        for future, chunk_group in landed:
+            chunk_sizes_dict, decompressed = future.get()
+            self._store_landed_chunks(chunk_sizes_dict, decompressed)
+            scheduled_chunks.difference_update(chunk_group)
+
+    def _store_landed_chunks(
+        self, chunk_sizes_dict: Dict[str, int], decompressed: List[str]
+    ):
+        """Updates cache storage with chunks that a worker has written to shared memory, `decompressed` being the ones
+        it decompressed."""
+        self.decompressed_chunks.difference_update(chunk_sizes_dict)
+        self.decompressed_chunks.update(decompressed)
+        # registered before updating the cache, so that chunks moved out of shared memory are unregistered again
+        self.cache_storage.update_slots(chunk_sizes_dict)
+        self._update_cache_insertion(chunk_sizes_dict)
 
     def _apply_transform(self, sample: Union[Dict, Tuple]):
         """Used to apply transform to a single sample"""
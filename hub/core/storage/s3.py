@@ -1,11 +1,15 @@
 import time
+import json
 import boto3
 import botocore  # type: ignore
 import posixpath
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Set, Tuple
 from botocore.session import ComponentLocator
 from hub.client.client import HubBackendClient
+from hub.constants import S3_KEYS_MANIFEST_FILENAME
 from hub.core.storage.provider import StorageProvider
+from hub.util.assert_byte_indexes import assert_byte_indexes
 from hub.util.exceptions import S3DeletionError, S3GetError, S3ListError, S3SetError
 import hub
 
@@ -23,6 +27,7 @@ class S3Provider(StorageProvider):
         aws_region: Optional[str] = None,
         token: Optional[str] = None,
         max_pool_connections: int = 50,
+        use_manifest: bool = False,
     ):
         """Initializes the S3Provider
 
@@ -44,6 +49,9 @@ class S3Provider(StorageProvider):
                 This is optional, tokens are normally autogenerated.
             max_pool_connections (int): The maximum number of connections to keep in a connection pool.
                 If this value is not set, the default value of 10 is used.
+            use_manifest (bool): If True, the set of keys is kept in a manifest object (`S3_KEYS_MANIFEST_FILENAME`)
+                that is updated on `flush`. Listing keys, `len` and `empty` then cost a single GET instead of listing
+                the whole prefix. The manifest is only accurate if every writer of the dataset uses it.
         """
         self.root = root
         self.aws_access_key_id = aws_access_key_id
@@ -55,6 +63,9 @@ class S3Provider(StorageProvider):
         self.expiration: Optional[str] = None
         self.tag: Optional[str] = None
         self.token: Optional[str] = token
+        self.use_manifest = use_manifest
+        self._manifest: Optional[Set[str]] = None
+        self._manifest_dirty = False
 
         self._initialize_s3_parameters()
 
@@ -71,6 +82,8 @@ class S3Provider(StorageProvider):
         """
         self.check_readonly()
         self._check_update_creds()
+        if self.use_manifest:
+            self._mark_manifest_dirty()
         try:
             path = posixpath.join(self.path, path)
             content = bytearray(memoryview(content))
@@ -83,6 +96,9 @@ class S3Provider(StorageProvider):
         except Exception as err:
             raise S3SetError(err)
 
+        if self.use_manifest:
+            self._load_manifest().add(path[len(self.path) :])
+
     def __getitem__(self, path):
         """Gets the object present at the path.
 
@@ -112,6 +128,57 @@ class S3Provider(StorageProvider):
         except Exception as err:
             raise S3GetError(err)
 
+    def get_bytes(
+        self,
+        path: str,
+        start_byte: Optional[int] = None,
+        end_byte: Optional[int] = None,
+    ):
+        """Gets the object present at the path within the given byte range, with a ranged GET request, so that only
+        these bytes are downloaded.
+
+        Args:
+            path (str): The path relative to the root of the S3Provider.
+            start_byte (int, optional): If only specific bytes starting from start_byte are required.
+            end_byte (int, optional): If only specific bytes up to end_byte are required.
+
+        Returns:
+            bytes: The bytes of the object present at the path within the given byte range.
+
+        Raises:
+            InvalidBytesRequestedError: If `start_byte` > `end_byte` or `start_byte` < 0 or `end_byte` < 0.
+            KeyError: If an object is not found at the path.
+            S3GetError: Any other error other than KeyError while retrieving the object.
+        """
+        assert_byte_indexes(start_byte, end_byte)
+        if start_byte is None and end_byte is None:
+            return self[path]
+        start_byte = start_byte or 0
+        if end_byte is not None and end_byte == start_byte:
+            return b""
+        byte_range = f"bytes={start_byte}-" + (
+            "" if end_byte is None else str(end_byte - 1)
+        )
+        self._check_update_creds()
+        try:
+            path = posixpath.join(self.path, path)
+            resp = self.client.get_object(
+                Bucket=self.bucket,
+                Key=path,
+                Range=byte_range,
+            )
+            return resp["Body"].read()
+        except botocore.exceptions.ClientError as err:
+            code = err.response["Error"]["Code"]
+            if code == "NoSuchKey":
+                raise KeyError(err)
+            if code == "InvalidRange":
+                # the range starts past the end of the object
+                return b""
+            raise S3GetError(err)
+        except Exception as err:
+            raise S3GetError(err)
+
     def __delitem__(self, path):
         """Delete the object present at the path.
 
@@ -125,12 +192,17 @@ class S3Provider(StorageProvider):
         """
         self.check_readonly()
         self._check_update_creds()
+        if self.use_manifest:
+            self._mark_manifest_dirty()
         try:
-            path = posixpath.join(self.path, path)
-            self.client.delete_object(Bucket=self.bucket, Key=path)
+            full_path = posixpath.join(self.path, path)
+            self.client.delete_object(Bucket=self.bucket, Key=full_path)
         except Exception as err:
             raise S3DeletionError(err)
 
+        if self.use_manifest:
+            self._load_manifest().discard(path)
+
     def _all_keys(self):
         """Helper function that lists all the objects present at the root of the S3Provider.
 
@@ -140,21 +212,91 @@ class S3Provider(StorageProvider):
         Raises:
             S3ListError: Any S3 error encountered while listing the objects.
         """
+        if self.use_manifest:
+            return set(self._load_manifest())
+        return self._list_keys()
+
+    def _list_keys(self) -> Set[str]:
+        """Lists all the objects under the root. The top level is listed first, then every top level "folder"
+        (normally one per tensor) is listed concurrently. Each listing follows continuation tokens, so there is no
+        limit on the number of keys."""
         self._check_update_creds()
         try:
-            # TODO boto3 list_objects only returns first 1000 objects
-            items = self.client.list_objects_v2(Bucket=self.bucket, Prefix=self.path)
-            if items["KeyCount"] <= 0:
-                return set()
-            items = items["Contents"]
-            names = [item["Key"] for item in items]
-            # removing the prefix from the names
-            len_path = len(self.path.split("/")) - 1
-            names = {"/".join(name.split("/")[len_path:]) for name in names}
-            return names
+            keys, prefixes = self._list_prefix(self.path, delimiter="/")
+            workers = max(1, min(len(prefixes), self.max_pool_connections))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for prefix_keys, _ in executor.map(self._list_prefix, prefixes):
+                    keys.extend(prefix_keys)
         except Exception as err:
             raise S3ListError(err)
 
+        # removing the prefix from the names
+        len_path = len(self.path)
+        names = {key[len_path:] for key in keys}
+        names.discard(S3_KEYS_MANIFEST_FILENAME)
+        return names
+
+    def _list_prefix(
+        self, prefix: str, delimiter: Optional[str] = None
+    ) -> Tuple[List[str], List[str]]:
+        """Lists all pages of objects under `prefix`. Returns the keys, and the common prefixes if `delimiter` is given."""
+        kwargs = {"Bucket": self.bucket, "Prefix": prefix}
+        if delimiter is not None:
+            kwargs["Delimiter"] = delimiter
+
+        keys: List[str] = []
+        prefixes: List[str] = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(**kwargs):
+            keys.extend(item["Key"] for item in page.get("Contents", ()))
+            prefixes.extend(item["Prefix"] for item in page.get("CommonPrefixes", ()))
+        return keys, prefixes
+
+    def _load_manifest(self) -> Set[str]:
+        """Returns the set of keys in the manifest, reading the manifest from S3 the first time. If there is no
+        manifest yet, or the last session that changed the keys did not flush, the keys are listed and the manifest
+        is written on the next `flush`."""
+        if self._manifest is None:
+            try:
+                manifest = json.loads(bytes(self[S3_KEYS_MANIFEST_FILENAME]))
+            except KeyError:
+                manifest = None
+            if manifest is not None and manifest.get("complete", True):
+                self._manifest = set(manifest["keys"])
+            else:
+                self._manifest = self._list_keys()
+                self._manifest_dirty = True
+        return self._manifest
+
+    def _mark_manifest_dirty(self):
+        """Called before the first change to the keys since the manifest was last written. The stored manifest is
+        marked incomplete until the next `flush`, so that if that flush never happens (for example the process
+        crashes), the next reader lists the keys instead of trusting it."""
+        if not self._manifest_dirty:
+            manifest = {"keys": sorted(self._load_manifest()), "complete": False}
+            self._put_manifest(json.dumps(manifest).encode("utf-8"))
+            self._manifest_dirty = True
+
+    def flush(self):
+        """Writes the key manifest if it changed since it was last written. No op if `use_manifest` is False."""
+        if self.use_manifest and self._manifest_dirty and not self.read_only:
+            manifest = {"keys": sorted(self._load_manifest()), "complete": True}
+            self._put_manifest(json.dumps(manifest).encode("utf-8"))
+            self._manifest_dirty = False
+
+    def _put_manifest(self, content: bytes):
+        # bypasses `__setitem__`, the manifest should not list itself
+        self._check_update_creds()
+        try:
+            self.client.put_object(
+                Bucket=self.bucket,
+                Body=content,
+                Key=posixpath.join(self.path, S3_KEYS_MANIFEST_FILENAME),
+                ContentType="application/json",
+            )
+        except Exception as err:
+            raise S3SetError(err)
+
     def __len__(self):
         """Returns the number of files present at the root of the S3Provider. This is an expensive operation.
 
@@ -185,6 +327,8 @@ class S3Provider(StorageProvider):
             bucket.objects.filter(Prefix=self.path).delete()
         else:
             super().clear()
+        self._manifest = set() if self.use_manifest else None
+        self._manifest_dirty = False
 
     def __getstate__(self):
         return (
@@ -198,6 +342,7 @@ class S3Provider(StorageProvider):
             self.expiration,
             self.tag,
             self.token,
+            self.use_manifest,
         )
 
     def __setstate__(self, state):
@@ -211,6 +356,7 @@ class S3Provider(StorageProvider):
         self.expiration = state[7]
         self.tag = state[8]
         self.token = state[9]
+        self.use_manifest = state[10] if len(state) > 10 else False
 
         self._initialize_s3_parameters()
 
@@ -235,6 +381,8 @@ class S3Provider(StorageProvider):
 
     def _initialize_s3_parameters(self):
         self._set_bucket_and_path()
+        self._manifest = None
+        self._manifest_dirty = False
 
         self.client_config = botocore.config.Config(
             max_pool_connections=self.max_pool_connections,
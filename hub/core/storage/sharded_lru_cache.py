@@ -0,0 +1,333 @@
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Set, Union
+
+from hub.core.storage.cachable import Cachable, CachableCallback
+from hub.core.storage.eviction import EvictionPolicy
+from hub.core.storage.lru_cache import LRUCache, _get_nbytes
+from hub.core.storage.memory_budget import get_memory_budget
+from hub.core.storage.provider import StorageProvider
+
+
+DEFAULT_NUM_SHARDS = 16
+
+
+class _Shard:
+    """An `LRUCache` segment along with the lock guarding it and the fetches in flight for its keys."""
+
+    def __init__(self, cache: LRUCache):
+        self.cache = cache
+        self.lock = threading.Lock()
+        self.inflight: Dict[str, Future] = {}
+
+
+class ShardedLRUCache(LRUCache):
+    """Thread-safe LRU cache. Keys are spread over independently locked `LRUCache` segments, so threads reading
+    different keys rarely contend, and concurrent misses for the same key are served by a single read from the next
+    storage."""
+
+    def __init__(
+        self,
+        cache_storage: StorageProvider,
+        next_storage: Optional[StorageProvider],
+        cache_size: int,
+        eviction_policy: Union[str, Callable[[], EvictionPolicy]] = "lru",
+        num_shards: int = DEFAULT_NUM_SHARDS,
+    ):
+        """Initializes the ShardedLRUCache.
+
+        Args:
+            cache_storage (StorageProvider): The storage being used as the caching layer of the cache, shared by all
+                the shards. Different shards never hold the same key, so it only needs to support concurrent access
+                to different keys, which is the case for MemoryProvider and LocalProvider.
+            next_storage (StorageProvider): The next storage layer of the cache. Reads from it are done outside of
+                the shard locks, so it must be thread-safe: a base provider or another ShardedLRUCache.
+            cache_size (int): The total space that can be used from the cache_storage in bytes. It is split evenly
+                between the shards, objects larger than `cache_size // num_shards` are not cached.
+            eviction_policy (str, Callable): The eviction policy of every shard. See `LRUCache`.
+            num_shards (int): Number of independently locked segments. Defaults to 16.
+
+        Raises:
+            ValueError: If `num_shards` is not positive.
+        """
+        if num_shards < 1:
+            raise ValueError(f"`num_shards` must be >= 1. Got: {num_shards}")
+        self.next_storage = next_storage
+        self.cache_storage = cache_storage
+        self.cache_size = cache_size
+        self.eviction_policy = eviction_policy
+        self.num_shards = num_shards
+        self._initialize()
+
+    def _initialize(self):
+        shard_size = self.cache_size // self.num_shards
+        self._shards: List[_Shard] = [
+            _Shard(
+                LRUCache(
+                    self.cache_storage,
+                    self.next_storage,
+                    shard_size,
+                    self.eviction_policy,
+                )
+            )
+            for _ in range(self.num_shards)
+        ]
+        self._coalesced = 0
+
+    def _shard(self, path: str) -> _Shard:
+        return self._shards[hash(path) % self.num_shards]
+
+    @property
+    def hits(self) -> int:  # type: ignore
+        return sum(shard.cache.hits for shard in self._shards)
+
+    @property
+    def misses(self) -> int:  # type: ignore
+        return sum(shard.cache.misses for shard in self._shards)
+
+    @property
+    def evictions(self) -> int:  # type: ignore
+        return sum(shard.cache.evictions for shard in self._shards)
+
+    @property
+    def cache_used(self) -> int:  # type: ignore
+        return sum(shard.cache.cache_used for shard in self._shards)
+
+    @property
+    def dirty_keys(self) -> Set[str]:  # type: ignore
+        """Snapshot of the keys present in the cache but not in the next storage."""
+        keys: Set[str] = set()
+        for shard in self._shards:
+            with shard.lock:
+                keys.update(shard.cache.dirty_keys)
+        return keys
+
+    def _reset_stats(self):
+        for shard in self._shards:
+            shard.cache._reset_stats()
+        self._coalesced = 0
+
+    def _tier_stats(self) -> Dict[str, Any]:
+        return {
+            "policy": self._shards[0].cache.lru_sizes.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hit_ratio,
+            "used": self.cache_used,
+            "size": self.cache_size,
+            "shards": self.num_shards,
+            "coalesced": self._coalesced,
+        }
+
+    def __getitem__(self, path: str):
+        """If item is in the cache, retrieves it from there. Otherwise, retrieves it from the next storage and stores
+        it in the cache (if possible). If another thread is already reading the same item from the next storage, waits
+        for that read instead of issuing a new one. Such reads count as hits.
+
+        Args:
+            path (str): The path relative to the root of the underlying storage.
+
+        Raises:
+            KeyError: if an object is not found at the path.
+
+        Returns:
+            bytes: The bytes of the object present at the path.
+        """
+        shard = self._shard(path)
+        with shard.lock:
+            if path in shard.cache.lru_sizes:
+                return shard.cache[path]
+            pending = shard.inflight.get(path)
+            if pending is None:
+                # this thread leads the read, others wait for its future
+                future: Future = Future()
+                shard.inflight[path] = future
+                shard.cache.misses += 1
+            else:
+                shard.cache.hits += 1
+                self._coalesced += 1
+        if pending is not None:
+            return pending.result()
+
+        try:
+            if self.next_storage is None:
+                raise KeyError(path)
+            result = self.next_storage[path]
+        except BaseException as e:
+            with shard.lock:
+                if shard.inflight.get(path) is future:
+                    del shard.inflight[path]
+            future.set_exception(e)
+            raise
+
+        with shard.lock:
+            # the key may have been written while it was being read, the written value must not be replaced
+            if shard.inflight.get(path) is future:
+                del shard.inflight[path]
+                if _get_nbytes(result) <= shard.cache.cache_size:
+                    shard.cache._insert_in_cache(path, result)
+        future.set_result(result)
+        self._reserve()
+        return result
+
+    def peek(self, path: str) -> Optional[Union[bytes, memoryview, Cachable]]:
+        """Returns the object at `path` if it is in the cache, from the shard that holds it. See `LRUCache.peek`.
+
+        Args:
+            path (str): The path relative to the root of the underlying storage.
+
+        Returns:
+            The cached object, or None if it is not cached.
+        """
+        shard = self._shard(path)
+        with shard.lock:
+            return shard.cache.peek(path)
+
+    def get_cachable(self, path: str, expected_class):
+        """Reads the object at `path` into an instance of `expected_class` and keeps it in cache. If several threads
+        read the same path concurrently, they all get the same instance. See `LRUCache.get_cachable`.
+
+        Args:
+            path (str): Path to the stored cachable.
+            expected_class (callable): The expected subclass of `Cachable`.
+
+        Raises:
+            ValueError: If the incorrect `expected_class` was provided.
+            ValueError: If the type of the data at `path` is invalid.
+
+        Returns:
+            An instance of `expected_class` populated with the data.
+        """
+        item = self[path]
+        shard = self._shard(path)
+        if isinstance(item, (bytes, memoryview)):
+            obj = expected_class.frombuffer(item)
+            with shard.lock:
+                cached = (
+                    shard.cache.cache_storage[path]
+                    if path in shard.cache.lru_sizes
+                    else None
+                )
+                if isinstance(cached, Cachable):
+                    # another thread got here first
+                    item = cached
+                else:
+                    if isinstance(obj, CachableCallback):
+                        obj.initialize_callback_location(path, self)
+                    if obj.memory_nbytes <= shard.cache.cache_size:
+                        if path in shard.cache.lru_sizes:
+                            shard.cache.cache_used -= shard.cache.lru_sizes.pop(path)
+                        shard.cache._insert_in_cache(path, obj)
+                    item = obj
+
+        if isinstance(item, Cachable):
+            if type(item) != expected_class:
+                raise ValueError(
+                    f"'{path}' was expected to have the class '{expected_class.__name__}'. Instead, got: '{type(item)}'."
+                )
+            with shard.lock:
+                shard.cache._refresh_size(path, item)
+            self._reserve()
+            return item
+        raise ValueError(f"Item at '{path}' got an invalid type: '{type(item)}'.")
+
+    def __setitem__(self, path: str, value: Union[bytes, Cachable]):
+        """Puts the item in the cache (if possible), else writes to next_storage. Reads of `path` that are in flight
+        return the previous value, but don't add it to the cache.
+
+        Args:
+            path (str): the path relative to the root of the underlying storage.
+            value (bytes, Cachable): the value to be assigned at the path.
+
+        Raises:
+            ReadOnlyError: If the provider is in read-only mode.
+        """
+        self.check_readonly()
+        shard = self._shard(path)
+        with shard.lock:
+            shard.inflight.pop(path, None)
+            shard.cache[path] = value
+        self._reserve()
+        self.maybe_flush()
+
+    def __delitem__(self, path: str):
+        """Deletes the object present at the path from the cache and the underlying storage.
+
+        Args:
+            path (str): the path to the object relative to the root of the provider.
+
+        Raises:
+            KeyError: If an object is not found at the path.
+            ReadOnlyError: If the provider is in read-only mode.
+        """
+        self.check_readonly()
+        shard = self._shard(path)
+        with shard.lock:
+            shard.inflight.pop(path, None)
+            del shard.cache[path]
+        self.maybe_flush()
+
+    def _reserve(self):
+        # the shards don't draw from the memory budget themselves, so that it is never used while a shard is locked
+        if self.memory_budget is not None:
+            self.memory_budget.reserve(0)
+
+    def _pop_from_cache(self):
+        """Evicts a key from the fullest shard. Used by `MemoryBudget`."""
+        shard = max(self._shards, key=lambda shard: shard.cache.cache_used)
+        with shard.lock:
+            if shard.cache.cache_used > 0:
+                shard.cache._pop_from_cache()
+
+    def flush(self):
+        """Writes the dirty keys of every shard to next_storage, and flushes it."""
+        self.check_readonly()
+        for shard in self._shards:
+            with shard.lock:
+                for key in shard.cache.dirty_keys.copy():
+                    shard.cache._forward(key)
+        if self.next_storage is not None:
+            self.next_storage.flush()
+
+    def _clear_shards(self):
+        for shard in self._shards:
+            with shard.lock:
+                shard.inflight.clear()
+                shard.cache.lru_sizes.clear()
+                shard.cache.dirty_keys.clear()
+                shard.cache.cache_used = 0
+        self.cache_storage.clear()
+
+    def clear_cache(self):
+        """Flushes the cache if not in read mode, then deletes the contents of all its layers.
+        This doesn't delete data from the actual storage.
+        """
+        self._flush_if_not_read_only()
+        self._clear_shards()
+        if self.next_storage is not None and hasattr(self.next_storage, "clear_cache"):
+            self.next_storage.clear_cache()
+
+    def clear(self):
+        """Deletes ALL the data from all the layers of the cache and the actual storage.
+        This is an IRREVERSIBLE operation. Data once deleted can not be recovered.
+        """
+        self.check_readonly()
+        self._clear_shards()
+        if self.next_storage is not None:
+            self.next_storage.clear()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = super().__getstate__()
+        state["num_shards"] = self.num_shards
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.next_storage = state["next_storage"]
+        self.cache_storage = state["cache_storage"]
+        self.cache_size = state["cache_size"]
+        self.eviction_policy = state["eviction_policy"]
+        self.num_shards = state["num_shards"]
+        self._initialize()
+        if state.get("memory_budget"):
+            get_memory_budget().register(self)
@@ -1,14 +1,177 @@
-from typing import List, Optional, Set
+import bisect
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
 from multiprocessing.shared_memory import SharedMemory
+from multiprocessing.util import Finalize
 from hub.core.storage.provider import StorageProvider
+from hub.util.shared_memory import remove_shared_memory_from_resource_tracker
+
+# every object in shared memory starts with its size, as a 4 byte little endian integer
+HEADER_SIZE = 4
+
+# slots of an arena start at multiples of this, so that samples read from them are aligned
+ARENA_ALIGNMENT = 64
+
+# arenas mapped by this process that it didn't create, by name. The workers of a pool may serve several caches over
+# their lifetime, so only the most recently used ones are kept mapped
+_attached_arenas: "OrderedDict[str, SharedMemory]" = OrderedDict()
+_MAX_ATTACHED_ARENAS = 4
+
+
+def _close_shared_memory(shared_memory: SharedMemory):
+    try:
+        shared_memory.close()
+    except BufferError:
+        # samples read from the segment are still alive. The memory is released when they are
+        pass
+
+
+def _destroy_shared_memory(shared_memory: SharedMemory):
+    _close_shared_memory(shared_memory)
+    try:
+        shared_memory.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _attach_arena(name: str) -> SharedMemory:
+    """Maps the arena called `name` in this process, once."""
+    shared_memory = _attached_arenas.get(name)
+    if shared_memory is not None:
+        _attached_arenas.move_to_end(name)
+        return shared_memory
+    # the arena belongs to the process that created it, which unlinks it
+    remove_shared_memory_from_resource_tracker()
+    shared_memory = SharedMemory(name=name)
+    _attached_arenas[name] = shared_memory
+    while len(_attached_arenas) > _MAX_ATTACHED_ARENAS:
+        _, oldest = _attached_arenas.popitem(last=False)
+        _close_shared_memory(oldest)
+    return shared_memory
+
+
+class SharedMemoryArena:
+    """A single shared memory segment that objects are stored in at different offsets, instead of a segment each.
+
+    The arena is allocated once, up front, and split into slots by an allocator that only runs in the process that
+    created it. Other processes, such as the workers of a pool, are given the offset of a slot to write to or read from.
+    An arena is pickled by name, and a process maps it the first time it gets a copy. The segment is unlinked when the
+    arena is garbage collected or when the process that created it exits, so it isn't leaked if a worker crashes.
+
+    Slots are carved out of the free ranges of the arena on a first fit basis, and adjacent free ranges are merged when
+    slots are freed.
+
+    Args:
+        size (int): The size of the arena in bytes.
+    """
+
+    def __init__(self, size: int):
+        self.size = max(int(size), ARENA_ALIGNMENT)
+        # the arena is unlinked by its finalizer, not by the resource tracker. See `remove_shared_memory_from_resource_tracker`
+        remove_shared_memory_from_resource_tracker()
+        self.shared_memory = SharedMemory(create=True, size=self.size)
+        self.name = self.shared_memory.name
+        # free ranges of the arena as (offset, size), sorted by offset. None in processes that didn't create the arena
+        self._free: Optional[List[Tuple[int, int]]] = [(0, self.size)]
+        self._finalizer: Optional[Finalize] = Finalize(
+            self, _destroy_shared_memory, args=(self.shared_memory,), exitpriority=0
+        )
+
+    @property
+    def free_bytes(self) -> int:
+        return sum(size for _, size in self._free or ())
+
+    def allocate(self, nbytes: int) -> Optional[Tuple[int, int]]:
+        """Returns the offset and size of a new slot of at least `nbytes` bytes, or None if no free range is large
+        enough or if the arena was created by another process."""
+        if self._free is None:
+            return None
+        nbytes = _align(max(nbytes, 1))
+        for i, (offset, size) in enumerate(self._free):
+            if size >= nbytes:
+                if size == nbytes:
+                    del self._free[i]
+                else:
+                    self._free[i] = (offset + nbytes, size - nbytes)
+                return offset, nbytes
+        return None
+
+    def free(self, offset: int, size: int):
+        """Returns a slot to the arena."""
+        free = self._free
+        if free is None or size == 0:
+            return
+        i = bisect.bisect_left(free, (offset, 0))
+        if i < len(free) and offset + size == free[i][0]:
+            size += free.pop(i)[1]
+        if i > 0 and sum(free[i - 1]) == offset:
+            i -= 1
+            offset, previous_size = free.pop(i)
+            size += previous_size
+        free.insert(i, (offset, size))
+
+    def shrink(self, offset: int, size: int, nbytes: int) -> Tuple[int, int]:
+        """Frees the end of a slot that only needs `nbytes` bytes, and returns the slot that remains."""
+        nbytes = _align(max(nbytes, 1))
+        if nbytes >= size:
+            return offset, size
+        self.free(offset + nbytes, size - nbytes)
+        return offset, nbytes
+
+    def write(self, offset: int, value):
+        """Writes an object, preceded by its size, at `offset`."""
+        size = len(value)
+        buf = self.shared_memory.buf
+        buf[offset : offset + HEADER_SIZE] = size.to_bytes(HEADER_SIZE, "little")
+        buf[offset + HEADER_SIZE : offset + HEADER_SIZE + size] = value
+
+    def read(self, offset: int) -> memoryview:
+        """Returns a view of the object written at `offset`."""
+        buf = self.shared_memory.buf
+        size = int.from_bytes(buf[offset : offset + HEADER_SIZE], "little")
+        return buf[offset + HEADER_SIZE : offset + HEADER_SIZE + size]
+
+    def close(self):
+        """Unmaps the arena, and unlinks it if this process created it."""
+        if self._finalizer is not None:
+            self._finalizer()
+        else:
+            _close_shared_memory(self.shared_memory)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"name": self.name, "size": self.size}
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self.shared_memory = _attach_arena(self.name)
+        self._free = None
+        self._finalizer = None
+
+
+def _align(nbytes: int) -> int:
+    return -(-nbytes // ARENA_ALIGNMENT) * ARENA_ALIGNMENT
 
 
 class SharedMemoryProvider(StorageProvider):
-    """Provider class for using shared memory."""
+    """Provider class for using shared memory.
 
-    def __init__(self, root: str = ""):
+    Every object is stored in a shared memory segment of its own, named after its path, unless the provider has an
+    arena (see `SharedMemoryArena`), in which case objects are stored in slots of the arena when they fit.
+
+    Args:
+        root (str): Unused.
+        arena (SharedMemoryArena, optional): The arena to store objects in.
+    """
+
+    def __init__(self, root: str = "", arena: Optional[SharedMemoryArena] = None):
         self.root = root
+        self.arena = arena
         self.files: Set[str] = set()
+        # offset and size of the slot of each path stored in the arena, or reserved in it with `reserve`
+        self.slots: Dict[str, Tuple[int, int]] = {}
+        # slots that can't be reused yet, as other processes or views are reading them, by offset. See `pin`
+        self._pins: Dict[int, int] = {}
+        self._freed_while_pinned: Dict[int, Tuple[int, int]] = {}
         # keeps the shared memory objects in memory, otherwise getitem throws warnings as the shared memory is deleted
         self.last_active_shared_memory: Optional[SharedMemory] = None
 
@@ -28,6 +191,9 @@ class SharedMemoryProvider(StorageProvider):
         Raises:
             KeyError: If an object is not found at the path.
         """
+        slot = self.slots.get(path)
+        if slot is not None:
+            return self.arena.read(slot[0])  # type: ignore
         shared_memory = SharedMemory(name=path)
         self.last_active_shared_memory = shared_memory
         chunk_size = int.from_bytes(shared_memory.buf[:4], "little")
@@ -54,6 +220,17 @@ class SharedMemoryProvider(StorageProvider):
         self.check_readonly()
         size = len(value)
         self.files.add(path)
+        if self.arena is not None:
+            slot = self.slots.get(path)
+            if slot is None:
+                slot = self.arena.allocate(size + HEADER_SIZE)
+                if slot is not None:
+                    self.slots[path] = slot
+            if slot is not None and slot[1] >= size + HEADER_SIZE:
+                self.arena.write(slot[0], value)
+                return
+            # doesn't fit in its slot, or there is no room left in the arena
+            self._free_slot(path)
         try:
             shared_memory = SharedMemory(create=True, size=size + 4, name=path)
         except FileExistsError:
@@ -101,6 +278,11 @@ class SharedMemoryProvider(StorageProvider):
             KeyError: If an object is not found at the path.
             ReadOnlyError: If the provider is in read-only mode.
         """
+        if path in self.slots:
+            self.check_readonly()
+            self._free_slot(path)
+            self.files.discard(path)
+            return
         try:
             self.check_readonly()
             shared_memory = SharedMemory(name=path)
@@ -128,6 +310,9 @@ class SharedMemoryProvider(StorageProvider):
         paths = list(self.files)
         for path in paths:
             del self[path]
+        # slots reserved for objects that were never stored
+        for path in list(self.slots):
+            self._free_slot(path)
 
     def __getstate__(self) -> str:
         raise NotImplementedError
@@ -143,3 +328,68 @@ class SharedMemoryProvider(StorageProvider):
         """
         self.check_readonly()
         self.files.update(files)
+
+    def reserve(self, path: str, nbytes: int) -> Optional[Tuple[int, int]]:
+        """Reserves a slot of the arena for an object of up to `nbytes` bytes that another process will store at `path`.
+
+        Args:
+            path (str): The path the object will be stored at. A slot already reserved for it is freed first.
+            nbytes (int): The size of the object, without the header of the slot.
+
+        Returns:
+            The offset and size of the slot, or None if there is no arena or no room left in it. Other processes are
+            given the slot, and are expected to write the object there if it fits (see `SharedMemoryArena.write`), or
+            to a segment of its own otherwise.
+        """
+        if self.arena is None:
+            return None
+        self._free_slot(path)
+        slot = self.arena.allocate(nbytes + HEADER_SIZE)
+        if slot is not None:
+            self.slots[path] = slot
+        return slot
+
+    def update_slots(self, sizes: Dict[str, int]):
+        """Registers objects that other processes stored in the slots reserved for them, given their sizes. Slots are
+        shrunk to the size of their object. Objects that didn't fit were stored in segments, so their slots are freed.
+        """
+        self.check_readonly()
+        for path, size in sizes.items():
+            slot = self.slots.get(path)
+            if slot is None:
+                continue
+            offset, slot_size = slot
+            if slot_size >= size + HEADER_SIZE:
+                self.slots[path] = self.arena.shrink(offset, slot_size, size + HEADER_SIZE)  # type: ignore
+            else:
+                self._free_slot(path)
+        self.files.update(sizes)
+
+    def pin(self, path: str) -> Optional[int]:
+        """Keeps the slot of `path` from being reused until `unpin` is called with the offset returned, even if `path`
+        is deleted in the meantime. Returns None if `path` isn't stored in the arena."""
+        slot = self.slots.get(path)
+        if slot is None:
+            return None
+        offset = slot[0]
+        self._pins[offset] = self._pins.get(offset, 0) + 1
+        return offset
+
+    def unpin(self, offset: int):
+        count = self._pins[offset] - 1
+        if count:
+            self._pins[offset] = count
+            return
+        del self._pins[offset]
+        slot = self._freed_while_pinned.pop(offset, None)
+        if slot is not None:
+            self.arena.free(*slot)  # type: ignore
+
+    def _free_slot(self, path: str):
+        slot = self.slots.pop(path, None)
+        if slot is None:
+            return
+        if slot[0] in self._pins:
+            self._freed_while_pinned[slot[0]] = slot
+        else:
+            self.arena.free(*slot)  # type: ignore
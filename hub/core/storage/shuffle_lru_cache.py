@@ -1,13 +1,25 @@
-import random
-from collections import defaultdict
-from typing import Callable, Dict, Optional, Sequence, Set
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
 from hub.core.storage import StorageProvider, SharedMemoryProvider
 from hub.core.storage.prefetch_lru_cache import PrefetchLRUCache
 from hub.constants import INTELLIGENT_SHUFFLING_THRESHOLD
+from hub.util.index_set import IndexSet
 
 
 class ShuffleLRUCache(PrefetchLRUCache):
-    """Creates an intelligent cache that suggests indexes on the basis of existing cache contents."""
+    """Creates an intelligent cache that suggests indexes on the basis of the chunks it is about to hold.
+
+    Indexes are drawn at random with a generator seeded by `shard_seed`, the epoch and the rank. Once the chunks needed
+    by the recent draws would fill most of the cache, indexes whose chunks are among them are preferred. The chunks are
+    tracked from the draws themselves, rather than from the chunks that have landed in the cache, so the order of an
+    epoch only depends on the seed. See `state_dict`.
+    """
+
+    # indexes are picked at random, so samples are yielded as soon as their chunks land
+    preserve_order = False
 
     def __init__(
         self,
@@ -19,6 +31,13 @@ class ShuffleLRUCache(PrefetchLRUCache):
         tensor_keys: Optional[Sequence[str]],
         transform: Optional[Callable],
         mode: Optional[str] = None,
+        decode_in_workers: bool = False,
+        transform_in_workers: bool = False,
+        world_size: int = 1,
+        rank: int = 0,
+        shard_seed: int = 0,
+        loader_workers: int = 1,
+        loader_worker: int = 0,
     ):
         super().__init__(
             cache_storage,
@@ -29,51 +48,145 @@ class ShuffleLRUCache(PrefetchLRUCache):
             tensor_keys,
             transform,
             mode,
+            decode_in_workers,
+            transform_in_workers,
+            world_size,
+            rank,
+            shard_seed,
+            loader_workers=loader_workers,
+            loader_worker=loader_worker,
         )
 
-        # set of all indexes that have not been used yet, used to pick new indexes every time
-        self.all_remaining_indexes = set(self.all_indexes)
+        # set of all indexes that have not been drawn yet, used to pick new indexes every time
+        self.all_remaining_indexes = self._new_remaining_indexes()
+        # the generator indexes are picked with, seeded by `shard_seed`, the epoch and the rank
+        self.rng = self._new_rng()
 
-        # keeps count of how many unique tensors have this index in cache, updated in pop and insert
+        # whether each index has been yielded in the current epoch, see `state_dict`
+        self.served = self._new_served()
+        # number of remaining indexes that were yielded before the state was loaded, and are skipped when drawn
+        self.num_to_skip = 0
+
+        # the chunks needed by the recent draws, least recently needed first, with their estimated size
+        self.recent_chunks: OrderedDict[Tuple[str, str], int] = OrderedDict()
+        self.recent_chunks_size = 0
+        # keeps count of how many unique tensors have this index in `recent_chunks`, updated in pop and insert
         self.index_ct: Dict[int, int] = defaultdict(int)
         # corresponding to each count, stores the indexes that have appeared that many times
-        self.ct_indexes: Dict[int, Set[int]] = defaultdict(set)
+        self.ct_indexes: Dict[int, IndexSet] = defaultdict(IndexSet)
 
         # stores the start and end index of each chunk for each tensor
         self.all_chunks_start_end_index = self._get_all_chunks_start_end_index()
 
+    def _universe(self) -> int:
+        return int(self.all_indexes.max()) + 1 if len(self.all_indexes) else 0
+
+    def _new_remaining_indexes(self) -> IndexSet:
+        return IndexSet(self.all_indexes, universe=self._universe())
+
+    def _new_served(self) -> np.ndarray:
+        return np.zeros(self._universe(), dtype=bool)
+
+    def _new_rng(self) -> np.random.Generator:
+        return np.random.default_rng((self.shard_seed, self.epoch, self.rank))
+
+    def set_epoch(self, epoch: int):
+        super().set_epoch(epoch)
+        self.all_remaining_indexes = self._new_remaining_indexes()
+        self.served = self._new_served()
+        self.num_to_skip = 0
+        self.rng = self._new_rng()
+        self.recent_chunks.clear()
+        self.recent_chunks_size = 0
+        self.index_ct.clear()
+        self.ct_indexes.clear()
+
+    def _mark_served(self, index: int):
+        super()._mark_served(index)
+        self.served[index] = True
+
+    def _num_remaining(self) -> int:
+        return len(self.all_remaining_indexes) - self.num_to_skip
+
+    def state_dict(self) -> Dict[str, Any]:
+        """Returns the position of the iteration in the current epoch, to resume it from with `load_state_dict`.
+
+        Samples are yielded in random order, so on top of the state of `PrefetchLRUCache.state_dict`, the state holds
+        the indexes that have been yielded, as a bitmap of one bit per index. The draws of an epoch only depend on
+        `shard_seed`, the epoch and the rank, so they are replayed from the start of the epoch when resuming, and the
+        indexes already yielded are skipped without fetching their chunks.
+        """
+        state = super().state_dict()
+        state["served"] = np.packbits(self.served).tobytes()
+        return state
+
+    def load_state_dict(self, state: Dict[str, Any]):
+        """Makes the next iteration resume the epoch of `state`, a state returned by `state_dict`, where it was.
+
+        Args:
+            state (Dict[str, Any]): The state to resume from.
+        """
+        super().load_state_dict(state)
+        served = np.unpackbits(np.frombuffer(state["served"], dtype=np.uint8))
+        self.served = served[: len(self.served)].astype(bool)
+        self.num_to_skip = int(self.served.sum())
+
     def remove_index(self, index: int):
         """Removes an index from all the class data structures after it has been used."""
         self.all_remaining_indexes.discard(index)
-        self.ct_indexes[self.index_ct[index]].discard(index)
-        if len(self.ct_indexes[self.index_ct[index]]) == 0:
-            self.ct_indexes.pop(self.index_ct[index])
-        self.index_ct.pop(index)
-
-    def clear_cache(self):
-        """Flushes the content of all the cache layers if not in read mode and and then deletes contents of all the layers of it.
-        This doesn't delete data from the actual storage.
-        """
-        super().clear_cache()
-        self.index_ct.clear()
-        self.ct_indexes.clear()
-        self.all_remaining_indexes = set(self.all_indexes)
+        if index in self.index_ct:
+            self.ct_indexes[self.index_ct[index]].discard(index)
+            if len(self.ct_indexes[self.index_ct[index]]) == 0:
+                self.ct_indexes.pop(self.index_ct[index])
+            self.index_ct.pop(index)
 
     def _suggest_next_index(self) -> int:
-        """Suggests the next index to return data from. For shuffle cache this is done by a combination of random picking as well as greedy picking depending on the number of chunks present in the cache for the indexes."""
+        """Suggests the next index to return data from. Indexes that were yielded before the state was loaded are drawn
+        again, in the same order as before, but skipped."""
+        while True:
+            index = self._draw_index()
+            self._require_recent_chunks(index)
+            if not self.served[index]:
+                return index
+            self.num_to_skip -= 1
+
+    def _draw_index(self) -> int:
+        """Draws the next index of the epoch. For shuffle cache this is done by a combination of random picking as well
+        as greedy picking depending on the number of chunks of the recent draws that the indexes need.
+        Both picks are O(1), see `IndexSet`."""
         if (
-            self.cache_used < INTELLIGENT_SHUFFLING_THRESHOLD * self.cache_size
+            self.recent_chunks_size < INTELLIGENT_SHUFFLING_THRESHOLD * self.cache_size
             or not self.index_ct
         ):
-            index = random.choice(list(self.all_remaining_indexes))
+            index = self.all_remaining_indexes.choice(self.rng)
         else:
+            # there are at most as many counts as tensors
             largest_ct = max(self.ct_indexes.keys())
-            index = random.choice(list(self.ct_indexes[largest_ct]))
+            index = self.ct_indexes[largest_ct].choice(self.rng)
         self.remove_index(index)
         return index
 
+    def _require_recent_chunks(self, index: int):
+        """Adds the chunks of `index` to the recent chunks, and drops the least recently needed chunks once their
+        estimated size exceeds the size of the cache. Chunks are estimated at the maximum chunk size of their tensor,
+        as their size is only known once they are fetched."""
+        for tensor, chunk_names in self._get_chunk_names(index).items():
+            for chunk_name in chunk_names:
+                chunk = (tensor, chunk_name)
+                if chunk in self.recent_chunks:
+                    self.recent_chunks.move_to_end(chunk)
+                    continue
+                size = self.all_chunk_engines[tensor].max_chunk_size
+                self.recent_chunks[chunk] = size
+                self.recent_chunks_size += size
+                self._update_count_dicts_insertion(tensor, chunk_name)
+        while self.recent_chunks_size > self.cache_size and len(self.recent_chunks) > 1:
+            (tensor, chunk_name), size = self.recent_chunks.popitem(last=False)
+            self.recent_chunks_size -= size
+            self._update_count_dicts_pop(tensor, chunk_name)
+
     def _update_count_dicts_insertion(self, tensor, chunk_name):
-        """Updates index_ct and ct_index after a new chunk is brought into shared memory."""
+        """Updates index_ct and ct_index after a chunk is added to the recent chunks."""
         start_index, end_index = self.all_chunks_start_end_index[tensor][chunk_name]
         for index in range(start_index, end_index + 1):
             # TODO: logic will need to be changed once we support big samples that go across chunks
@@ -86,7 +199,7 @@ class ShuffleLRUCache(PrefetchLRUCache):
                 self.ct_indexes[self.index_ct[index]].add(index)
 
     def _update_count_dicts_pop(self, tensor, chunk_name):
-        """Updates index_ct and ct_index after a chunk is popped from the cache."""
+        """Updates index_ct and ct_index after a chunk is dropped from the recent chunks."""
         start_index, end_index = self.all_chunks_start_end_index[tensor][chunk_name]
         for index in range(start_index, end_index + 1):
             # TODO: logic will need to be changed once we support big samples that go across chunks
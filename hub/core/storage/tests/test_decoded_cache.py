@@ -0,0 +1,64 @@
+import pickle
+import numpy as np
+import pytest
+import hub
+from hub.core.storage import DecodedSampleCache
+
+
+def test_decoded_cache():
+    cache = DecodedSampleCache(100)
+    sample = np.zeros(40, dtype=np.uint8)
+    assert cache.get("tensor/chunks/a", 0) is None
+    cache.put("tensor/chunks/a", 0, sample)
+    assert cache.get("tensor/chunks/a", 0) is sample
+    with pytest.raises(ValueError):
+        sample[0] = 1  # cached samples are shared by every read, so they are read-only
+
+    cache.put("tensor/chunks/a", 1, np.zeros(40, dtype=np.uint8))
+    cache.put("tensor/chunks/b", 0, np.zeros(40, dtype=np.uint8))
+    assert cache.get("tensor/chunks/a", 0) is None
+    assert (len(cache), cache.cache_used, cache.evictions) == (2, 80, 1)
+
+    # too large to be cached
+    cache.put("tensor/chunks/b", 1, np.zeros(101, dtype=np.uint8))
+    assert cache.get("tensor/chunks/b", 1) is None
+
+    cache.invalidate("tensor/chunks/a")
+    assert (len(cache), cache.cache_used) == (1, 40)
+    assert cache._tier_stats()["hits"] == 1
+
+    unpickled = pickle.loads(pickle.dumps(cache))
+    assert (unpickled.cache_size, len(unpickled)) == (100, 0)
+
+
+@pytest.mark.parametrize("policy", ["lru", "2q", "pinned"])
+def test_dataset_with_decoded_cache(policy):
+    ds = hub.dataset(
+        "mem://decoded_cache", decoded_cache_size=1, eviction_policy=policy
+    )
+    images = np.random.randint(0, 255, (10, 16, 16, 3), dtype=np.uint8)
+    ds.create_tensor("images", htype="image", sample_compression="png")
+    ds.images.extend(images)
+
+    decoded_cache = ds.storage.decoded_cache
+    np.testing.assert_array_equal(ds.images.numpy(), images)
+    assert decoded_cache.misses == 10 and len(decoded_cache) == 10
+    np.testing.assert_array_equal(ds.images.numpy(), images)
+    np.testing.assert_array_equal(ds[3].images.numpy(), images[3])
+    assert decoded_cache.hits == 11 and decoded_cache.misses == 10
+    assert (
+        ds.storage.cache_stats()[0]["policy"] == decoded_cache._tier_stats()["policy"]
+    )
+
+    # updating a sample drops the decoded samples of its chunk
+    ds.images[3] = np.zeros((16, 16, 3), dtype=np.uint8)
+    images[3] = 0
+    np.testing.assert_array_equal(ds.images.numpy(), images)
+
+    ds.images.append(np.ones((16, 16, 3), dtype=np.uint8))
+    np.testing.assert_array_equal(ds.images[-1].numpy(), np.ones((16, 16, 3)))
+    assert len(ds.images.numpy(aslist=True)) == 11
+
+
+def test_decoded_cache_disabled(memory_ds):
+    assert memory_ds.storage.decoded_cache is None
@@ -0,0 +1,135 @@
+import pickle
+import pytest
+from hub.core.storage import LRUCache, MemoryProvider
+from hub.core.storage.eviction import (
+    EVICTION_POLICIES,
+    LFUPolicy,
+    LRUPolicy,
+    PinnedPolicy,
+    TwoQueuePolicy,
+    get_eviction_policy,
+)
+
+
+HOT_KEYS = ["tensor/chunks/hot_0", "tensor/chunks/hot_1", "tensor/tensor_meta.json"]
+
+
+def _scan_then_reuse(policy: str):
+    """Reuses a few hot keys, scans over many cold chunks and returns the number of hits when reusing the hot keys."""
+    base = MemoryProvider("mem://base")
+    cold_keys = [f"tensor/chunks/{i}" for i in range(200)]
+    for key in HOT_KEYS + cold_keys:
+        base[key] = b"x"
+    cache = LRUCache(MemoryProvider("mem://cache"), base, 10, policy)
+
+    for _ in range(2):
+        for key in HOT_KEYS:
+            cache[key]
+    for key in cold_keys[:10]:
+        cache[key]
+    for _ in range(2):
+        for key in HOT_KEYS:
+            cache[key]
+
+    for key in cold_keys[10:]:
+        cache[key]
+
+    hits = cache.hits
+    for key in HOT_KEYS:
+        cache[key]
+    return cache.hits - hits
+
+
+@pytest.mark.parametrize("policy", ["lfu", "2q", "arc"])
+def test_scan_resistance(policy):
+    assert _scan_then_reuse("lru") == 0
+    assert _scan_then_reuse(policy) == len(HOT_KEYS)
+
+
+def test_pinned():
+    assert _scan_then_reuse("pinned") == 1  # only the tensor meta is pinned
+
+    policy = PinnedPolicy(LFUPolicy())
+    policy["tensor/chunks/a"] = 1
+    policy["tensor/chunk_id_encoder/unsharded"] = 1
+    policy["tensor/chunks/b"] = 1
+    policy.move_to_end("tensor/chunks/a")
+    assert policy.popitem() == ("tensor/chunks/b", 1)
+    assert policy.popitem() == ("tensor/chunks/a", 1)
+    assert policy.popitem() == ("tensor/chunk_id_encoder/unsharded", 1)
+    assert len(policy) == 0
+
+
+@pytest.mark.parametrize("name", list(EVICTION_POLICIES))
+def test_policy_bookkeeping(name):
+    policy = get_eviction_policy(name)
+    for i in range(10):
+        policy[f"tensor/chunks/{i}"] = i
+    policy.move_to_end("tensor/chunks/3")
+    policy["tensor/chunks/3"] = 30
+    assert policy["tensor/chunks/3"] == 30
+
+    assert policy.pop("tensor/chunks/5") == 5
+    assert "tensor/chunks/5" not in policy
+    assert policy.pop("missing", None) is None
+    with pytest.raises(KeyError):
+        policy.pop("missing")
+
+    evicted = {policy.popitem()[0] for _ in range(len(policy))}
+    assert evicted == {f"tensor/chunks/{i}" for i in range(10) if i != 5}
+    with pytest.raises(KeyError):
+        policy.popitem()
+
+    policy["a"] = 1
+    policy.clear()
+    assert len(policy) == 0
+
+
+def test_policy_order():
+    lru = LRUPolicy()
+    lfu = LFUPolicy()
+    for policy in (lru, lfu):
+        for key in "abc":
+            policy[key] = 1
+        policy.move_to_end("a")
+        policy.move_to_end("a")
+        policy.move_to_end("b")
+    assert [lru.popitem()[0] for _ in range(3)] == ["c", "a", "b"]
+    assert [lfu.popitem()[0] for _ in range(3)] == ["c", "b", "a"]
+
+    # overwriting a key that was promoted to the main queue keeps it there
+    two_queue = TwoQueuePolicy()
+    two_queue["a"] = 1
+    two_queue.popitem()
+    two_queue["a"] = 1
+    assert "a" in two_queue._main
+    two_queue.pop("a")
+    two_queue["a"] = 2
+    assert "a" in two_queue._main
+
+
+def test_invalid_policy():
+    with pytest.raises(ValueError):
+        get_eviction_policy("fifo")
+
+
+def test_cache_stats():
+    base = MemoryProvider("mem://base")
+    base["a"] = b"aa"
+    cache = LRUCache(
+        MemoryProvider("mem://cache"),
+        LRUCache(MemoryProvider("mem://cache_2"), base, 10, "arc"),
+        10,
+        "2q",
+    )
+    cache["a"]
+    cache["a"]
+    stats = cache.cache_stats()
+    assert [tier["policy"] for tier in stats] == ["2q", "arc"]
+    assert (stats[0]["hits"], stats[0]["misses"]) == (1, 1)
+    assert (stats[1]["hits"], stats[1]["misses"]) == (0, 1)
+    assert stats[0]["hit_ratio"] == 0.5
+
+    unpickled = pickle.loads(pickle.dumps(cache))
+    assert unpickled.eviction_policy == "2q"
+    assert unpickled.next_storage.lru_sizes.name == "arc"
@@ -0,0 +1,82 @@
+import pickle
+import numpy as np
+import hub
+from hub.constants import KB
+from hub.core.chunk import Chunk
+from hub.core.storage import (
+    LRUCache,
+    MemoryBudget,
+    MemoryProvider,
+    ShardedLRUCache,
+    get_memory_budget,
+)
+
+
+def test_budget_evicts_largest_cache():
+    budget = MemoryBudget(100)
+    busy = LRUCache(MemoryProvider(), MemoryProvider(), 100)
+    idle = LRUCache(MemoryProvider(), MemoryProvider(), 100)
+    budget.register(busy)
+    budget.register(idle)
+
+    for i in range(6):
+        idle[f"idle_{i}"] = bytes(10)
+    for i in range(10):
+        busy[f"busy_{i}"] = bytes(10)
+        assert budget.used <= 100
+
+    # the idle cache gave its memory up to the busy one, without losing data
+    assert idle.cache_used < 60 and busy.cache_used > 40
+    assert budget.evictions > 0
+    idle.flush()
+    assert len(idle.next_storage) == 6
+
+    budget.set_limit(30)
+    assert budget.used <= 30
+
+    budget.unregister(idle)
+    assert idle.memory_budget is None
+    assert len(budget.caches) == 1 and budget.caches[0] is busy
+
+
+def test_sharded_cache_budget():
+    budget = MemoryBudget(50)
+    sharded = ShardedLRUCache(MemoryProvider(), MemoryProvider(), 1000, num_shards=4)
+    other = LRUCache(MemoryProvider(), MemoryProvider(), 1000)
+    budget.register(sharded)
+    budget.register(other)
+    for i in range(20):
+        sharded[f"a_{i}"] = bytes(5)
+        other[f"b_{i}"] = bytes(5)
+    assert budget.used <= 50
+    sharded.flush()
+    assert all(sharded[f"a_{i}"] == bytes(5) for i in range(20))
+
+
+def test_decompressed_copies_are_accounted(memory_ds):
+    with memory_ds:
+        memory_ds.create_tensor("x", chunk_compression="lz4")
+        memory_ds.x.extend(np.zeros((10, 100, 100), dtype=np.uint8))
+    memory_ds.flush()
+    cache = memory_ds.storage
+    cache.clear_cache()
+
+    np.testing.assert_array_equal(memory_ds.x[0].numpy(), np.zeros((100, 100)))
+    # cached sizes are refreshed when the chunk is accessed again
+    memory_ds.x[1].numpy()
+    chunk_key = next(key for key in cache.lru_sizes if "/chunks/" in key)
+    chunk = cache.cache_storage[chunk_key]
+    assert isinstance(chunk, Chunk)
+    assert chunk.memory_nbytes >= chunk.nbytes + 10 * 100 * 100
+    assert cache.lru_sizes[chunk_key] == chunk.memory_nbytes
+
+
+def test_dataset_caches_share_process_budget(memory_ds):
+    assert memory_ds.storage.memory_budget is get_memory_budget()
+
+    cache = LRUCache(MemoryProvider(), MemoryProvider(), KB)
+    get_memory_budget().register(cache)
+    unpickled = pickle.loads(pickle.dumps(cache))
+    assert any(cache is unpickled for cache in get_memory_budget().caches)
+    unpickled = pickle.loads(pickle.dumps(LRUCache(MemoryProvider(), None, KB)))
+    assert unpickled.memory_budget is None
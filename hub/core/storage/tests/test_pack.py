@@ -0,0 +1,65 @@
+import os
+import pickle
+import pytest
+from hub.core.storage import PackProvider
+from hub.core.storage.tests.test_storage_provider import check_storage_provider
+from hub.constants import PACK_INDEX_FILENAME
+
+
+@pytest.fixture
+def pack_storage(local_path):
+    storage = PackProvider(local_path, max_pack_size=1000)
+    yield storage
+    storage.clear()
+
+
+def test_pack_provider(pack_storage):
+    check_storage_provider(pack_storage)
+
+
+def test_pack_persistence(pack_storage, local_path):
+    for i in range(50):
+        pack_storage[f"chunks/{i}"] = bytes([i]) * 100
+    pack_storage["meta"] = b"old"
+    pack_storage["meta"] = b"new"
+    del pack_storage["chunks/0"]
+
+    # objects are spread over multiple packs instead of one file per key
+    pack_files = [f for f in os.listdir(local_path) if f.startswith("pack_")]
+    assert 1 < len(pack_files) < 50
+
+    reopened = PackProvider(local_path, max_pack_size=1000)
+    assert len(reopened) == 50
+    assert reopened["meta"] == b"new"
+    assert reopened["chunks/7"] == bytes([7]) * 100
+    with pytest.raises(KeyError):
+        reopened["chunks/0"]
+    assert reopened.dead_bytes == 103
+
+    unpickled = pickle.loads(pickle.dumps(pack_storage))
+    assert unpickled._all_keys() == pack_storage._all_keys()
+
+    # a record that was only partially written is ignored
+    with open(os.path.join(local_path, PACK_INDEX_FILENAME), "ab") as f:
+        f.write(b"\x01\x00")
+    assert len(PackProvider(local_path)) == 50
+
+
+def test_pack_compaction(pack_storage, local_path):
+    for i in range(30):
+        pack_storage[f"key_{i % 10}"] = bytes([i]) * 100
+    view = pack_storage["key_9"]
+
+    size_before = pack_storage.nbytes
+    pack_storage.compact()
+    assert pack_storage.dead_bytes == 0
+    assert pack_storage.nbytes == 1000 < size_before
+    assert view == bytes([29]) * 100
+
+    for storage in (pack_storage, PackProvider(local_path)):
+        assert len(storage) == 10
+        for i in range(10):
+            assert storage[f"key_{i}"] == bytes([20 + i]) * 100
+
+    pack_storage["key_0"] = b"after compaction"
+    assert PackProvider(local_path)["key_0"] == b"after compaction"
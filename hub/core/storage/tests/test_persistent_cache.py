@@ -0,0 +1,180 @@
+import os
+import pickle
+import numpy as np
+import pytest
+from hub.constants import MB
+from hub.core.storage import LRUCache, MemoryProvider, PersistentCache
+from hub.core.storage.persistent_cache import _blob_key
+from hub.core.dataset import Dataset
+from hub.util.cache_chain import generate_chain
+
+
+CHUNK = "tensor/chunks/abc"
+ENCODER = "tensor/chunks_index/unsharded"
+META = "tensor/tensor_meta.json"
+
+
+@pytest.fixture
+def cache_root(tmp_path):
+    return str(tmp_path / "persistent_cache")
+
+
+def _base():
+    base = MemoryProvider("mem://base")
+    base[ENCODER] = b"encoder"
+    base[META] = b"meta"
+    base[CHUNK] = b"chunk"
+    return base
+
+
+def test_survives_restarts(cache_root):
+    base = _base()
+    cache = PersistentCache(base, 1 * MB, "ds", root=cache_root)
+    assert cache[CHUNK] == b"chunk"
+    assert cache[CHUNK] == b"chunk"
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.flush()
+
+    # a new process reading the same dataset finds the chunk, even if another cache holds it
+    cache = PersistentCache(base, 1 * MB, "ds", root=cache_root)
+    assert cache[CHUNK] == b"chunk"
+    assert (cache.hits, cache.misses) == (1, 0)
+
+    # metadata is never cached
+    assert cache[META] == b"meta"
+    assert cache.cache_used == len(b"chunk")
+
+    # chunks are tracked by the index, not by the state inherited from `LRUCache`
+    assert len(cache.lru_sizes) == 0
+    assert not cache.dirty_keys
+
+
+def test_get_bytes(cache_root):
+    cache = PersistentCache(_base(), 1 * MB, "ds", root=cache_root)
+    # a miss reads the range from the next storage, without caching the chunk
+    assert cache.get_bytes(CHUNK, 1, 3) == b"hu"
+    assert cache.cache_used == 0
+
+    cache[CHUNK]
+    assert cache.get_bytes(CHUNK, 1, 3) == b"hu"
+    assert cache.hits == 1
+
+
+def test_stale_entries(cache_root):
+    base = _base()
+    cache = PersistentCache(base, 1 * MB, "ds", root=cache_root)
+    cache[CHUNK]
+
+    # another writer appended to the tensor
+    base[CHUNK] = b"chunk + appended"
+    base[ENCODER] = b"encoder 2"
+    cache = PersistentCache(base, 1 * MB, "ds", root=cache_root)
+    assert cache[CHUNK] == b"chunk + appended"
+    assert cache.misses == 1
+
+    # writes go through to the next storage and drop the cached copy
+    cache[CHUNK] = b"updated"
+    assert base[CHUNK] == b"updated"
+    assert cache[CHUNK] == b"updated"
+    del cache[CHUNK]
+    with pytest.raises(KeyError):
+        base[CHUNK]
+    with pytest.raises(KeyError):
+        cache[CHUNK]
+    assert cache.cache_used == 0
+
+
+def test_eviction_across_namespaces(cache_root):
+    first = PersistentCache(_base(), 25, "first", root=cache_root)
+    second = PersistentCache(_base(), 25, "second", root=cache_root)
+    for i in range(4):
+        first.next_storage[f"tensor/chunks/{i}"] = bytes([i]) * 10
+
+    first["tensor/chunks/0"]
+    first["tensor/chunks/1"]
+    # identical content is stored once
+    second[CHUNK]
+    first[CHUNK]
+    assert first.cache_used == 25
+
+    first["tensor/chunks/2"]
+    assert first.cache_used <= 25
+    assert first.evictions > 0
+    objects = os.path.join(cache_root, "objects")
+    num_files = sum(len(files) for _, _, files in os.walk(objects))
+    assert num_files == len(first._db.execute("SELECT * FROM blobs").fetchall())
+
+    first.clear_cache()
+    assert first._db.execute(
+        "SELECT COUNT(*) FROM entries WHERE namespace = 'first'"
+    ).fetchone() == (0,)
+
+
+def test_eviction_reads_total_once(cache_root, monkeypatch):
+    monkeypatch.setattr("hub.core.storage.persistent_cache._EVICTION_BATCH_SIZE", 1)
+    cache = PersistentCache(_base(), 50, "ds", root=cache_root)
+    for i in range(5):
+        cache.next_storage[f"tensor/chunks/{i}"] = bytes([i]) * 10
+        cache[f"tensor/chunks/{i}"]
+    cache.next_storage["tensor/chunks/big"] = bytes(45)
+
+    queries = []
+    cache._db.set_trace_callback(queries.append)
+    cache["tensor/chunks/big"]
+    cache._db.set_trace_callback(None)
+
+    # 5 batches are evicted, with a single query of the total
+    assert cache.evictions == 5
+    assert sum("SUM(size)" in query for query in queries) == 1
+    assert cache.cache_used == 45
+
+
+def test_missing_blob(cache_root):
+    cache = PersistentCache(_base(), 1 * MB, "ds", root=cache_root)
+    cache[CHUNK]
+    (digest,) = cache._db.execute("SELECT digest FROM entries").fetchone()
+    del cache.cache_storage[_blob_key(digest)]
+    assert cache[CHUNK] == b"chunk"
+    assert cache.misses == 2
+
+
+def test_pickling(local_storage, cache_root):
+    for key, value in _base().dict.items():
+        local_storage[key] = value
+    cache = PersistentCache(local_storage, 1 * MB, "ds", root=cache_root)
+    cache[CHUNK]
+    unpickled = pickle.loads(pickle.dumps(cache))
+    assert unpickled[CHUNK] == b"chunk"
+    assert unpickled.hits == 1
+    assert CHUNK not in unpickled.lru_sizes
+
+
+def test_dataset_with_persistent_cache(local_ds, cache_root):
+    with local_ds:
+        local_ds.create_tensor("x", max_chunk_size=1000)
+        local_ds.x.extend(np.arange(1000).reshape(100, 10))
+    base = local_ds.storage.next_storage
+
+    chain = generate_chain(base, 1, 10 * MB, local_ds.path)
+    assert isinstance(chain.next_storage, PersistentCache)
+    assert chain.next_storage.namespace == local_ds.path
+
+    def load():
+        cache = PersistentCache(base, 10 * MB, local_ds.path, root=cache_root)
+        # a new memory cache every time, so all chunks are read from the persistent cache
+        return Dataset(LRUCache(MemoryProvider(), cache, 1 * MB)), cache
+
+    ds, cache = load()
+    np.testing.assert_array_equal(ds.x.numpy(), np.arange(1000).reshape(100, 10))
+    assert cache.misses > 0
+
+    ds, cache = load()
+    np.testing.assert_array_equal(ds.x.numpy(), np.arange(1000).reshape(100, 10))
+    assert cache.misses == 0
+
+    ds.x.append(np.ones(10, dtype=np.int64))
+    ds.flush()
+    ds, cache = load()
+    assert len(ds.x) == 101
+    np.testing.assert_array_equal(ds.x[-1].numpy(), np.ones(10))
+    np.testing.assert_array_equal(ds.x[:100].numpy(), np.arange(1000).reshape(100, 10))
@@ -0,0 +1,442 @@
+import numpy as np
+import pytest
+from hub.core.storage import SharedMemoryProvider
+from hub.core.storage.prefetch_lru_cache import (
+    PrefetchLRUCache,
+    _worker_pools,
+    close_worker_pools,
+    get_worker_pool,
+)
+from hub.core.storage.shuffle_lru_cache import ShuffleLRUCache
+from hub.core.storage.block_shuffle_lru_cache import BlockShuffleLRUCache
+from hub.util.prefetch_cache import get_worker_storage
+from hub.constants import MB
+
+
+def _labelled_dataset(ds, num_samples, **labels_kwargs):
+    """Fills `ds` with `num_samples` samples. The `data` of each sample is a 10x10 array filled with its label."""
+    with ds:
+        ds.create_tensor("data", max_chunk_size=1000)
+        ds.create_tensor("labels", **labels_kwargs)
+        ds.data.extend(
+            np.arange(num_samples, dtype=np.uint8).repeat(100).reshape(-1, 10, 10)
+        )
+        ds.labels.extend(np.arange(num_samples, dtype=np.uint32))
+    return ds
+
+
+def test_chunk_bookkeeping(local_ds):
+    ds = _labelled_dataset(local_ds, 50)
+
+    cache = ShuffleLRUCache(
+        SharedMemoryProvider(), None, 16 * MB, ds[5:45], 1, None, None
+    )
+    assert cache.all_indexes.tolist() == list(range(5, 45))
+    assert len(cache.all_remaining_indexes) == 40
+
+    ranges = cache._get_all_chunks_start_end_index()
+    assert len(ranges["data"]) == ds.data.chunk_engine.num_chunks > 1
+    for tensor, chunk_engine in cache.all_chunk_engines.items():
+        assert sorted(ranges[tensor].values())[-1][1] == 49
+        for index in range(50):
+            names = cache._get_chunk_names(index)[tensor]
+            assert names == chunk_engine.get_chunk_names_for_index(index)
+            start, end = ranges[tensor][names[0]]
+            assert start <= index <= end
+
+    cache = PrefetchLRUCache(SharedMemoryProvider(), None, 16 * MB, ds, 1, None, None)
+    assert [cache._suggest_next_index() for _ in range(3)] == [0, 1, 2]
+
+
+@pytest.mark.parametrize("cache_class", [PrefetchLRUCache, ShuffleLRUCache])
+@pytest.mark.parametrize("cache_size", [16 * MB, 2000])
+def test_pipelined_iteration(local_ds, cache_class, cache_size):
+    ds = _labelled_dataset(local_ds, 60, max_chunk_size=100)
+
+    cache = cache_class(SharedMemoryProvider(), None, cache_size, ds, 2, None, None)
+    labels = []
+    for sample in cache.iterate_samples():
+        label = int(sample["labels"][0])
+        np.testing.assert_array_equal(sample["data"], np.full((10, 10), label))
+        labels.append(label)
+
+    if cache_class is PrefetchLRUCache:
+        assert labels == list(range(60))
+    else:
+        assert sorted(labels) == list(range(60))
+    assert cache.required_chunks == {} and cache.cache_used == 0
+    arena = cache.cache_storage.arena
+    assert cache.cache_storage.slots == {} and arena.free_bytes == arena.size
+
+
+@pytest.mark.parametrize(
+    "compressions", [("png", None), (None, "lz4"), (None, "png"), (None, None)]
+)
+def test_decode_in_workers(local_ds, compressions):
+    sample_compression, chunk_compression = compressions
+    images = np.random.randint(0, 255, (20, 8, 8, 3), dtype=np.uint8)
+    with local_ds as ds:
+        ds.create_tensor(
+            "images",
+            htype="image",
+            sample_compression=sample_compression,
+            chunk_compression=chunk_compression,
+            max_chunk_size=1000,
+        )
+        ds.images.extend(images)
+
+    cache = PrefetchLRUCache(
+        SharedMemoryProvider(), None, 16 * MB, ds, 2, None, None, decode_in_workers=True
+    )
+    for index, sample in enumerate(cache.iterate_samples()):
+        np.testing.assert_array_equal(sample["images"], images[index])
+    compressed = sample_compression or chunk_compression
+    assert bool(cache.decompressed_chunks) == bool(compressed)
+
+
+def double_labels(sample):
+    sample["labels"] = sample["labels"] * 2
+    return sample
+
+
+@pytest.mark.parametrize("cache_class", [PrefetchLRUCache, ShuffleLRUCache])
+@pytest.mark.parametrize("cache_size", [16 * MB, 2000])
+def test_transform_in_workers(local_ds, cache_class, cache_size):
+    images = np.random.randint(0, 255, (40, 8, 8, 3), dtype=np.uint8)
+    with local_ds as ds:
+        ds.create_tensor(
+            "images", htype="image", sample_compression="png", max_chunk_size=1000
+        )
+        ds.create_tensor("labels", max_chunk_size=100)
+        ds.images.extend(images)
+        ds.labels.extend(np.arange(40, dtype=np.uint32))
+
+    cache = cache_class(
+        SharedMemoryProvider(),
+        None,
+        cache_size,
+        ds,
+        2,
+        None,
+        double_labels,
+        transform_in_workers=True,
+    )
+    labels = []
+    for sample in cache.iterate_samples():
+        index = int(sample["labels"][0]) // 2
+        np.testing.assert_array_equal(sample["images"], images[index])
+        labels.append(index)
+
+    if cache_class is PrefetchLRUCache:
+        assert labels == list(range(40))
+    else:
+        assert sorted(labels) == list(range(40))
+    assert cache.required_chunks == {} and len(cache.cache_storage) == 0
+
+
+@pytest.mark.parametrize("drop_last", [False, True])
+def test_iterate_batches(local_ds, drop_last):
+    torch = pytest.importorskip("torch")
+    with local_ds as ds:
+        ds.create_tensor("images", max_chunk_size=1000)
+        ds.create_tensor("labels", dtype="uint16", max_chunk_size=100)
+        ds.create_tensor("boxes")
+        ds.images.extend(np.arange(10, dtype=np.uint8).repeat(48).reshape(10, 4, 4, 3))
+        ds.labels.extend(np.arange(10, dtype=np.uint16))
+        ds.boxes.extend([np.ones((i // 4 + 1, 4), dtype=np.float32) for i in range(10)])
+
+    cache = PrefetchLRUCache(
+        SharedMemoryProvider(), None, 16 * MB, ds, 1, None, None, mode="pytorch"
+    )
+    batches = list(cache.iterate_batches(4, drop_last=drop_last))
+    assert [len(batch["labels"]) for batch in batches] == (
+        [4, 4] if drop_last else [4, 4, 2]
+    )
+    labels = torch.cat([batch["labels"] for batch in batches])
+    assert labels.dtype == torch.int32
+    assert labels.flatten().tolist() == list(range(len(labels)))
+    for batch in batches:
+        assert batch["images"].dtype == torch.uint8
+        np.testing.assert_array_equal(
+            batch["images"].numpy(),
+            batch["labels"].numpy().reshape(-1, 1, 1, 1) * np.ones((4, 4, 3)),
+        )
+        assert batch["boxes"].shape[1:] == (int(batch["labels"][0, 0]) // 4 + 1, 4)
+
+
+@pytest.mark.parametrize("cache_class", [PrefetchLRUCache, ShuffleLRUCache])
+def test_rank_sharding(local_ds, cache_class):
+    ds = _labelled_dataset(local_ds, 100)
+
+    caches = [
+        cache_class(
+            SharedMemoryProvider(),
+            None,
+            16 * MB,
+            ds[2:],
+            1,
+            None,
+            None,
+            world_size=3,
+            rank=rank,
+        )
+        for rank in range(3)
+    ]
+    for epoch in range(2):
+        shards = [
+            sorted(int(s["labels"][0]) for s in cache.iterate_samples())
+            for cache in caches
+        ]
+        assert [len(shard) for shard in shards] == [32, 32, 32]
+        indexes = set().union(*shards)
+        assert len(indexes) == 96 and min(indexes) >= 2
+
+        # only chunks at the boundaries between shards are shared by ranks
+        chunk_engine = caches[0].all_chunk_engines["data"]
+        chunk_sets = [
+            {chunk_engine.get_chunk_names_for_index(i)[0] for i in shard}
+            for shard in shards
+        ]
+        shared = sum(len(a & b) for a in chunk_sets for b in chunk_sets if a is not b)
+        assert shared <= 2 * 2
+        if epoch == 0:
+            first_epoch = shards
+    assert shards != first_epoch
+    assert all(cache.epoch == 2 for cache in caches)
+
+    with pytest.raises(ValueError):
+        cache_class(
+            SharedMemoryProvider(),
+            None,
+            16 * MB,
+            ds,
+            1,
+            None,
+            None,
+            world_size=2,
+            rank=2,
+        )
+
+
+def test_loader_worker_sharding(local_ds):
+    with local_ds as ds:
+        ds.create_tensor("labels", max_chunk_size=100)
+        ds.labels.extend(np.arange(101, dtype=np.uint32))
+
+    def shard(rank, worker):
+        cache = PrefetchLRUCache(
+            SharedMemoryProvider(),
+            None,
+            16 * MB,
+            ds,
+            0,
+            None,
+            None,
+            world_size=2,
+            rank=rank,
+            loader_workers=3,
+            loader_worker=worker,
+        )
+        return cache.all_indexes.tolist()
+
+    # ranks get the same number of samples, the workers of a rank split its samples between them
+    for rank in range(2):
+        shards = [shard(rank, worker) for worker in range(3)]
+        assert [len(s) for s in shards] == [16, 17, 17]
+        rank_indexes = set().union(*shards)
+        assert len(rank_indexes) == 50
+
+    with pytest.raises(ValueError):
+        shard(0, 3)
+
+
+@pytest.mark.parametrize("cache_class", [PrefetchLRUCache, ShuffleLRUCache])
+def test_in_process_iteration(local_ds, cache_class):
+    ds = _labelled_dataset(local_ds, 40)
+
+    # without workers, chunks are fetched in this process
+    cache = cache_class(
+        SharedMemoryProvider(), None, 2000, ds, 0, None, None, world_size=2
+    )
+    assert 0 not in _worker_pools
+    cache.set_epoch(3)
+    expected = cache._get_shard_indexes(3).tolist()
+    assert cache.all_indexes.tolist() == expected
+    shard = sorted(int(s["labels"][0]) for s in cache.iterate_samples())
+    assert shard == expected
+    assert len(shard) == 20 and cache.epoch == 4
+
+
+def test_persistent_worker_pool(local_ds):
+    with local_ds as ds:
+        ds.create_tensor("labels", max_chunk_size=100)
+        ds.labels.extend(np.arange(40, dtype=np.uint32))
+
+    caches = [
+        PrefetchLRUCache(SharedMemoryProvider(), None, 16 * MB, ds, 2, None, None)
+        for _ in range(2)
+    ]
+    # the workers are shared by the caches, and kept alive across epochs
+    pool = get_worker_pool(2)
+    for cache in caches * 2:
+        labels = [int(s["labels"][0]) for s in cache.iterate_samples()]
+        assert labels == list(range(40))
+        assert get_worker_pool(2) is pool
+
+    # once closed, the workers are started again by the next iteration
+    close_worker_pools()
+    assert 2 not in _worker_pools
+    labels = [int(s["labels"][0]) for s in caches[0].iterate_samples()]
+    assert labels == list(range(40)) and get_worker_pool(2) is not pool
+
+    # workers unpickle the storage of the dataset once
+    storage = get_worker_storage(caches[0].pickled_storage)
+    assert get_worker_storage(caches[1].pickled_storage) is storage
+    assert storage.root == caches[0].storage.root
+
+
+@pytest.mark.parametrize("cache_class", [PrefetchLRUCache, ShuffleLRUCache])
+def test_resume_from_state_dict(local_ds, cache_class):
+    ds = _labelled_dataset(local_ds, 60)
+
+    def new_cache():
+        return cache_class(
+            SharedMemoryProvider(), None, 16 * MB, ds, 1, None, None, world_size=2
+        )
+
+    cache = new_cache()
+    cache.set_epoch(1)
+    served = []
+    for sample in cache.iterate_samples():
+        served.append(int(sample["labels"][0]))
+        if len(served) == 12:
+            state = cache.state_dict()
+            break
+    assert state["epoch"] == 1 and state["position"] == 12
+
+    # a new cache, as after a restart, yields the rest of the epoch without fetching the chunks already consumed
+    resumed = new_cache()
+    resumed.load_state_dict(state)
+    fetched = []
+    submit = resumed._submit_chunk_group
+    resumed._submit_chunk_group = lambda group: fetched.extend(group) or submit(group)
+    rest = [int(sample["labels"][0]) for sample in resumed.iterate_samples()]
+    assert sorted(served + rest) == cache._get_shard_indexes(1).tolist()
+    if cache_class is PrefetchLRUCache:
+        assert served + rest == sorted(served + rest)
+        assert ("data", cache._get_chunk_names(served[0])["data"][0]) not in fetched
+    assert resumed.epoch == 2 and resumed.num_served == 0
+
+    with pytest.raises(ValueError):
+        new_cache().load_state_dict({**state, "rank": 1})
+
+
+@pytest.mark.parametrize("cache_class", [ShuffleLRUCache, BlockShuffleLRUCache])
+@pytest.mark.parametrize("cache_size", [16 * MB, 2500])
+def test_seeded_shuffle(local_ds, cache_class, cache_size):
+    ds = _labelled_dataset(local_ds, 60, max_chunk_size=100)
+
+    # without workers, samples are yielded in the order they are drawn
+    def new_cache():
+        return cache_class(
+            SharedMemoryProvider(), None, cache_size, ds, 0, None, None, shard_seed=5
+        )
+
+    def labels(cache):
+        return [int(sample["labels"][0]) for sample in cache.iterate_samples()]
+
+    order = labels(new_cache())
+    assert order == labels(new_cache())
+    assert sorted(order) == list(range(60)) and order != sorted(order)
+
+    cache = new_cache()
+    served = []
+    for sample in cache.iterate_samples():
+        served.append(int(sample["labels"][0]))
+        if len(served) == 20:
+            state = cache.state_dict()
+            break
+
+    # resuming yields the rest of the uninterrupted order
+    resumed = new_cache()
+    resumed.load_state_dict(state)
+    assert served + labels(resumed) == order
+
+
+@pytest.mark.parametrize("pool_chunks", [1, 3])
+def test_block_shuffle(local_ds, pool_chunks):
+    ds = _labelled_dataset(local_ds, 100)
+
+    cache = BlockShuffleLRUCache(
+        SharedMemoryProvider(),
+        None,
+        16 * MB,
+        ds,
+        2,
+        None,
+        None,
+        pool_chunks=pool_chunks,
+    )
+    suggest = cache._suggest_next_index
+    orders = []
+    for _ in range(2):
+        suggested, labels = [], []
+        cache._suggest_next_index = lambda: suggested.append(suggest()) or suggested[-1]
+        for sample in cache.iterate_samples():
+            label = int(sample["labels"][0])
+            np.testing.assert_array_equal(sample["data"], np.full((10, 10), label))
+            labels.append(label)
+        assert sorted(labels) == list(range(100))
+        assert cache.read_amplification == 1.0
+        orders.append(suggested)
+
+        # indexes are drawn from at most `pool_chunks` chunks at a time
+        chunk_engine = cache.all_chunk_engines["data"]
+        chunks = [chunk_engine.get_chunk_names_for_index(i)[0] for i in suggested]
+        first = {chunk: chunks.index(chunk) for chunk in chunks}
+        last = {chunk: i for i, chunk in enumerate(chunks)}
+        for i in range(len(chunks)):
+            assert sum(first[c] <= i <= last[c] for c in first) <= pool_chunks
+        if pool_chunks > 1:
+            assert chunks != sorted(chunks, key=first.get)
+    assert orders[0] != orders[1]
+
+    with pytest.raises(ValueError):
+        BlockShuffleLRUCache(
+            SharedMemoryProvider(), None, 16 * MB, ds, 1, None, None, pool_chunks=0
+        )
+
+
+def test_block_shuffle_resume(local_ds):
+    ds = _labelled_dataset(local_ds, 100)
+
+    def new_cache():
+        return BlockShuffleLRUCache(
+            SharedMemoryProvider(), None, 16 * MB, ds, 2, None, None, pool_chunks=3
+        )
+
+    def suggestions(cache):
+        suggested = []
+        suggest = cache._suggest_next_index
+        cache._suggest_next_index = lambda: suggested.append(suggest()) or suggested[-1]
+        return suggested
+
+    uninterrupted = new_cache()
+    order = suggestions(uninterrupted)
+    list(uninterrupted.iterate_samples())
+
+    cache = new_cache()
+    served = []
+    for sample in cache.iterate_samples():
+        served.append(int(sample["labels"][0]))
+        if len(served) == 35:
+            state = cache.state_dict()
+            break
+
+    # the groups are scheduled over the whole epoch again, and the groups that were open are open again
+    resumed = new_cache()
+    resumed.load_state_dict(state)
+    suggested = suggestions(resumed)
+    rest = [int(sample["labels"][0]) for sample in resumed.iterate_samples()]
+    assert sorted(served + rest) == list(range(100))
+    assert suggested == [index for index in order if index not in served]
@@ -0,0 +1,124 @@
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from hub.core.storage import MemoryProvider, ShardedLRUCache
+from hub.core.storage.tests.test_storage_provider import check_storage_provider
+
+
+class SlowProvider(MemoryProvider):
+    """Memory provider whose reads block until `release` is set, and which counts them."""
+
+    def __init__(self, root=""):
+        super().__init__(root)
+        self.reads = 0
+        self.release = threading.Event()
+
+    def __getitem__(self, path):
+        self.reads += 1
+        self.release.wait(timeout=5)
+        return super().__getitem__(path)
+
+
+def test_storage_interface():
+    cache = ShardedLRUCache(MemoryProvider(), MemoryProvider(), 1024, num_shards=4)
+    check_storage_provider(cache)
+
+    cache["a"] = b"abc"
+    assert cache.dirty_keys == {"a"}
+    assert cache.cache_used == 3
+    cache.flush()
+    assert cache.dirty_keys == set()
+    assert cache.next_storage["a"] == b"abc"
+
+    with pytest.raises(ValueError):
+        ShardedLRUCache(MemoryProvider(), MemoryProvider(), 1024, num_shards=0)
+
+
+def test_eviction_per_shard():
+    base = MemoryProvider()
+    cache = ShardedLRUCache(MemoryProvider(), base, 40, num_shards=4)
+    for i in range(100):
+        cache[f"key_{i}"] = bytes(5)
+    assert cache.cache_used <= 40
+    assert cache.evictions > 0
+    cache.flush()
+    assert len(base) == 100
+    assert all(cache[f"key_{i}"] == bytes(5) for i in range(100))
+
+
+def test_concurrent_misses_are_coalesced():
+    base = SlowProvider()
+    MemoryProvider.__setitem__(base, "chunk", b"data")
+    cache = ShardedLRUCache(MemoryProvider(), base, 1024)
+
+    with ThreadPoolExecutor(8) as executor:
+        futures = [executor.submit(cache.__getitem__, "chunk") for _ in range(8)]
+        while cache.hits + cache.misses < 8:
+            time.sleep(0.001)
+        base.release.set()
+        assert [future.result() for future in futures] == [b"data"] * 8
+
+    assert base.reads == 1
+    stats = cache.cache_stats()[0]
+    assert (stats["misses"], stats["coalesced"]) == (1, 7)
+
+    # a missing key raises in every waiting thread
+    base.release.clear()
+    with ThreadPoolExecutor(4) as executor:
+        futures = [executor.submit(cache.__getitem__, "missing") for _ in range(4)]
+        base.release.set()
+        for future in futures:
+            with pytest.raises(KeyError):
+                future.result()
+
+
+def test_write_during_read():
+    base = SlowProvider()
+    MemoryProvider.__setitem__(base, "chunk", b"old")
+    cache = ShardedLRUCache(MemoryProvider(), base, 1024)
+
+    with ThreadPoolExecutor(1) as executor:
+        future = executor.submit(cache.__getitem__, "chunk")
+        while cache.misses < 1:
+            time.sleep(0.001)
+        cache["chunk"] = b"new"
+        base.release.set()
+        assert future.result() == b"old"
+
+    # the value read before the write is not cached over the written one
+    assert cache["chunk"] == b"new"
+
+
+def test_concurrent_readers_and_writers():
+    base = MemoryProvider()
+    cache = ShardedLRUCache(MemoryProvider(), base, 256, "2q", num_shards=8)
+    keys = [f"tensor/chunks/{i}" for i in range(64)]
+    for key in keys:
+        base[key] = key.encode()
+
+    def work(seed):
+        for i in range(500):
+            key = keys[(seed * 31 + i * 7) % len(keys)]
+            if i % 10 == 0:
+                cache[key] = key.encode()
+            else:
+                assert cache[key] == key.encode()
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(work, range(8)))
+
+    cache.flush()
+    assert all(base[key] == key.encode() for key in keys)
+    assert cache.cache_used <= 256
+
+
+def test_pickling(local_storage):
+    cache = ShardedLRUCache(MemoryProvider(), local_storage, 1024, num_shards=4)
+    cache["a"] = b"abc"
+    unpickled = pickle.loads(pickle.dumps(cache))
+    assert unpickled.num_shards == 4
+    assert unpickled["a"] == b"abc"
+    assert unpickled.cache_stats()[0]["misses"] == 1
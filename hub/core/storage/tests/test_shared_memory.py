@@ -0,0 +1,64 @@
+import pickle
+import pytest
+from hub.core.storage import SharedMemoryArena, SharedMemoryProvider
+from hub.core.storage.shared_memory import ARENA_ALIGNMENT, HEADER_SIZE
+
+
+def test_arena_allocation():
+    arena = SharedMemoryArena(4 * ARENA_ALIGNMENT)
+    first = arena.allocate(1)
+    second = arena.allocate(ARENA_ALIGNMENT + 1)
+    assert first == (0, ARENA_ALIGNMENT)
+    assert second == (ARENA_ALIGNMENT, 2 * ARENA_ALIGNMENT)
+    assert arena.allocate(2 * ARENA_ALIGNMENT) is None
+
+    # freed slots are merged with their free neighbours
+    arena.free(*first)
+    assert arena.allocate(2 * ARENA_ALIGNMENT) is None
+    arena.free(*arena.shrink(*second, 1))
+    assert arena.free_bytes == arena.size
+    assert arena.allocate(4 * ARENA_ALIGNMENT) == (0, 4 * ARENA_ALIGNMENT)
+    arena.close()
+
+
+def test_provider_with_arena():
+    arena = SharedMemoryArena(4 * ARENA_ALIGNMENT)
+    provider = SharedMemoryProvider(arena=arena)
+    provider["small"] = b"abc"
+    provider["large"] = b"x" * 4 * ARENA_ALIGNMENT
+    assert "small" in provider.slots and "large" not in provider.slots
+    assert bytes(provider["small"]) == b"abc"
+    assert bytes(provider["large"]) == b"x" * 4 * ARENA_ALIGNMENT
+
+    # another process writes to the slot reserved for it, and is given the arena by name
+    slot = provider.reserve("reserved", 100)
+    copy = pickle.loads(pickle.dumps(arena))
+    assert copy.name == arena.name and copy.allocate(1) is None
+    copy.write(slot[0], b"def")
+    provider.update_slots({"reserved": 3})
+    assert bytes(provider["reserved"]) == b"def"
+    assert provider.slots["reserved"][1] == ARENA_ALIGNMENT
+
+    # slots that are pinned are only reused once they are unpinned
+    offset = provider.pin("small")
+    del provider["small"]
+    assert "small" not in provider.files and arena.allocate(3 * ARENA_ALIGNMENT) is None
+    provider.unpin(offset)
+    provider.clear()
+    assert len(provider) == 0 and arena.free_bytes == arena.size
+    arena.close()
+
+
+def test_reserved_slot_too_small():
+    arena = SharedMemoryArena(4 * ARENA_ALIGNMENT)
+    provider = SharedMemoryProvider(arena=arena)
+    provider.reserve("chunk", 10)
+    # the object was stored in a segment of its own, see `read_and_store_chunk_group`
+    SharedMemoryProvider()["chunk"] = b"y" * 100
+    provider.update_slots({"chunk": 100})
+    assert "chunk" not in provider.slots and arena.free_bytes == arena.size
+    assert bytes(provider["chunk"]) == b"y" * 100
+    provider.clear()
+    with pytest.raises(FileNotFoundError):
+        provider["chunk"]
+    arena.close()
@@ -1,7 +1,7 @@
 from hub.tests.storage_fixtures import enabled_storages, enabled_persistent_storages
 from hub.tests.cache_fixtures import enabled_cache_chains
 import pytest
-from hub.constants import MB
+from hub.constants import MB, LOCAL_MMAP_MIN_SIZE
 import pickle
 
 
@@ -132,3 +132,114 @@ def test_pickling(storage):
     pickled_storage = pickle.dumps(storage)
     unpickled_storage = pickle.loads(pickled_storage)
     assert unpickled_storage[FILE_1] == b"hello world"
+
+
+def test_local_mmap(local_storage):
+    if not local_storage.use_mmap:
+        pytest.skip("memory mapping is disabled on this platform")
+
+    small = b"a" * (LOCAL_MMAP_MIN_SIZE - 1)
+    large = b"b" * LOCAL_MMAP_MIN_SIZE
+    local_storage["small"] = small
+    local_storage["large"] = large
+
+    assert isinstance(local_storage["small"], bytes)
+    view = local_storage["large"]
+    assert isinstance(view, memoryview)
+    assert view.readonly
+    assert view == large
+
+    # overwriting or deleting a key must not invalidate views that are still alive
+    local_storage["large"] = b"c" * (2 * LOCAL_MMAP_MIN_SIZE)
+    assert view == large
+    assert local_storage["large"] == b"c" * (2 * LOCAL_MMAP_MIN_SIZE)
+    del local_storage["large"]
+    assert view == large
+
+    local_storage["large"] = large
+    assert len(local_storage) == 2
+    local_storage.clear()
+
+
+def test_s3_listing(s3_storage):
+    keys = {f"{KEY}_{i}" for i in range(3)}
+    keys |= {f"tensor_{i}/chunks/{j}" for i in range(3) for j in range(4)}
+    for key in keys:
+        s3_storage[key] = b"x"
+
+    assert s3_storage._all_keys() == keys
+    assert len(s3_storage) == len(keys)
+    s3_storage.clear()
+
+
+def test_s3_manifest(s3_storage):
+    from hub.core.storage import S3Provider
+
+    FILE_1 = f"{KEY}_1"
+    manifest_storage = S3Provider(s3_storage.root, use_manifest=True)
+    manifest_storage[FILE_1] = b"hello world"
+    manifest_storage["tensor/chunks/a"] = b"a"
+    manifest_storage.flush()
+
+    expected = {FILE_1, "tensor/chunks/a"}
+    assert S3Provider(s3_storage.root, use_manifest=True)._all_keys() == expected
+    assert s3_storage._all_keys() == expected  # the manifest itself is not listed
+
+    del manifest_storage["tensor/chunks/a"]
+    manifest_storage.flush()
+    reloaded = pickle.loads(pickle.dumps(manifest_storage))
+    assert reloaded.use_manifest
+    assert set(reloaded) == {FILE_1}
+
+    # a session that changes keys without flushing leaves the manifest marked incomplete
+    crashed = S3Provider(s3_storage.root, use_manifest=True)
+    crashed["tensor/chunks/b"] = b"b"
+    del crashed
+    assert S3Provider(s3_storage.root, use_manifest=True)._all_keys() == {
+        FILE_1,
+        "tensor/chunks/b",
+    }
+
+    manifest_storage.clear()
+    assert len(manifest_storage) == 0
+    assert len(s3_storage) == 0
+
+
+def test_flush_cascades_without_dirty_keys():
+    from hub.core.storage import LRUCache, MemoryProvider, ShardedLRUCache
+
+    class FlushCounter(MemoryProvider):
+        flushes = 0
+
+        def flush(self):
+            self.flushes += 1
+
+    for cache_class in (LRUCache, ShardedLRUCache):
+        base = FlushCounter()
+        cache = cache_class(MemoryProvider(), base, 32 * MB)
+        cache["a"] = b"a"
+        cache.flush()
+        del cache["a"]  # deletions go straight through to `base`
+        assert not cache.dirty_keys
+        cache.flush()
+        assert base.flushes == 2
+
+
+def test_local_mmap_open_files(local_storage):
+    resource = pytest.importorskip("resource")
+    if not local_storage.use_mmap:
+        pytest.skip("memory mapping is disabled on this platform")
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    limit = 64
+    resource.setrlimit(resource.RLIMIT_NOFILE, (limit, hard))
+    try:
+        for i in range(2 * limit):
+            local_storage[f"chunk_{i}"] = bytes([i]) * LOCAL_MMAP_MIN_SIZE
+        # retaining more chunks than files can be open must not run out of file descriptors
+        chunks = [local_storage[f"chunk_{i}"] for i in range(2 * limit)]
+        assert any(isinstance(chunk, memoryview) for chunk in chunks)
+        for i, chunk in enumerate(chunks):
+            assert chunk == bytes([i]) * LOCAL_MMAP_MIN_SIZE
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
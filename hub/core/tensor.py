@@ -1,5 +1,5 @@
 import numpy as np
-from typing import List, Sequence, Union, Optional, Tuple, Any
+from typing import Iterator, List, Sequence, Union, Optional, Tuple, Any
 from functools import reduce
 from hub.core.index import Index
 from hub.core.meta.tensor_meta import TensorMeta
@@ -256,9 +256,16 @@ class Tensor:
 
     def __getitem__(
         self,
-        item: Union[int, slice, List[int], Tuple[Union[int, slice, Tuple[int]]], Index],
+        item: Union[
+            int,
+            slice,
+            List[int],
+            np.ndarray,
+            Tuple[Union[int, slice, Tuple[int]]],
+            Index,
+        ],
     ):
-        if not isinstance(item, (int, slice, list, tuple, Index)):
+        if not isinstance(item, (int, slice, list, tuple, np.ndarray, Index)):
             raise InvalidKeyTypeError(item)
         return Tensor(self.key, self.storage, index=self.index[item])
 
@@ -331,6 +338,25 @@ class Tensor:
 
         return self.chunk_engine.numpy(self.index, aslist=aslist)
 
+    def iter_chunks(
+        self, aslist: bool = False
+    ) -> Iterator[Union[np.ndarray, List[np.ndarray]]]:
+        """Iterates over the contents of the tensor one chunk-aligned block at a time. Much faster than iterating over
+        the tensor sample by sample, since each chunk is located and decoded once per block.
+
+        Args:
+            aslist (bool): If True, each block is a list of np.ndarrays. Helpful for dynamic tensors.
+                If False, each block is a single np.ndarray with a leading sample axis.
+
+        Raises:
+            DynamicTensorNumpyError: If a block contains dynamically-shaped samples and `aslist=False`.
+
+        Yields:
+            Blocks of consecutive samples, each block holding samples from a single chunk.
+        """
+
+        yield from self.chunk_engine.iter_chunks(self.index, aslist=aslist)
+
     def __str__(self):
         index_str = f", index={self.index}"
         if self.index.is_trivial():
@@ -3,7 +3,9 @@ from hub.core.serialize import (
     deserialize_chunk,
     serialize_chunkids,
     deserialize_chunkids,
+    read_shape_info,
 )
+from hub.core.storage import MemoryProvider
 import numpy as np
 import hub
 import time
@@ -35,6 +37,34 @@ def test_chunk_serialize():
     assert b"".join(data) == bytes(data2)
 
 
+def test_read_shape_info():
+    version = hub.__version__
+    shape_info = np.cast[hub.constants.ENCODING_DTYPE](
+        np.random.randint(100, size=(17, 4))
+    )
+    byte_positions = np.cast[hub.constants.ENCODING_DTYPE](
+        np.random.randint(100, size=(31, 3))
+    )
+    storage = MemoryProvider()
+    storage["chunk"] = bytes(
+        serialize_chunk(version, shape_info, byte_positions, [b"x" * 1000])
+    )
+    storage["empty"] = bytes(serialize_chunk(version, np.array([]), np.array([]), []))
+
+    requested = []
+    get_bytes = storage.get_bytes
+    storage.get_bytes = lambda *args: requested.append(args) or get_bytes(*args)
+    header_size = 9 + len(version) + shape_info.nbytes
+    for prefix_size in [1024, 64, 4]:
+        requested.clear()
+        np.testing.assert_array_equal(
+            read_shape_info(storage, "chunk", prefix_size), shape_info
+        )
+        # only the header of the chunk is read, beyond the first prefix_size bytes
+        assert max(end for _, _, end in requested) <= max(prefix_size, header_size)
+    assert read_shape_info(storage, "empty").size == 0
+
+
 def test_chunkids_serialize():
     version = hub.__version__
     shards = [
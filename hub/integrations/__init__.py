@@ -1,2 +1,11 @@
-from .pytorch import dataset_to_pytorch
-from .tensorflow import dataset_to_tensorflow
+def __getattr__(name):
+    # framework integrations import torch / tensorflow, they are only imported on first use.
+    if name == "dataset_to_pytorch":
+        from .pytorch import dataset_to_pytorch
+
+        return dataset_to_pytorch
+    if name == "dataset_to_tensorflow":
+        from .tensorflow import dataset_to_tensorflow
+
+        return dataset_to_tensorflow
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
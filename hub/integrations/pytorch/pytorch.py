@@ -1,9 +1,12 @@
 from hub.util.storage import get_pytorch_local_storage
-from typing import Callable, Optional, Sequence
-from hub.core.storage import SharedMemoryProvider
+from typing import Callable, Optional, Sequence, Union
+from hub.core.storage import MemoryProvider, SharedMemoryProvider
 from hub.core.storage.prefetch_lru_cache import PrefetchLRUCache
 from hub.core.storage.shuffle_lru_cache import ShuffleLRUCache
+from hub.core.storage.block_shuffle_lru_cache import BlockShuffleLRUCache
+from hub.util.bucketing import ShapeBucketBatchSampler
 from hub.util.dataset import try_flushing
+from hub.util.remove_cache import get_base_storage
 from hub.util.exceptions import (
     DatasetUnsupportedSharedMemoryCache,
     DatasetUnsupportedPytorch,
@@ -31,6 +34,15 @@ def dataset_to_pytorch(
     shuffle: bool = False,
     buffer_size: int = 10 * 1000,
     use_local_cache: bool = False,
+    decode_in_workers: bool = False,
+    transform_in_workers: bool = False,
+    world_size: int = 1,
+    rank: int = 0,
+    shard_seed: int = 0,
+    use_dataloader_workers: bool = False,
+    persistent_workers: bool = False,
+    block_shuffle_chunks: Optional[int] = None,
+    bucket_by: Optional[Union[str, ShapeBucketBatchSampler]] = None,
 ):
     if not pytorch_installed:
         raise ModuleNotInstalledException(
@@ -39,6 +51,18 @@ def dataset_to_pytorch(
 
     try_flushing(dataset)
 
+    if bucket_by is not None:
+        if batch_size is None:
+            raise ValueError("bucket_by can only be used with a batch_size.")
+        if isinstance(bucket_by, str):
+            bucket_by = ShapeBucketBatchSampler(
+                dataset[bucket_by], batch_size, shuffle=shuffle, seed=shard_seed
+            )
+        elif bucket_by.batch_size != batch_size:
+            raise ValueError(
+                f"The batch_size of the sampler ({bucket_by.batch_size}) should be the batch_size of the data loader ({batch_size})."
+            )
+
     class TorchDataset(torch.utils.data.IterableDataset):
         def __init__(
             self,
@@ -49,41 +73,136 @@ def dataset_to_pytorch(
             shuffle: bool = False,
             buffer_size: int = 10 * 1000,
             use_local_cache: bool = False,
+            decode_in_workers: bool = False,
+            transform_in_workers: bool = False,
+            batch_size: Optional[int] = None,
+            drop_last: bool = False,
+            world_size: int = 1,
+            rank: int = 0,
+            shard_seed: int = 0,
+            use_dataloader_workers: bool = False,
+            block_shuffle_chunks: Optional[int] = None,
+            bucket_sampler: Optional[ShapeBucketBatchSampler] = None,
         ):
-            cache = ShuffleLRUCache if shuffle else PrefetchLRUCache
-            cache_storage = SharedMemoryProvider()
-            cache_size = buffer_size * MB
-            next_storage = (
+            self.dataset = dataset
+            self.transform = transform
+            self.tensors = tensors
+            self.num_workers = num_workers
+            self.shuffle = shuffle
+            self.block_shuffle_chunks = block_shuffle_chunks
+            # if set, samples are yielded in batches of similar shape, which the sampler shuffles instead of the cache
+            self.bucket_sampler = bucket_sampler
+            self.buffer_size = buffer_size
+            self.decode_in_workers = decode_in_workers
+            self.transform_in_workers = transform_in_workers
+            # if set, batches are assembled by the cache, see `PrefetchLRUCache.iterate_batches`
+            self.batch_size = batch_size
+            self.drop_last = drop_last
+            self.world_size = world_size
+            self.rank = rank
+            self.shard_seed = shard_seed
+            # the epoch that the next iteration over the DataLoader is, see `DataLoaderWithEpochs`
+            self.epoch = 0
+
+            self.next_storage = (
                 get_pytorch_local_storage(dataset) if use_local_cache else None
             )
 
             # currently cache can't work across sessions so it's better to clear it
-            if next_storage is not None:
-                next_storage.clear()
+            if self.next_storage is not None:
+                self.next_storage.clear()
+
+            # with DataLoader workers, every worker creates its own cache when it starts iterating
+            self.cache = None
+            if use_dataloader_workers:
+                if isinstance(get_base_storage(dataset.storage), MemoryProvider):
+                    raise DatasetUnsupportedPytorch(
+                        "Underlying storage of the dataset in MemoryProvider which is not supported."
+                    )
+            else:
+                self.cache = self._create_cache()
+
+        def _create_cache(self):
+            cache = ShuffleLRUCache if self.shuffle else PrefetchLRUCache
+            kwargs = {}
+            if self.bucket_sampler is not None:
+                cache = PrefetchLRUCache
+                kwargs["bucket_sampler"] = self.bucket_sampler
+            elif self.shuffle and self.block_shuffle_chunks is not None:
+                cache = BlockShuffleLRUCache
+                kwargs["pool_chunks"] = self.block_shuffle_chunks
+            num_workers = self.num_workers
+            worker_info = torch.utils.data.get_worker_info()
+            if worker_info is not None:
+                # every DataLoader worker iterates over its own shard of the rank's data, and fetches chunks itself
+                num_workers = 0
+                kwargs["loader_workers"] = worker_info.num_workers
+                kwargs["loader_worker"] = worker_info.id
 
             try:
-                self.cache = cache(
-                    cache_storage=cache_storage,
-                    next_storage=next_storage,
-                    cache_size=cache_size,
-                    dataset=dataset,
+                cache = cache(
+                    cache_storage=SharedMemoryProvider(),
+                    next_storage=self.next_storage,
+                    cache_size=self.buffer_size * MB,
+                    dataset=self.dataset,
                     num_workers=num_workers,
-                    tensor_keys=tensors,
-                    transform=transform,
+                    tensor_keys=self.tensors,
+                    transform=self.transform,
                     mode="pytorch",
+                    decode_in_workers=self.decode_in_workers,
+                    transform_in_workers=self.transform_in_workers,
+                    world_size=self.world_size,
+                    rank=self.rank,
+                    shard_seed=self.shard_seed,
+                    **kwargs,
                 )
             except DatasetUnsupportedSharedMemoryCache:
                 raise DatasetUnsupportedPytorch(
                     "Underlying storage of the dataset in MemoryProvider which is not supported."
                 )
+            cache.set_epoch(self.epoch)
+            return cache
 
         def __iter__(self):
+            if self.cache is None:
+                self.cache = self._create_cache()
+            if self.batch_size is not None:
+                yield from self.cache.iterate_batches(self.batch_size, self.drop_last)
+                return
             for value in self.cache.iterate_samples():
                 if value is not None:
                     yield value
 
+    class DataLoaderWithEpochs(torch.utils.data.DataLoader):
+        """Starts a new epoch of the dataset every time it is iterated over. DataLoader workers get a copy of the dataset
+        when iteration starts, so the epoch is advanced in the main process and passed on to the workers through it.
+        Persistent workers keep their copy, whose cache advances its own epoch at the end of every iteration."""
+
+        def __iter__(self):
+            iterator = super().__iter__()
+            self.dataset.epoch += 1
+            return iterator
+
+    class ResumableDataLoader(torch.utils.data.DataLoader):
+        """Can save its position in the current epoch with `state_dict`, and resume from it with `load_state_dict`,
+        for example after the training job is restarted. See `PrefetchLRUCache.state_dict`."""
+
+        def state_dict(self):
+            return self.dataset.cache.state_dict()
+
+        def load_state_dict(self, state_dict):
+            self.dataset.cache.load_state_dict(state_dict)
+
     # TODO new pytorch approach doesn't support 0 workers currently
     num_workers = max(num_workers, 1)
+
+    # without a transform or a custom collate_fn, samples are collated as they are read, see `PrefetchLRUCache.iterate_batches`
+    collate_in_cache = (
+        batch_size is not None
+        and collate_fn is None
+        and transform is None
+        and not transform_in_workers
+    )
     pytorch_ds = TorchDataset(
         dataset,
         transform,
@@ -92,10 +211,32 @@ def dataset_to_pytorch(
         shuffle,
         buffer_size,
         use_local_cache,
+        decode_in_workers,
+        transform_in_workers,
+        batch_size if collate_in_cache else None,
+        drop_last,
+        world_size,
+        rank,
+        shard_seed,
+        use_dataloader_workers,
+        block_shuffle_chunks,
+        bucket_by,
     )
-    if collate_fn is None:
+    if collate_in_cache:
+        batch_size, drop_last, collate_fn = None, False, default_convert_fn
+    elif collate_fn is None:
         collate_fn = default_convert_fn if batch_size is None else default_collate_fn
-    return torch.utils.data.DataLoader(  # type: ignore
+    if use_dataloader_workers:
+        return DataLoaderWithEpochs(
+            pytorch_ds,
+            batch_size=batch_size,
+            drop_last=drop_last,
+            collate_fn=collate_fn,
+            pin_memory=pin_memory,
+            num_workers=num_workers,
+            persistent_workers=persistent_workers,
+        )
+    return ResumableDataLoader(
         pytorch_ds,
         batch_size=batch_size,
         drop_last=drop_last,
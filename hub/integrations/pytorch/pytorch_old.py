@@ -4,13 +4,15 @@ import warnings
 import math
 import hub
 from typing import Callable, Union, Optional, Dict, Tuple, Sequence
-from hub.core.storage import MemoryProvider, LRUCache
+from hub.core.storage import MemoryProvider, LRUCache, get_memory_budget
+from hub.util.bucketing import ShapeBucketBatchSampler
 from hub.util.dataset import try_flushing
 from hub.util.remove_cache import get_base_storage
 from hub.util.iterable_ordered_dict import IterableOrderedDict
 from hub.util.exceptions import (
     DatasetUnsupportedPytorch,
     ModuleNotInstalledException,
+    PytorchOptionsUnsupportedError,
     TensorDoesNotExistError,
     SampleDecompressionError,
 )
@@ -30,8 +32,35 @@ def dataset_to_pytorch(
     shuffle: bool = False,
     buffer_size: int = 10 * 1000,
     use_local_cache: bool = False,
+    decode_in_workers: bool = False,
+    transform_in_workers: bool = False,
+    world_size: int = 1,
+    rank: int = 0,
+    shard_seed: int = 0,
+    use_dataloader_workers: bool = False,
+    persistent_workers: bool = False,
+    block_shuffle_chunks: Optional[int] = None,
+    bucket_by: Optional[Union[str, ShapeBucketBatchSampler]] = None,
     python_version_warning: bool = True,
 ):
+    # options of the shared memory implementation (see `pytorch.py`), that this one only supports at their defaults
+    options = {
+        "decode_in_workers": (decode_in_workers, False),
+        "transform_in_workers": (transform_in_workers, False),
+        "world_size": (world_size, 1),
+        "rank": (rank, 0),
+        "shard_seed": (shard_seed, 0),
+        "use_dataloader_workers": (use_dataloader_workers, False),
+        "persistent_workers": (persistent_workers, False),
+        "block_shuffle_chunks": (block_shuffle_chunks, None),
+        "bucket_by": (bucket_by, None),
+    }
+    unsupported = [
+        name for name, (value, default) in options.items() if value != default
+    ]
+    if unsupported:
+        raise PytorchOptionsUnsupportedError(unsupported)
+
     try_flushing(dataset)
 
     global torch
@@ -119,6 +148,7 @@ class TorchDataset:
             # creating a new cache for each process
             cache_size = 32 * MB * len(self.tensor_keys)
             cached_storage = LRUCache(MemoryProvider(), storage, cache_size)
+            get_memory_budget().register(cached_storage)
             self.dataset = hub.core.dataset.Dataset(
                 storage=cached_storage, index=self.index, verbose=False
             )
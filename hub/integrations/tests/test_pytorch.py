@@ -4,7 +4,11 @@ import pickle
 import pytest
 
 from hub.util.remove_cache import get_base_storage
-from hub.util.exceptions import DatasetUnsupportedPytorch, TensorDoesNotExistError
+from hub.util.exceptions import (
+    DatasetUnsupportedPytorch,
+    PytorchOptionsUnsupportedError,
+    TensorDoesNotExistError,
+)
 from hub.util.storage import get_pytorch_local_storage
 from hub.util.check_installation import requires_torch
 from hub.core.dataset import Dataset
@@ -119,7 +123,8 @@ def test_pytorch_small(ds):
 
 @requires_torch
 @enabled_datasets
-def test_pytorch_transform(ds):
+@pytest.mark.parametrize("transform_in_workers", [False, True])
+def test_pytorch_transform(ds, transform_in_workers):
     with ds:
         ds.create_tensor("image", max_chunk_size=PYTORCH_TESTS_MAX_CHUNK_SIZE)
         ds.image.extend(([i * np.ones((i + 1, i + 1)) for i in range(16)]))
@@ -131,7 +136,12 @@ def test_pytorch_transform(ds):
             dl = ds.pytorch(num_workers=2)
         return
 
-    dl = ds.pytorch(num_workers=2, transform=to_tuple, batch_size=1)
+    dl = ds.pytorch(
+        num_workers=2,
+        transform=to_tuple,
+        batch_size=1,
+        transform_in_workers=transform_in_workers,
+    )
 
     for _ in range(2):
         for i, batch in enumerate(dl):
@@ -142,7 +152,13 @@ def test_pytorch_transform(ds):
             np.testing.assert_array_equal(actual_image, expected_image)
             np.testing.assert_array_equal(actual_image2, expected_image2)
 
-    dls = ds.pytorch(num_workers=2, transform=to_tuple, batch_size=1, shuffle=True)
+    dls = ds.pytorch(
+        num_workers=2,
+        transform=to_tuple,
+        batch_size=1,
+        shuffle=True,
+        transform_in_workers=transform_in_workers,
+    )
 
     for _ in range(2):
         all_values = []
@@ -190,8 +206,9 @@ def test_pytorch_with_compression(ds: Dataset):
 
     dl = ds.pytorch(num_workers=2, batch_size=1)
     dls = ds.pytorch(num_workers=2, batch_size=1, shuffle=True)
+    dld = ds.pytorch(num_workers=2, batch_size=1, decode_in_workers=True)
 
-    for dataloader in [dl, dls]:
+    for dataloader in [dl, dls, dld]:
         for _ in range(2):
             for batch in dataloader:
                 X = batch["images"].numpy()
@@ -301,6 +318,39 @@ def test_custom_tensor_order(ds):
         np.testing.assert_array_equal(d1, d2)
 
 
+@requires_torch
+def test_pytorch_old_options(local_ds, monkeypatch):
+    with local_ds:
+        local_ds.create_tensor("image", max_chunk_size=PYTORCH_TESTS_MAX_CHUNK_SIZE)
+        local_ds.image.extend(np.array([i * np.ones((10, 10)) for i in range(16)]))
+
+    # without shared memory, `Dataset.pytorch` falls back to the old implementation
+    monkeypatch.setattr(
+        "hub.integrations.pytorch.dataset_to_pytorch", dataset_to_pytorch
+    )
+    dl = local_ds.pytorch(num_workers=2, batch_size=4)
+    for i, batch in enumerate(dl):
+        np.testing.assert_array_equal(
+            batch["image"].numpy(),
+            np.arange(4 * i, 4 * i + 4)[:, None, None] * np.ones((4, 10, 10)),
+        )
+    assert i == 3
+
+    unsupported = [
+        {"decode_in_workers": True},
+        {"transform_in_workers": True},
+        {"world_size": 2, "rank": 1},
+        {"shard_seed": 1},
+        {"use_dataloader_workers": True},
+        {"persistent_workers": True},
+        {"block_shuffle_chunks": 2},
+        {"batch_size": 4, "bucket_by": "image"},
+    ]
+    for options in unsupported:
+        with pytest.raises(PytorchOptionsUnsupportedError):
+            local_ds.pytorch(num_workers=2, **options)
+
+
 @requires_torch
 def test_readonly(local_ds):
     local_ds.create_tensor("images", max_chunk_size=PYTORCH_TESTS_MAX_CHUNK_SIZE)
@@ -384,3 +434,96 @@ def test_pytorch_local_cache(ds):
         )
         pytorch_small_shuffle_helper(0, 16, dls)
         local_cache.clear()
+
+
+@requires_torch
+@pytest.mark.parametrize(
+    "persistent_workers, num_samples", [(False, 60), (True, 60), (False, 63)]
+)
+def test_pytorch_dataloader_workers(local_ds, persistent_workers, num_samples):
+    with local_ds as ds:
+        ds.create_tensor("data", max_chunk_size=1000)
+        ds.create_tensor("labels")
+        ds.data.extend(
+            np.arange(num_samples, dtype=np.uint8)
+            .repeat(100)
+            .reshape(num_samples, 10, 10)
+        )
+        ds.labels.extend(np.arange(num_samples, dtype=np.uint32))
+
+    ptds = ds.pytorch(
+        num_workers=4,
+        batch_size=4,
+        use_dataloader_workers=True,
+        persistent_workers=persistent_workers,
+    )
+    epochs = []
+    for _ in range(2):
+        labels = []
+        for batch in ptds:
+            for data, label in zip(batch["data"], batch["labels"]):
+                np.testing.assert_array_equal(data.numpy(), np.full((10, 10), label))
+                labels.append(int(label))
+        # every DataLoader worker iterates over its own shard of the dataset, no sample is skipped
+        assert sorted(labels) == list(range(num_samples))
+        epochs.append(labels)
+    assert ptds.dataset.epoch == 2
+
+
+@requires_torch
+@pytest.mark.parametrize(
+    "shuffle, block_shuffle_chunks", [(False, None), (True, None), (True, 2)]
+)
+def test_pytorch_state_dict(local_ds, shuffle, block_shuffle_chunks):
+    with local_ds as ds:
+        ds.create_tensor("data", max_chunk_size=1000)
+        ds.create_tensor("labels")
+        ds.data.extend(np.arange(60, dtype=np.uint8).repeat(100).reshape(60, 10, 10))
+        ds.labels.extend(np.arange(60, dtype=np.uint32))
+
+    labels = []
+    kwargs = {"block_shuffle_chunks": block_shuffle_chunks}
+    ptds = ds.pytorch(num_workers=2, batch_size=4, shuffle=shuffle, **kwargs)
+    for i, batch in enumerate(ptds):
+        labels.extend(batch["labels"].flatten().tolist())
+        if i == 2:
+            state = ptds.state_dict()
+            break
+
+    resumed = ds.pytorch(num_workers=2, batch_size=4, shuffle=shuffle, **kwargs)
+    resumed.load_state_dict(state)
+    for batch in resumed:
+        labels.extend(batch["labels"].flatten().tolist())
+    assert sorted(labels) == list(range(60))
+    if not shuffle:
+        assert labels == list(range(60))
+    if block_shuffle_chunks:
+        assert resumed.dataset.cache.read_amplification == 1.0
+
+
+@requires_torch
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_pytorch_bucket_by(local_ds, shuffle):
+    with local_ds as ds:
+        ds.create_tensor("data", max_chunk_size=1000)
+        ds.create_tensor("labels")
+        for i in range(60):
+            ds.data.append(np.full((i % 3 + 1, 10), i, dtype=np.uint8))
+        ds.labels.extend(np.arange(60, dtype=np.uint32))
+
+    ptds = ds.pytorch(num_workers=2, batch_size=4, shuffle=shuffle, bucket_by="data")
+    epochs = []
+    for _ in range(2):
+        labels = []
+        for batch in ptds:
+            # every batch holds samples of the same shape, so they can be stacked without padding
+            for data, label in zip(batch["data"], batch["labels"]):
+                assert data.shape == (int(label) % 3 + 1, 10)
+                np.testing.assert_array_equal(data.numpy(), int(label))
+            labels.extend(batch["labels"].flatten().tolist())
+        assert sorted(labels) == list(range(60))
+        epochs.append(labels)
+    assert (epochs[0] != epochs[1]) == shuffle
+
+    with pytest.raises(ValueError):
+        ds.pytorch(batch_size=None, bucket_by="data")
@@ -0,0 +1,53 @@
+from typing import Iterable, Iterator, List, Union
+import numpy as np
+
+
+Block = Union[np.ndarray, List[np.ndarray]]
+
+
+def batch_blocks(
+    blocks: Iterable[Block], batch_size: int, num_samples: int, drop_last: bool = False
+) -> Iterator[Block]:
+    """Regroups variable sized blocks of samples into batches of `batch_size` samples.
+
+    Args:
+        blocks (Iterable[Block]): Blocks of samples, either arrays with a leading sample axis or lists of arrays.
+        batch_size (int): Number of samples per batch.
+        num_samples (int): Total number of samples to yield. Samples beyond this are ignored.
+        drop_last (bool): If True, the last batch is dropped if it has fewer than `batch_size` samples.
+
+    Yields:
+        Batches of the same type as the incoming blocks.
+    """
+
+    pending: List[Block] = []
+    pending_size = 0
+    remaining = num_samples
+
+    for block in blocks:
+        if remaining <= 0:
+            break
+
+        block = block[:remaining]
+        remaining -= len(block)
+
+        while len(block) > 0:
+            take = min(batch_size - pending_size, len(block))
+            pending.append(block[:take])
+            pending_size += take
+            block = block[take:]
+
+            if pending_size == batch_size:
+                yield _join(pending)
+                pending, pending_size = [], 0
+
+    if pending_size > 0 and not drop_last:
+        yield _join(pending)
+
+
+def _join(parts: List[Block]) -> Block:
+    if isinstance(parts[0], list):
+        return [sample for part in parts for sample in part]
+    if len(parts) == 1:
+        return parts[0]
+    return np.concatenate(parts)
@@ -0,0 +1,160 @@
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+
+def sample_sizes(shapes: np.ndarray, dim: Optional[int] = None) -> np.ndarray:
+    """Returns the size of every sample, given their shapes.
+
+    Args:
+        shapes (np.ndarray): Array of shape (num_samples, ndim), as returned by `ChunkEngine.read_sample_shapes`.
+        dim (int, optional): If set, the size of a sample is its length along this dimension (for example the number
+            of tokens of a sequence). Otherwise it is its number of elements.
+
+    Returns:
+        np.ndarray: The sizes, as int64.
+    """
+    shapes = shapes.astype(np.int64, copy=False)
+    if dim is not None:
+        return shapes[:, dim]
+    return np.prod(shapes, axis=1)
+
+
+def bucket_indexes(
+    sizes: np.ndarray,
+    batch_size: int,
+    window_batches: int = 32,
+    rng: Optional[np.random.Generator] = None,
+) -> np.ndarray:
+    """Orders samples so that every `batch_size` consecutive samples form a batch of samples of similar size.
+
+    Samples are split into windows of `batch_size * window_batches` consecutive samples, that are sorted by size and
+    cut into batches. Batches therefore only hold samples of the same window, which live in a few neighbouring chunks
+    if samples are in the order of their indexes. If `len(sizes)` isn't a multiple of `batch_size`, the only partial
+    batch comes last.
+
+    Args:
+        sizes (np.ndarray): Size of every sample, see `sample_sizes`.
+        batch_size (int): Number of samples per batch.
+        window_batches (int): Number of batches per window. Larger windows make batches more uniform, at the cost of
+            reading from more chunks at a time.
+        rng (np.random.Generator, optional): If set, samples of the same size are picked in random order, and both the
+            windows and the batches of each window are shuffled.
+
+    Returns:
+        np.ndarray: Positions in `sizes` of the samples, batch after batch.
+
+    Raises:
+        ValueError: If `batch_size` or `window_batches` is less than 1.
+    """
+    if batch_size < 1 or window_batches < 1:
+        raise ValueError(
+            f"batch_size and window_batches should be at least 1, got {batch_size} and {window_batches}."
+        )
+    num_samples = len(sizes)
+    positions = np.arange(num_samples)
+    windows = positions // (batch_size * window_batches)
+    ties = positions if rng is None else rng.random(num_samples)
+    order = np.lexsort((ties, sizes, windows))
+
+    num_batches = num_samples // batch_size
+    batches = order[: num_batches * batch_size].reshape(num_batches, batch_size)
+    if rng is not None and num_batches > 0:
+        batch_windows = np.arange(num_batches) // window_batches
+        window_order = rng.permutation(batch_windows[-1] + 1)
+        batches = batches[
+            np.lexsort((rng.random(num_batches), window_order[batch_windows]))
+        ]
+    return np.concatenate((batches.reshape(-1), order[num_batches * batch_size :]))
+
+
+class ShapeBucketBatchSampler:
+    """Yields batches of indexes of samples of similar shape, so that little padding is needed to stack them.
+
+    Shapes are read from the `ShapeEncoder` of every chunk of the tensor, without reading any sample, see
+    `ChunkEngine.read_sample_shapes`. Batches are formed within windows of consecutive samples (see `bucket_indexes`),
+    so that the samples of a batch live in neighbouring chunks, and the chunks of a window are read together.
+
+    Example:
+        >>> sampler = ShapeBucketBatchSampler(ds.images, batch_size=32, shuffle=True)
+        >>> for epoch in range(epochs):
+        ...     sampler.set_epoch(epoch)
+        ...     for batch in sampler:
+        ...         images = ds.images[batch].numpy(aslist=True)
+
+    The sampler can also be passed as `bucket_by` to `Dataset.pytorch`.
+
+    Args:
+        tensor (Tensor): The tensor whose shapes are used. If it is a view, batches hold indexes within the view.
+        batch_size (int): Number of samples per batch.
+        window_batches (int): Number of batches per window. Larger windows make batches more uniform, at the cost of
+            reading from more chunks at a time.
+        dim (int, optional): If set, samples are bucketed by their length along this dimension (for example the number
+            of tokens of a sequence). Otherwise they are bucketed by their number of elements.
+        shuffle (bool): If True, batches are shuffled, with a generator seeded by `seed` and the epoch.
+        seed (int): Seed of the shuffling.
+        drop_last (bool): If True, the last batch is dropped if it has fewer than `batch_size` samples.
+    """
+
+    def __init__(
+        self,
+        tensor,
+        batch_size: int,
+        window_batches: int = 32,
+        dim: Optional[int] = None,
+        shuffle: bool = False,
+        seed: int = 0,
+        drop_last: bool = False,
+    ):
+        if batch_size < 1 or window_batches < 1:
+            raise ValueError(
+                f"batch_size and window_batches should be at least 1, got {batch_size} and {window_batches}."
+            )
+        self.batch_size = batch_size
+        self.window_batches = window_batches
+        self.shuffle = shuffle
+        self.seed = seed
+        self.drop_last = drop_last
+        self.epoch = 0
+
+        # sizes of all the samples of the tensor, by global index
+        self.sizes = sample_sizes(tensor.chunk_engine.read_sample_shapes(), dim)
+        self.indexes = tensor.index.values[0].numpy(len(self.sizes))
+
+    def set_epoch(self, epoch: int):
+        """Sets the epoch of the next iteration, which the order of the batches depends on if `shuffle` is True."""
+        self.epoch = epoch
+
+    def order(self, indexes: np.ndarray, epoch: int) -> np.ndarray:
+        """Reorders global indexes of the tensor into batches of samples of similar size, batch after batch.
+
+        Indexes are bucketed in ascending order, which is the order of their chunks.
+        """
+        indexes = np.sort(indexes)
+        rng = np.random.default_rng((self.seed, epoch)) if self.shuffle else None
+        return indexes[
+            bucket_indexes(
+                self.sizes[indexes], self.batch_size, self.window_batches, rng
+            )
+        ]
+
+    def __iter__(self) -> Iterator[List[int]]:
+        positions = np.argsort(self.indexes, kind="stable")
+        rng = np.random.default_rng((self.seed, self.epoch)) if self.shuffle else None
+        order = positions[
+            bucket_indexes(
+                self.sizes[self.indexes[positions]],
+                self.batch_size,
+                self.window_batches,
+                rng,
+            )
+        ]
+        for batch in range(len(self)):
+            yield order[
+                batch * self.batch_size : (batch + 1) * self.batch_size
+            ].tolist()
+
+    def __len__(self) -> int:
+        if self.drop_last:
+            return len(self.indexes) // self.batch_size
+        return -(-len(self.indexes) // self.batch_size)
@@ -111,3 +111,15 @@ def feature_report_path(
         feature_name=feature_name,
         parameters=parameters,
     )
+
+
+_system_reported = False
+
+
+def system_report_once():
+    """Publishes the system report the first time it is called in a process. This runs when the first dataset is
+    opened, rather than when hub is imported."""
+    global _system_reported
+    if not _system_reported:
+        _system_reported = True
+        hub_reporter.system_report(publish=True)
@@ -1,13 +1,20 @@
-from hub.constants import LOCAL_CACHE_PREFIX
-from typing import List, Optional
+from typing import Callable, List, Optional, Union
 from uuid import uuid1
 
-from hub.core.storage import StorageProvider, MemoryProvider, LocalProvider
+from hub.core.storage import StorageProvider, MemoryProvider
+from hub.core.storage.decoded_cache import DecodedSampleCache
+from hub.core.storage.eviction import EvictionPolicy
 from hub.core.storage.lru_cache import LRUCache
+from hub.core.storage.memory_budget import get_memory_budget
+from hub.core.storage.persistent_cache import PersistentCache
 from hub.util.exceptions import ProviderSizeListMismatch, ProviderListEmptyError
 
 
-def get_cache_chain(storage_list: List[StorageProvider], size_list: List[int]):
+def get_cache_chain(
+    storage_list: List[StorageProvider],
+    size_list: List[int],
+    eviction_policy: Union[str, Callable[[], EvictionPolicy]] = "lru",
+):
     """Returns a chain of storage providers as a cache
 
     Args:
@@ -17,6 +24,7 @@ def get_cache_chain(storage_list: List[StorageProvider], size_list: List[int]):
         size_list (List[int]): The list of sizes of the caches in bytes.
             Should have size 1 less than provider_list and specifies size of cache for all providers except the last
             one. The last one is the primary storage and is assumed to have infinite space.
+        eviction_policy (str, Callable): The eviction policy used by every cache in the chain. See `LRUCache`.
 
     Returns:
         StorageProvider: Returns a cache containing all the storage providers in cache_list if cache_list has 2 or more
@@ -35,7 +43,7 @@ def get_cache_chain(storage_list: List[StorageProvider], size_list: List[int]):
         raise ProviderSizeListMismatch
     store = storage_list[-1]
     for size, cache in zip(reversed(size_list), reversed(storage_list[:-1])):
-        store = LRUCache(cache, store, size)
+        store = LRUCache(cache, store, size, eviction_policy)
     return store
 
 
@@ -44,6 +52,8 @@ def generate_chain(
     memory_cache_size: int,
     local_cache_size: int,
     path: Optional[str] = None,
+    eviction_policy: Union[str, Callable[[], EvictionPolicy]] = "lru",
+    decoded_cache_size: int = 0,
 ) -> StorageProvider:
     """Internal function to be used by Dataset, to generate a cache_chain using a base_storage and sizes of memory and
         local caches.
@@ -52,12 +62,17 @@ def generate_chain(
         base_storage (StorageProvider): The underlying actual storage of the Dataset.
         memory_cache_size (int): The size of the memory cache to be used in bytes.
         local_cache_size (int): The size of the local filesystem cache to be used in bytes.
-        path (str, optional): The path to the dataset. If not None, it is used to figure out the folder name where the local
-            cache is stored.
+        path (str, optional): The path to the dataset. If not None, chunks cached on the local filesystem are shared
+            with other processes and later runs opening the same path. See `PersistentCache`.
+        eviction_policy (str, Callable): The eviction policy used by the memory cache. One of "lru", "lfu", "2q",
+            "arc" or "pinned", or a factory returning an `EvictionPolicy`. See `LRUCache`.
+        decoded_cache_size (int): The size of the cache of decoded samples in bytes. If positive, decoded samples of
+            sample compressed tensors are cached, so they are only decoded once. See `DecodedSampleCache`.
 
     Returns:
         StorageProvider: Returns a cache containing the base_storage along with memory cache,
-            and local cache if a positive size has been specified for it.
+            and local cache if a positive size has been specified for it. The memory cache is registered with the
+            process-wide `MemoryBudget`.
     """
 
     if path:
@@ -67,17 +82,21 @@ def generate_chain(
     else:
         cached_dataset_name = str(uuid1())
 
-    storage_list: List[StorageProvider] = []
-    size_list: List[int] = []
-
-    # Always have a memory cache prefix. Required for support for Cachable objects.
-    storage_list.append(MemoryProvider(f"cache/{cached_dataset_name}"))
-    size_list.append(memory_cache_size)
-
+    next_storage = base_storage
     if local_cache_size > 0:
-        storage_list.append(
-            LocalProvider(f"{LOCAL_CACHE_PREFIX}/{cached_dataset_name}")
+        next_storage = PersistentCache(
+            base_storage, local_cache_size, namespace=path or cached_dataset_name
         )
-        size_list.append(local_cache_size)
-    storage_list.append(base_storage)
-    return get_cache_chain(storage_list, size_list)
+
+    # Always have a memory cache prefix. Required for support for Cachable objects.
+    storage_list: List[StorageProvider] = [
+        MemoryProvider(f"cache/{cached_dataset_name}"),
+        next_storage,
+    ]
+    cache = get_cache_chain(storage_list, [memory_cache_size], eviction_policy)
+    # the memory caches of all datasets in the process share one budget, see `set_memory_budget`
+    get_memory_budget().register(cache)
+    if decoded_cache_size > 0:
+        cache.decoded_cache = DecodedSampleCache(decoded_cache_size, eviction_policy)  # type: ignore
+        get_memory_budget().register(cache.decoded_cache)  # type: ignore
+    return cache
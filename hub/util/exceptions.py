@@ -73,6 +73,11 @@ class TensorDoesNotExistError(KeyError):
         super().__init__(f"Tensor '{tensor_name}' does not exist.")
 
 
+class ViewDoesNotExistError(KeyError):
+    def __init__(self, view_name: str):
+        super().__init__(f"View '{view_name}' does not exist.")
+
+
 class TensorAlreadyExistsError(Exception):
     def __init__(self, key: str):
         super().__init__(
@@ -498,6 +503,13 @@ class DatasetUnsupportedPytorch(Exception):
         )
 
 
+class PytorchOptionsUnsupportedError(Exception):
+    def __init__(self, options: Sequence[str]):
+        super().__init__(
+            f"The options {', '.join(options)} of Dataset.pytorch need shared memory, which is not available on Windows and before python 3.8. Leave them to their default values."
+        )
+
+
 class DatasetUnsupportedSharedMemoryCache(Exception):
     def __init__(self, reason):
         super().__init__(
@@ -0,0 +1,109 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+
+
+class IndexSet:
+    """Set of non-negative integer indexes that supports adding, removing and picking a random member in O(1).
+
+    Members are kept contiguously in an array. Removing a member moves the last member into its slot ("swap-remove"),
+    and a second structure maps each member to its slot. If `universe` is given, both are NumPy arrays sized for
+    indexes in `[0, universe)`, which is compact for dense sets (such as all the indexes of a dataset). Otherwise they
+    are a list and a dict, whose size is proportional to the number of members.
+
+    Args:
+        indexes (Iterable[int], optional): Initial members, which may be a NumPy array. Duplicates are ignored.
+        universe (int, optional): Exclusive upper bound of the indexes the set may contain, for the dense layout.
+    """
+
+    def __init__(
+        self,
+        indexes: Optional[Iterable[int]] = None,
+        universe: Optional[int] = None,
+    ):
+        self.universe = universe
+        self._values: Union[np.ndarray, List[int]]
+        self._positions: Union[np.ndarray, Dict[int, int]]
+        if universe is None:
+            self._values = []
+            self._positions = {}
+            self._size = 0
+            for index in indexes if indexes is not None else ():
+                self.add(index)
+            return
+
+        if indexes is None:
+            indexes = np.zeros(0, dtype=np.int64)
+        elif isinstance(indexes, np.ndarray):
+            indexes = indexes.astype(np.int64, copy=False)
+        else:
+            indexes = np.fromiter(indexes, dtype=np.int64)
+        if len(indexes) and (indexes.min() < 0 or indexes.max() >= universe):
+            raise ValueError(f"Indexes must be in [0, {universe}).")
+        if not np.all(indexes[1:] > indexes[:-1]):
+            # keeps the first occurrence of every index, in order
+            _, first = np.unique(indexes, return_index=True)
+            indexes = indexes[np.sort(first)]
+
+        # halves the memory of the set for datasets with less than 2**31 samples
+        dtype = np.int32 if universe <= np.iinfo(np.int32).max else np.int64
+        self._values = np.empty(universe, dtype=dtype)
+        self._values[: len(indexes)] = indexes
+        self._positions = np.full(universe, -1, dtype=dtype)
+        self._positions[indexes] = np.arange(len(indexes))
+        self._size = len(indexes)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __contains__(self, index) -> bool:
+        if self.universe is None:
+            return index in self._positions
+        return 0 <= index < self.universe and self._positions[index] >= 0
+
+    def __iter__(self) -> Iterator[int]:
+        for i in range(self._size):
+            yield int(self._values[i])
+
+    def add(self, index: int):
+        if index in self:
+            return
+        if self.universe is None:
+            self._values.append(index)  # type: ignore
+        else:
+            self._values[self._size] = index
+        self._positions[index] = self._size
+        self._size += 1
+
+    def discard(self, index: int):
+        if index not in self:
+            return
+        position = int(self._positions[index])
+        last = self._values[self._size - 1]
+        self._values[position] = last
+        self._positions[last] = position
+        self._size -= 1
+        if self.universe is None:
+            self._values.pop()  # type: ignore
+            del self._positions[index]  # type: ignore
+        else:
+            self._positions[index] = -1
+
+    def choice(self, rng: np.random.Generator) -> int:
+        """Returns a random member, in O(1).
+
+        Args:
+            rng (np.random.Generator): The generator the member is drawn with.
+
+        Returns:
+            int: The member drawn.
+
+        Raises:
+            IndexError: If the set is empty.
+        """
+        if not self._size:
+            raise IndexError("Cannot choose from an empty IndexSet.")
+        return int(self._values[rng.integers(self._size)])
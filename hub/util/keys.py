@@ -8,6 +8,10 @@ def get_chunk_key(key: str, chunk_name: str) -> str:
     return posixpath.join(key, constants.CHUNKS_FOLDER, f"{chunk_name}")
 
 
+def is_chunk_key(key: str) -> bool:
+    return posixpath.basename(posixpath.dirname(key)) == constants.CHUNKS_FOLDER
+
+
 def get_dataset_meta_key() -> str:
     # dataset meta is always relative to the `StorageProvider`'s root
     return constants.DATASET_META_FILENAME
@@ -22,6 +26,11 @@ def get_dataset_lock_key() -> str:
     return constants.DATASET_LOCK_FILENAME
 
 
+def get_dataset_view_key(name: str) -> str:
+    # views are always relative to the `StorageProvider`'s root
+    return posixpath.join(constants.DATASET_VIEWS_FOLDER, name)
+
+
 def get_tensor_meta_key(key: str) -> str:
     return posixpath.join(key, constants.TENSOR_META_FILENAME)
 
@@ -1,37 +1,242 @@
+import pickle
+import warnings
 from functools import lru_cache
-from typing import Dict, Tuple, Union, List
-from hub.core.storage import S3Provider, StorageProvider, SharedMemoryProvider
+from typing import Callable, Dict, Optional, Tuple, Union, List
+
+import numpy as np
+
+from hub.compression import get_compression_type, BYTE_COMPRESSION
+from hub.core.chunk import Chunk
+from hub.core.chunk_engine import read_local_sample
+from hub.core.compression import decompress_array
+from hub.core.meta.encode.byte_positions import BytePositionsEncoder
+from hub.core.serialize import serialize_chunk
+from hub.core.storage import StorageProvider, SharedMemoryProvider
+from hub.core.storage.shared_memory import HEADER_SIZE, SharedMemoryArena
+from hub.util.exceptions import SampleDecompressionError
+from hub.util.iterable_ordered_dict import IterableOrderedDict
 from hub.util.keys import get_chunk_key
 from hub.util.shared_memory import remove_shared_memory_from_resource_tracker
 
 
-@lru_cache()
-def get_s3_storage(state: tuple) -> S3Provider:
-    """Ensures that s3 clients aren't initialized over and over again in the same process"""
-    s3 = S3Provider.__new__(S3Provider)
-    s3.__setstate__(state)
-    return s3
+@lru_cache(maxsize=8)
+def get_worker_storage(pickled_storage: bytes) -> StorageProvider:
+    """Unpickles the storage provider of a dataset once per worker process, so that workers keep it open, along with its
+    clients and connections, across tasks, epochs and data loaders."""
+    return pickle.loads(pickled_storage)
+
+
+def decompress_chunk(
+    chunk_bytes: Union[bytes, memoryview],
+    dtype: str,
+    sample_compression: Optional[str],
+    chunk_compression: Optional[str],
+) -> Union[bytes, memoryview]:
+    """Decompresses all the samples of a serialized chunk and serializes them again as an uncompressed chunk, with the
+    same shapes. Samples of the result are read with `ChunkEngine.read_sample_from_chunk(..., decompressed=True)`.
+
+    Args:
+        chunk_bytes (bytes, memoryview): The serialized chunk.
+        dtype (str): The dtype of the samples of the chunk.
+        sample_compression (str, optional): The sample compression of the tensor of the chunk.
+        chunk_compression (str, optional): The chunk compression of the tensor of the chunk.
+
+    Returns:
+        bytes, memoryview: The serialized uncompressed chunk, or `chunk_bytes` if the chunk has no data.
+
+    Raises:
+        SampleDecompressionError: If any sample of the chunk can't be decompressed.
+    """
+    chunk = Chunk.frombuffer(chunk_bytes, copy=False)
+    if chunk.num_data_bytes == 0:
+        return chunk_bytes
+
+    shapes_encoder = chunk.shapes_encoder
+    if chunk_compression:
+        if get_compression_type(chunk_compression) == BYTE_COMPRESSION:
+            # samples keep their byte positions, only the data needs to be decompressed
+            return serialize_chunk(
+                chunk.version,
+                shapes_encoder.array,
+                chunk.byte_positions_encoder.array,
+                [chunk.decompressed_data(compression=chunk_compression)],
+            )
+        samples = chunk.decompressed_samples(compression=chunk_compression, dtype=dtype)
+    else:
+        buffer = chunk.memoryview_data
+        samples = []
+        for local_sample_index in range(shapes_encoder.num_samples):
+            sb, eb = chunk.byte_positions_encoder[local_sample_index]
+            shape = shapes_encoder[local_sample_index]
+            samples.append(
+                decompress_array(
+                    buffer[sb:eb], shape, dtype=dtype, compression=sample_compression
+                )
+            )
+
+    byte_positions_encoder = BytePositionsEncoder()
+    data = []
+    for sample in samples:
+        sample_bytes = np.ascontiguousarray(sample, dtype=dtype).tobytes()
+        byte_positions_encoder.register_samples(len(sample_bytes), 1)
+        data.append(sample_bytes)
+    return serialize_chunk(
+        chunk.version, shapes_encoder.array, byte_positions_encoder.array, data
+    )
 
 
 def read_and_store_chunk_group(
     chunk_group: List[Tuple[str, str]],
     shared_memory_names: List[str],
-    storage: Union[StorageProvider, tuple],
-):
-    """Reads chunks from the dataset's storage provider and stores them in the SharedMemory"""
-    # TODO: modify to support chunk-wise decompression
-    # TODO: if there's sample compression, then we need to decompress each sample present in the chunks before sending to SharedMemory to reduce work on the SharedMemory
+    storage: Union[StorageProvider, bytes],
+    tensor_compressions: Optional[
+        Dict[str, Tuple[str, Optional[str], Optional[str]]]
+    ] = None,
+    arena: Optional[SharedMemoryArena] = None,
+    slots: Optional[Dict[str, Tuple[int, int]]] = None,
+) -> Tuple[Dict[str, int], List[str]]:
+    """Reads chunks from the dataset's storage provider and stores them in the SharedMemory.
+
+    Chunks of the tensors in `tensor_compressions`, which maps each tensor to its dtype, sample compression and chunk
+    compression, are decompressed before being stored (see `decompress_chunk`). Chunks with samples that fail to
+    decompress are stored as they are.
+
+    Chunks that have a slot of `arena` reserved for them in `slots` (see `SharedMemoryProvider.reserve`) are written to
+    their slot if they fit in it, and the others to a shared memory segment of their own.
+
+    `storage` may be pickled, in which case it is only unpickled the first time the worker sees it (see
+    `get_worker_storage`).
+
+    Args:
+        chunk_group (List[Tuple[str, str]]): The tensor key and chunk name of each chunk to read.
+        shared_memory_names (List[str]): The name to store each chunk of `chunk_group` under.
+        storage (StorageProvider, bytes): The storage provider of the dataset, possibly pickled.
+        tensor_compressions (Dict, optional): The dtype, sample compression and chunk compression of the tensors
+            whose chunks are decompressed.
+        arena (SharedMemoryArena, optional): The arena that the slots in `slots` belong to.
+        slots (Dict[str, Tuple[int, int]], optional): The offset and size of the slot reserved for a chunk, by
+            shared memory name.
+
+    Returns:
+        The size of each chunk stored, by shared memory name, and the shared memory names of the decompressed chunks.
+    """
     remove_shared_memory_from_resource_tracker()
-    if isinstance(storage, tuple):
-        state: tuple = storage
-        storage = get_s3_storage(state)
+    if isinstance(storage, bytes):
+        storage = get_worker_storage(storage)
 
     chunk_sizes: Dict[str, int] = {}
+    decompressed: List[str] = []
+    shared_memory = SharedMemoryProvider()
+    slots = slots or {}
     for (key, chunk_name), shared_memory_name in zip(chunk_group, shared_memory_names):
         chunk_key = get_chunk_key(key, chunk_name)
         chunk_bytes = storage[chunk_key]
+        if tensor_compressions is not None and key in tensor_compressions:
+            try:
+                chunk_bytes = decompress_chunk(chunk_bytes, *tensor_compressions[key])
+                decompressed.append(shared_memory_name)
+            except SampleDecompressionError:
+                pass
         chunk_size = len(chunk_bytes)
         chunk_sizes[shared_memory_name] = chunk_size
-        shared_memory = SharedMemoryProvider()
-        shared_memory[shared_memory_name] = chunk_bytes
-    return chunk_sizes
+        slot = slots.get(shared_memory_name)
+        if slot is not None and slot[1] >= chunk_size + HEADER_SIZE:
+            arena.write(slot[0], chunk_bytes)  # type: ignore
+        else:
+            shared_memory[shared_memory_name] = chunk_bytes
+    return chunk_sizes, decompressed
+
+
+def get_pytorch_dtype(dtype: str):
+    """Returns the dtype that samples of `dtype` have in pytorch, both as a numpy dtype name and as a pytorch dtype.
+    Dtypes that pytorch doesn't support are promoted to ones that it does."""
+    import torch
+
+    compatible_dtypes = {
+        "uint16": "int32",
+        "uint32": "int64",
+        "uint64": "int64",
+    }
+    dtype = compatible_dtypes.get(dtype, dtype)
+    try:
+        torch_dtype = getattr(torch, np.dtype(dtype).name)  # type: ignore
+    except AttributeError:
+        raise TypeError(f"Dtype {dtype} is not supported by pytorch.")
+    return dtype, torch_dtype
+
+
+def to_pytorch(value: np.ndarray, dtype: str):
+    """Converts a sample to a pytorch tensor, casting dtypes that pytorch doesn't support to ones that it does."""
+    import torch
+
+    dtype, torch_dtype = get_pytorch_dtype(dtype)
+    return torch.as_tensor(value.astype(dtype), dtype=torch_dtype)  # type: ignore
+
+
+def transform_and_store_samples(
+    samples: List[Tuple[int, List[Tuple[str, str, int, bool]]]],
+    tensor_metas: Dict[str, Tuple[str, Optional[str], Optional[str]]],
+    fallback_storage: Optional[StorageProvider],
+    transform: Optional[Callable],
+    mode: Optional[str],
+    shared_memory_name: str,
+    arena: Optional[SharedMemoryArena] = None,
+    slots: Optional[Dict[str, int]] = None,
+) -> str:
+    """Reads, decompresses and transforms a batch of samples, and stores the results, pickled, in the SharedMemory.
+
+    Args:
+        samples (List): The index of each sample, with the location of the sample in each tensor. The location is
+            the tensor, the shared memory name of the chunk, the index of the sample within the chunk, and whether the
+            chunk was decompressed by `read_and_store_chunk_group`.
+        tensor_metas (Dict): The dtype, sample compression and chunk compression of each tensor.
+        fallback_storage (StorageProvider, optional): Where chunks that were evicted from shared memory are read from.
+        transform (Callable, optional): Transformation function to be applied to each sample.
+        mode (str, optional): If "pytorch", samples are converted to pytorch tensors before being transformed.
+        shared_memory_name (str): The name to store the results under.
+        arena (SharedMemoryArena, optional): The arena that the chunks in `slots` are stored in.
+        slots (Dict[str, int], optional): The offset in `arena` of the chunks stored there, by shared memory name.
+
+    Returns:
+        str: `shared_memory_name`. The results are a list with the output for each sample, None for corrupt samples.
+    """
+    remove_shared_memory_from_resource_tracker()
+    shared_memory = SharedMemoryProvider()
+    slots = slots or {}
+    chunks: Dict[str, Chunk] = {}
+    outputs: List[Optional[Union[Dict, Tuple]]] = []
+    for _, locations in samples:
+        sample = IterableOrderedDict()
+        for tensor, chunk_name, local_sample_index, decompressed in locations:
+            if chunk_name not in chunks:
+                try:
+                    if chunk_name in slots:
+                        # the slot is kept for this batch by the main process, even if the chunk is evicted
+                        chunk_bytes = arena.read(slots[chunk_name])  # type: ignore
+                    else:
+                        chunk_bytes = shared_memory[chunk_name]
+                except FileNotFoundError:
+                    # evicted after the batch was submitted, in which case it was moved to the fallback storage
+                    chunk_bytes = fallback_storage[chunk_name]  # type: ignore
+                chunks[chunk_name] = Chunk.frombuffer(chunk_bytes, copy=False)
+            dtype, sample_compression, chunk_compression = tensor_metas[tensor]
+            if decompressed:
+                sample_compression = chunk_compression = None
+            try:
+                value = read_local_sample(
+                    chunks[chunk_name],
+                    local_sample_index,
+                    dtype,
+                    sample_compression,
+                    chunk_compression,
+                )
+            except SampleDecompressionError:
+                warnings.warn(f"Skipping corrupt {sample_compression} sample.")
+                outputs.append(None)
+                break
+            sample[tensor] = to_pytorch(value, dtype) if mode == "pytorch" else value
+        else:
+            outputs.append(transform(sample) if transform is not None else sample)
+
+    shared_memory[shared_memory_name] = pickle.dumps(outputs)
+    return shared_memory_name
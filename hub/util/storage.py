@@ -4,7 +4,8 @@ from hub.util.tag import check_hub_path
 from typing import Optional
 from hub.core.storage.provider import StorageProvider
 import os
-from hub.core.storage import LocalProvider, S3Provider, MemoryProvider, LRUCache
+import sys
+from hub.core.storage import LocalProvider, MemoryProvider, LRUCache
 from hub.client.client import HubBackendClient
 
 
@@ -13,6 +14,7 @@ def storage_provider_from_path(
     creds: Optional[dict],
     read_only: bool = False,
     token: Optional[str] = None,
+    use_manifest: bool = False,
 ):
     """Construct a StorageProvider given a path.
 
@@ -22,6 +24,7 @@ def storage_provider_from_path(
             This takes precedence over credentials present in the environment. Only used when url is provided. Currently only works with s3 urls.
         read_only (bool): Opens dataset in read only mode if this is passed as True. Defaults to False.
         token (str): token for authentication into activeloop
+        use_manifest (bool): If True, s3 providers keep the list of keys of the dataset in a manifest. See `S3Provider`.
 
     Returns:
         If given a path starting with s3://  returns the S3Provider.
@@ -40,13 +43,24 @@ def storage_provider_from_path(
         session_token = creds.get("aws_session_token")
         endpoint_url = creds.get("endpoint_url")
         region = creds.get("region")
+        from hub.core.storage.s3 import S3Provider
+
         storage: StorageProvider = S3Provider(
-            path, key, secret, session_token, endpoint_url, region, token=token
+            path,
+            key,
+            secret,
+            session_token,
+            endpoint_url,
+            region,
+            token=token,
+            use_manifest=use_manifest,
         )
     elif path.startswith("mem://"):
         storage = MemoryProvider(path)
     elif path.startswith("hub://"):
-        storage = storage_provider_from_hub_path(path, read_only, token=token)
+        storage = storage_provider_from_hub_path(
+            path, read_only, token=token, use_manifest=use_manifest
+        )
     else:
         if not os.path.exists(path) or os.path.isdir(path):
             storage = LocalProvider(path)
@@ -59,7 +73,7 @@ def storage_provider_from_path(
 
 
 def storage_provider_from_hub_path(
-    path: str, read_only: bool = False, token: str = None
+    path: str, read_only: bool = False, token: str = None, use_manifest: bool = False
 ):
     check_hub_path(path)
     tag = path[6:]
@@ -76,13 +90,23 @@ def storage_provider_from_hub_path(
         print("Opening dataset in read-only mode as you don't have write permissions.")
         read_only = True
 
-    storage = storage_provider_from_path(url, creds, read_only)
+    storage = storage_provider_from_path(
+        url, creds, read_only, use_manifest=use_manifest
+    )
     storage._set_hub_creds_info(path, expiration)
     return storage
 
 
 def get_storage_and_cache_chain(
-    path, read_only, creds, token, memory_cache_size, local_cache_size
+    path,
+    read_only,
+    creds,
+    token,
+    memory_cache_size,
+    local_cache_size,
+    eviction_policy="lru",
+    decoded_cache_size=0,
+    use_manifest=False,
 ):
     """
     Returns storage provider and cache chain for a given path, according to arguments passed.
@@ -95,15 +119,26 @@ def get_storage_and_cache_chain(
         token (str): token for authentication into activeloop
         memory_cache_size (int): The size of the in-memory cache to use.
         local_cache_size (int): The size of the local cache to use.
+        eviction_policy (str, Callable): The eviction policy of the caches. See `LRUCache`.
+        decoded_cache_size (int): The size of the cache of decoded samples to use.
+        use_manifest (bool): If True, s3 providers keep the list of keys of the dataset in a manifest. See `S3Provider`.
 
     Returns:
         A tuple of the storage provider and the storage chain.
     """
-    storage = storage_provider_from_path(path, creds, read_only, token)
+    storage = storage_provider_from_path(
+        path, creds, read_only, token, use_manifest=use_manifest
+    )
     memory_cache_size_bytes = memory_cache_size * MB
     local_cache_size_bytes = local_cache_size * MB
+    decoded_cache_size_bytes = decoded_cache_size * MB
     storage_chain = generate_chain(
-        storage, memory_cache_size_bytes, local_cache_size_bytes, path
+        storage,
+        memory_cache_size_bytes,
+        local_cache_size_bytes,
+        path,
+        eviction_policy=eviction_policy,
+        decoded_cache_size=decoded_cache_size_bytes,
     )
     return storage, storage_chain
 
@@ -116,3 +151,9 @@ def get_pytorch_local_storage(dataset):
     local_cache_name = local_cache_name.replace("\\", "_")
     local_cache_path = f"{LOCAL_CACHE_PREFIX}/{local_cache_name}"
     return LocalProvider(local_cache_path)
+
+
+def is_s3_provider(storage: StorageProvider) -> bool:
+    """Checks if `storage` is an `S3Provider`, without importing boto3 when no S3 provider was ever created."""
+    s3 = sys.modules.get("hub.core.storage.s3")
+    return s3 is not None and isinstance(storage, s3.S3Provider)
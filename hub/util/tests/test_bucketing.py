@@ -0,0 +1,132 @@
+import numpy as np
+import pytest
+from hub.constants import MB
+from hub.core.dataset import Dataset
+from hub.core.storage import (
+    LRUCache,
+    MemoryProvider,
+    PersistentCache,
+    ShardedLRUCache,
+)
+from hub.util.bucketing import ShapeBucketBatchSampler, bucket_indexes, sample_sizes
+from hub.util.remove_cache import get_base_storage
+
+
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_bucket_indexes(shuffle):
+    sizes = np.random.default_rng(0).integers(1, 100, 103)
+    rng = np.random.default_rng(0) if shuffle else None
+    order = bucket_indexes(sizes, batch_size=4, window_batches=5, rng=rng)
+    assert sorted(order.tolist()) == list(range(103))
+
+    batches = [order[i : i + 4] for i in range(0, 103, 4)]
+    assert len(batches[-1]) == 3
+    windows = {int(window) for window in batches[-1] // 20}
+    assert windows == {5}
+    for batch in batches:
+        # batches never span two windows
+        assert len(set((batch // 20).tolist())) == 1
+    if not shuffle:
+        # within a window, batches are in ascending order of size
+        window = order[:20]
+        assert sizes[window].tolist() == sorted(sizes[:20].tolist())
+    else:
+        # the batches of a window are kept together
+        window_of_batches = [int(batch[0] // 20) for batch in batches[:-1]]
+        changes = np.flatnonzero(np.diff(window_of_batches))
+        assert len(changes) == 4
+        other = bucket_indexes(sizes, 4, 5, rng=np.random.default_rng(1))
+        assert order.tolist() != other.tolist()
+
+    with pytest.raises(ValueError):
+        bucket_indexes(sizes, 0)
+
+
+def test_sample_sizes():
+    shapes = np.array([[2, 3], [4, 1], [1, 5]])
+    assert sample_sizes(shapes).tolist() == [6, 4, 5]
+    assert sample_sizes(shapes, dim=0).tolist() == [2, 4, 1]
+
+
+def test_shape_bucket_batch_sampler(local_ds):
+    lengths = np.random.default_rng(0).integers(1, 50, 200)
+    with local_ds as ds:
+        ds.create_tensor("tokens", max_chunk_size=1000)
+        for length in lengths:
+            ds.tokens.append(np.ones(length, dtype=np.int32))
+    assert ds.tokens.chunk_engine.num_chunks > 1
+
+    shapes = ds.tokens.chunk_engine.read_sample_shapes()
+    assert shapes.tolist() == [[length] for length in lengths]
+    # chunks that aren't cached are not read, only their headers
+    ds.clear_cache()
+    np.testing.assert_array_equal(ds.tokens.chunk_engine.read_sample_shapes(), shapes)
+    assert not any("/chunks/" in key for key in ds.storage.lru_sizes)
+
+    def padding(batches):
+        return sum(
+            int(lengths[b].max()) * len(b) - int(lengths[b].sum()) for b in batches
+        )
+
+    sampler = ShapeBucketBatchSampler(ds.tokens, batch_size=8, window_batches=5)
+    batches = list(sampler)
+    assert len(batches) == len(sampler) == 25
+    assert sorted(sum(batches, [])) == list(range(200))
+    sequential = [list(range(i, i + 8)) for i in range(0, 200, 8)]
+    assert padding(batches) < padding(sequential) / 2
+
+    sampler = ShapeBucketBatchSampler(
+        ds.tokens, batch_size=8, shuffle=True, drop_last=True
+    )
+    first = list(sampler)
+    assert first == list(sampler)
+    sampler.set_epoch(1)
+    assert first != list(sampler)
+
+    # batches of a view hold indexes within the view
+    view = ds[50:150]
+    sampler = ShapeBucketBatchSampler(view.tokens, batch_size=16, drop_last=True)
+    batches = list(sampler)
+    assert len(batches) == len(sampler) == 6
+    assert max(sum(batches, [])) < 100
+    for batch in batches:
+        np.testing.assert_array_equal(
+            [len(sample) for sample in view.tokens[batch].numpy(aslist=True)],
+            lengths[50:150][batch],
+        )
+
+
+def test_read_sample_shapes_persistent_cache(local_ds, tmp_path):
+    lengths = np.random.default_rng(0).integers(1, 50, 100)
+    with local_ds as ds:
+        ds.create_tensor("tokens", max_chunk_size=1000)
+        for length in lengths:
+            ds.tokens.append(np.ones(length, dtype=np.int32))
+    base = get_base_storage(local_ds.storage)
+
+    def load():
+        cache = PersistentCache(base, 10 * MB, local_ds.path, root=str(tmp_path))
+        return Dataset(LRUCache(MemoryProvider(), cache, 1 * MB)), cache
+
+    # headers of chunks that aren't cached on disk are read from the next storage, without caching the chunks
+    ds, cache = load()
+    shapes = ds.tokens.chunk_engine.read_sample_shapes()
+    assert shapes.tolist() == [[length] for length in lengths]
+    assert cache.cache_used == 0
+
+    ds.tokens.numpy(aslist=True)
+    ds, cache = load()
+    np.testing.assert_array_equal(ds.tokens.chunk_engine.read_sample_shapes(), shapes)
+    assert cache.hits == ds.tokens.chunk_engine.num_chunks
+    assert cache.misses == 0
+
+
+def test_read_sample_shapes_sharded_cache():
+    # chunks that were not flushed yet are only in the shards of the cache
+    ds = Dataset(ShardedLRUCache(MemoryProvider(), MemoryProvider(), 32 * MB))
+    ds.create_tensor("tokens", max_chunk_size=1000)
+    lengths = np.random.default_rng(0).integers(1, 50, 100)
+    for length in lengths:
+        ds.tokens.append(np.ones(length, dtype=np.int32))
+    shapes = ds.tokens.chunk_engine.read_sample_shapes()
+    assert shapes.tolist() == [[length] for length in lengths]
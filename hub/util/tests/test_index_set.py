@@ -0,0 +1,47 @@
+import random
+import numpy as np
+import pytest
+from hub.util.index_set import IndexSet
+
+
+@pytest.mark.parametrize("universe", [None, 100])
+def test_index_set(universe):
+    indexes = IndexSet([5, 3, 5, 9], universe=universe)
+    assert len(indexes) == 3
+    assert list(indexes) == [5, 3, 9]
+    assert 3 in indexes and 4 not in indexes and 1000 not in indexes
+
+    indexes.add(4)
+    indexes.add(4)
+    indexes.discard(5)
+    indexes.discard(5)
+    assert sorted(indexes) == [3, 4, 9]
+
+    rng = np.random.default_rng(0)
+    picked = set()
+    while indexes:
+        index = indexes.choice(rng)
+        picked.add(index)
+        indexes.discard(index)
+    assert picked == {3, 4, 9}
+    with pytest.raises(IndexError):
+        indexes.choice(rng)
+
+
+def test_index_set_matches_set():
+    random.seed(0)
+    expected = set(range(0, 1000, 3))
+    indexes = IndexSet(expected, universe=1000)
+    for _ in range(5000):
+        index = random.randrange(1000)
+        if random.random() < 0.5:
+            indexes.add(index)
+            expected.add(index)
+        else:
+            indexes.discard(index)
+            expected.discard(index)
+        assert len(indexes) == len(expected)
+    assert set(indexes) == expected
+
+    with pytest.raises(ValueError):
+        IndexSet([1000], universe=1000)
@@ -3,6 +3,7 @@ from typing import Any, Dict, List, Tuple
 
 from hub.core.meta.tensor_meta import TensorMeta
 from hub.core.storage import StorageProvider, MemoryProvider, LRUCache
+from hub.core.storage.memory_budget import get_memory_budget
 from hub.core.chunk_engine import ChunkEngine
 from hub.core.meta.encode.chunk_id import ChunkIdEncoder
 from hub.core.transform.transform_dataset import TransformDataset
@@ -130,6 +131,7 @@ def create_worker_chunk_engines(
         memory_cache.autoflush = False
         storage_cache = LRUCache(MemoryProvider(), output_storage, 32 * MB)
         storage_cache.autoflush = False
+        get_memory_budget().register(storage_cache)
 
         # this chunk engine is used to retrieve actual tensor meta and chunk_size
         storage_chunk_engine = ChunkEngine(tensor, storage_cache)
@@ -158,6 +160,7 @@ def add_cache_to_dataset_slice(
     # TODO: adjust this size once we get rid of cachable
     cache_size = 64 * len(dataset_slice.tensors) * MB
     cached_store = LRUCache(MemoryProvider(), base_storage, cache_size)
+    get_memory_budget().register(cached_store)
     dataset_slice = hub.core.dataset.Dataset(
         cached_store,
         index=dataset_slice.index,